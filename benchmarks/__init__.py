@@ -0,0 +1,12 @@
+"""
+Benchmark suite of the VQE pipeline.
+
+Run ``python -m benchmarks`` from the project root; see benchmarks.runner for the options.
+The standalone ``bench_*.py`` scripts compare alternative implementations and are run directly.
+"""
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
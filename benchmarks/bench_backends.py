@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import argparse
+import pennylane as qml
+from pennylane import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from circuits import num_params, num_wires, register_hardware_efficient
+from optimization import get_cost_function
+
+BACKENDS = (
+    ('default.qubit', 'backprop'),
+    ('default.qubit', 'adjoint'),
+    ('numpy', 'adjoint'),
+)
+
+def throughput(circuit_type: str, backend: str, gradient_method: str, min_seconds: float):
+    """
+    Measure optimizer steps (one cost and gradient evaluation each) per second.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+        backend: A PennyLane device name or 'numpy'.
+        gradient_method: The differentiation method of PennyLane devices.
+        min_seconds: The minimum measured time.
+
+    Returns:
+        A tuple of (steps per second, cost at the initial parameters).
+    """
+    cost = get_cost_function(circuit_type, gradient_method, backend=backend)
+    params = np.array(np.linspace(0.1, 1.0, num_params(circuit_type)), requires_grad=True)
+    initial_cost = float(cost(params))
+    opt = qml.GradientDescentOptimizer(stepsize=0.01)
+    opt.step_and_cost(cost, params)
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        params, _ = opt.step_and_cost(cost, params)
+        steps += 1
+    return steps / (time.perf_counter() - start), initial_cost
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Cost+gradient throughput of the native NumPy backend vs. default.qubit')
+    parser.add_argument('--qubits', type=int, nargs='+', default=[2, 4, 6, 8, 10, 12], help='Numbers of qubits of the hardware-efficient ansatz')
+    parser.add_argument('--layers', type=int, default=2, help='Layers of the hardware-efficient ansatz')
+    parser.add_argument('--seconds', type=float, default=1.0, help='Minimum measured time per backend')
+    args = parser.parse_args()
+
+    circuits = ['default', 'alternate'] + [register_hardware_efficient(n, args.layers) for n in args.qubits]
+    print(f"{'circuit':<26} {'wires':>5} {'params':>6} " + " ".join(f"{f'{b}/{m}':>26}" for b, m in BACKENDS) + f" {'speedup':>8} {'max |dE|':>9}")
+    for circuit_type in circuits:
+        rates, costs = [], []
+        for backend, gradient_method in BACKENDS:
+            rate, cost = throughput(circuit_type, backend, gradient_method, args.seconds)
+            rates.append(rate)
+            costs.append(cost)
+        speedup = rates[-1] / max(rates[:-1])
+        error = max(abs(cost - costs[0]) for cost in costs)
+        print(f"{circuit_type:<26} {num_wires(circuit_type):>5} {num_params(circuit_type):>6} " + " ".join(f"{rate:>20.1f} it/s" for rate in rates) + f" {speedup:>7.1f}x {error:>9.1e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from batched_optimization import batched_optimize_vqe
+from optimization import optimize_vqe
+
+def time_pool(params_list, steps: int, stepsize: float, circuit_type: str, processes: int) -> float:
+    """
+    Time the multiprocessing.Pool multi-start path used by main.parallel_optimize_vqe.
+
+    Args:
+        params_list: The initial parameters, one per start.
+        steps: The number of optimization steps.
+        stepsize: The gradient descent step size.
+        circuit_type: A string indicating the type of the circuit.
+        processes: The number of worker processes.
+
+    Returns:
+        The wall time in seconds.
+    """
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes=processes) as pool:
+        pool.starmap(optimize_vqe, [(params, steps, stepsize, circuit_type) for params in params_list])
+    return time.perf_counter() - start
+
+def time_batched(params_list, steps: int, stepsize: float, circuit_type: str) -> float:
+    """
+    Time the vectorized single-core multi-start engine.
+
+    Args:
+        params_list: The initial parameters, one per start.
+        steps: The number of optimization steps.
+        stepsize: The gradient descent step size.
+        circuit_type: A string indicating the type of the circuit.
+
+    Returns:
+        The wall time in seconds.
+    """
+    start = time.perf_counter()
+    batched_optimize_vqe(params_list, steps, stepsize, circuit_type)
+    return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Batched multi-start engine vs. process pool')
+    parser.add_argument('--steps', type=int, default=50, help='Number of optimization steps per start')
+    parser.add_argument('--circuit', type=str, default='default', help='Circuit type')
+    parser.add_argument('--processes', type=int, default=4, help='Pool size of the baseline')
+    parser.add_argument('--starts', type=int, nargs='+', default=[64, 256, 1024], help='Numbers of random starts')
+    parser.add_argument('--pool-max-starts', type=int, default=64, help='Largest start count timed on the pool; larger ones are extrapolated linearly')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pool_per_start = None
+    print(f"{'starts':>7} {'pool (s)':>10} {'batched (s)':>12} {'speedup':>8}")
+    for n_starts in args.starts:
+        params_list = list(rng.random((n_starts, 2)))
+        if n_starts <= args.pool_max_starts or pool_per_start is None:
+            pool_time = time_pool(params_list, args.steps, 0.1, args.circuit, args.processes)
+            pool_per_start = pool_time / n_starts
+            label = f"{pool_time:>10.2f}"
+        else:
+            pool_time = pool_per_start * n_starts
+            label = f"{pool_time:>9.2f}*"
+        batched_time = time_batched(params_list, args.steps, 0.1, args.circuit)
+        print(f"{n_starts:>7} {label} {batched_time:>12.3f} {pool_time / batched_time:>7.1f}x")
+    print("* extrapolated from the largest measured pool run")
+
+if __name__ == "__main__":
+    main()
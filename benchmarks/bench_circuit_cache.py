@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import argparse
+import pennylane as qml
+from pennylane import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from circuits import apply_ansatz, get_vqe_qnode
+
+def legacy_cost_fn(params, circuit_type: str) -> float:
+    """
+    Evaluate the cost the way it was done before the QNode cache: a fresh device and
+    closure-based QNode on every call.
+
+    Args:
+        params: The circuit parameters.
+        circuit_type: A string indicating the type of the circuit.
+
+    Returns:
+        The calculated cost.
+    """
+    dev = qml.device('default.qubit', wires=2)
+
+    @qml.qnode(dev)
+    def circuit():
+        apply_ansatz(params, circuit_type)
+        return qml.expval(qml.PauliZ(0))
+
+    return circuit()
+
+def time_steps(cost, steps: int, stepsize: float) -> float:
+    """
+    Time gradient descent steps on the given cost function.
+
+    Args:
+        cost: The cost function of the parameters.
+        steps: The number of optimization steps to time.
+        stepsize: The gradient descent step size.
+
+    Returns:
+        The mean wall time per step in seconds.
+    """
+    params = np.array([0.1, 0.2], requires_grad=True)
+    opt = qml.GradientDescentOptimizer(stepsize=stepsize)
+    params, _ = opt.step_and_cost(cost, params)
+    start = time.perf_counter()
+    for _ in range(steps):
+        params, _ = opt.step_and_cost(cost, params)
+    return (time.perf_counter() - start) / steps
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Per-step latency of cached vs. rebuilt QNodes')
+    parser.add_argument('--steps', type=int, default=100, help='Number of timed optimization steps')
+    args = parser.parse_args()
+
+    print(f"{'circuit':<10} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>8}")
+    for circuit_type in ('default', 'alternate'):
+        before = time_steps(lambda p: legacy_cost_fn(p, circuit_type), args.steps, 0.1)
+        after = time_steps(get_vqe_qnode(circuit_type), args.steps, 0.1)
+        print(f"{circuit_type:<10} {before * 1e3:>12.3f} {after * 1e3:>12.3f} {before / after:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import argparse
+import pennylane as qml
+from pennylane import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from circuits import get_circuit_gates, get_vqe_qnode, num_params, register_circuit
+
+def register_layered(circuit_type: str, layers: int) -> str:
+    """
+    Register a circuit that repeats a registered circuit ``layers`` times with fresh parameters.
+
+    Args:
+        circuit_type: A string indicating the base circuit.
+        layers: The number of repetitions.
+
+    Returns:
+        The name of the layered circuit.
+    """
+    name = f"{circuit_type}_x{layers}"
+    width = num_params(circuit_type)
+    gates = [
+        (gate, wires, None if index is None else index + layer * width)
+        for layer in range(layers)
+        for gate, wires, index in get_circuit_gates(circuit_type)
+    ]
+    register_circuit(name, gates)
+    return name
+
+def time_gradient(circuit_type: str, gradient_method: str, repeats: int):
+    """
+    Time one optimizer step (cost and gradient) and count the circuit executions it needs.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+        gradient_method: The differentiation method.
+        repeats: The number of timed steps.
+
+    Returns:
+        A tuple of (seconds per step, circuit executions per step).
+    """
+    qnode = get_vqe_qnode(circuit_type, gradient_method=gradient_method)
+    params = np.array(np.linspace(0.1, 1.0, num_params(circuit_type)), requires_grad=True)
+    opt = qml.GradientDescentOptimizer(stepsize=0.1)
+    opt.step_and_cost(qnode, params)
+    with qml.Tracker(qnode.device) as tracker:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            params, _ = opt.step_and_cost(qnode, params)
+        elapsed = time.perf_counter() - start
+    return elapsed / repeats, tracker.totals.get('executions', 0) / repeats
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Wall time and circuit executions per step for each gradient method')
+    parser.add_argument('--layers', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='Numbers of repeated circuit layers')
+    parser.add_argument('--repeats', type=int, default=10, help='Number of timed steps')
+    args = parser.parse_args()
+
+    methods = ('backprop', 'adjoint', 'parameter-shift', 'finite-diff')
+    print(f"{'circuit':<14} {'params':>6} " + " ".join(f"{m:>24}" for m in methods))
+    for base in ('default', 'alternate'):
+        for layers in args.layers:
+            circuit_type = register_layered(base, layers)
+            cells = []
+            for method in methods:
+                seconds, executions = time_gradient(circuit_type, method, args.repeats)
+                cells.append(f"{seconds * 1e3:>9.2f} ms {executions:>6.0f} exec")
+            print(f"{circuit_type:<14} {num_params(circuit_type):>6} " + " ".join(f"{c:>24}" for c in cells))
+
+if __name__ == "__main__":
+    main()
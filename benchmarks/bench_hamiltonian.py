@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+import pennylane as qml
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from circuits import apply_ansatz, num_params, register_hardware_efficient
+from hamiltonian import Hamiltonian, get_group_qnodes, get_energy_fn, register_hamiltonian
+from statevector import expval
+
+DOUBLE_EXCITATION_WORDS = ('XXXX', 'YYYY', 'XXYY', 'YYXX', 'XYXY', 'YXYX', 'XYYX', 'YXXY')
+
+def molecular_hamiltonian(n_qubits: int, seed: int = 0) -> Hamiltonian:
+    """
+    Build a Hamiltonian with the term structure of a Jordan-Wigner encoded molecule.
+
+    It holds all Z_i and Z_i Z_j terms, X/Y hopping terms with Z strings between the two
+    qubits and the eight X/Y words of ``2 * n_qubits`` random double excitations, with
+    random coefficients.
+
+    Args:
+        n_qubits: The number of qubits.
+        seed: The seed of the coefficients and excitations.
+
+    Returns:
+        The Hamiltonian.
+    """
+    rng = np.random.default_rng(seed)
+
+    def word(paulis):
+        return ''.join(paulis.get(wire, 'I') for wire in range(n_qubits))
+
+    words = [word({})]
+    words += [word({i: 'Z'}) for i in range(n_qubits)]
+    words += [word({i: 'Z', j: 'Z'}) for i, j in itertools.combinations(range(n_qubits), 2)]
+    for i, j in itertools.combinations(range(n_qubits), 2):
+        string = {wire: 'Z' for wire in range(i + 1, j)}
+        words += [word({**string, i: p, j: p}) for p in 'XY']
+    quadruples = list(itertools.combinations(range(n_qubits), 4))
+    for index in rng.choice(len(quadruples), min(len(quadruples), 2 * n_qubits), replace=False):
+        words += [word(dict(zip(quadruples[index], paulis))) for paulis in DOUBLE_EXCITATION_WORDS]
+    return Hamiltonian([(coefficient, w) for coefficient, w in zip(rng.normal(scale=0.2, size=len(words)), words)])
+
+def per_term_energy_fn(circuit_type: str, observable: Hamiltonian):
+    """
+    Return an energy function that executes one circuit per non-identity term, and its device.
+    """
+    dev = qml.device('default.qubit', wires=observable.n_qubits)
+    wire_map = {wire: wire for wire in range(observable.n_qubits)}
+    qnodes = []
+    for coefficient, word in zip(observable.coeffs, observable.words):
+        if set(word) == {'I'}:
+            continue
+
+        @qml.qnode(dev, diff_method='parameter-shift')
+        def circuit(params, word=word):
+            apply_ansatz(params, circuit_type)
+            return qml.expval(qml.grouping.string_to_pauli_word(word, wire_map=wire_map))
+
+        qnodes.append((coefficient, circuit))
+
+    def energy(params):
+        return observable.constant + sum(coefficient * qnode(params) for coefficient, qnode in qnodes)
+
+    return energy, dev
+
+def time_energy(energy, dev, params: np.ndarray, repeats: int):
+    """
+    Time one energy evaluation and count the circuit executions it needs.
+
+    Returns:
+        A tuple of (energy, seconds per evaluation, executions per evaluation).
+    """
+    value = energy(params)
+    with qml.Tracker(dev) as tracker:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            energy(params)
+        elapsed = time.perf_counter() - start
+    return float(value), elapsed / repeats, tracker.totals.get('executions', 0) / repeats
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Circuit executions and wall time per energy evaluation, per term vs. grouped')
+    parser.add_argument('--qubits', type=int, nargs='+', default=[4, 6, 8, 10, 12], help='Numbers of qubits')
+    parser.add_argument('--layers', type=int, default=2, help='Layers of the hardware-efficient ansatz')
+    parser.add_argument('--repeats', type=int, default=3, help='Number of timed evaluations')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the Hamiltonians and parameters')
+    args = parser.parse_args()
+
+    print(f"{'qubits':>6} {'terms':>6} {'groups':>6} {'per-term exec':>14} {'per-term ms':>12} {'grouped exec':>13} {'grouped ms':>11} {'statevector ms':>15} {'max |dE|':>9}")
+    for n_qubits in args.qubits:
+        observable = molecular_hamiltonian(n_qubits, args.seed)
+        register_hamiltonian('benchmark', observable)
+        circuit_type = register_hardware_efficient(n_qubits, args.layers)
+        params = np.random.default_rng(args.seed).random(num_params(circuit_type))
+
+        per_term, per_term_dev = per_term_energy_fn(circuit_type, observable)
+        e_term, t_term, x_term = time_energy(per_term, per_term_dev, params, args.repeats)
+        grouped = get_energy_fn(circuit_type, 'benchmark', gradient_method='parameter-shift')
+        grouped_dev = get_group_qnodes(circuit_type, 'benchmark', 'default.qubit', 'parameter-shift')[0][0].device
+        e_group, t_group, x_group = time_energy(grouped, grouped_dev, params, args.repeats)
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            e_state = expval(params, circuit_type, 'benchmark')[0]
+        t_state = (time.perf_counter() - start) / args.repeats
+
+        error = max(abs(e_group - e_term), abs(e_state - e_term))
+        print(f"{n_qubits:>6} {len(observable):>6} {len(observable.groups):>6} {x_term:>14.0f} {t_term * 1e3:>12.1f} {x_group:>13.0f} {t_group * 1e3:>11.1f} {t_state * 1e3:>15.1f} {error:>9.1e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import fnmatch
+import logging
+import platform
+import argparse
+import statistics
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCHMARKS: Dict[str, Tuple[Callable[[], Callable[[], Any]], Dict[str, Any]]] = {}
+
+def register_benchmark(name: str, setup: Callable[[], Callable[[], Any]], **info: Any) -> None:
+    """
+    Register a benchmark.
+
+    Args:
+        name: A string naming the benchmark.
+        setup: Prepares the inputs outside the timed region and returns the zero-argument
+            callable that is timed.
+        info: Extra fields copied into the results (e.g. the problem size).
+
+    Returns:
+        None
+    """
+    BENCHMARKS[name] = (setup, info)
+
+def measure(fn: Callable[[], Any], warmup: int = 1, repeat: int = 5, min_time: float = 0.05) -> Dict[str, Any]:
+    """
+    Time a callable.
+
+    After ``warmup`` untimed calls, the number of calls per repeat is raised in powers of
+    ten until a repeat takes at least ``min_time`` seconds, so fast functions are not
+    dominated by timer resolution.
+
+    Args:
+        fn: The zero-argument callable.
+        warmup: The number of untimed calls.
+        repeat: The number of timed repeats.
+        min_time: The minimum duration of one repeat in seconds.
+
+    Returns:
+        The seconds per call of every repeat and their median, mean, standard deviation and minimum.
+    """
+    for _ in range(warmup):
+        fn()
+
+    def run(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - start
+
+    number = 1
+    elapsed = run(number)
+    while elapsed < min_time and number < 10 ** 6:
+        number *= 10
+        elapsed = run(number)
+    times = [elapsed / number] + [run(number) / number for _ in range(repeat - 1)]
+    return {
+        'number': number,
+        'repeat': repeat,
+        'times': times,
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'min': min(times),
+    }
+
+def environment() -> Dict[str, Any]:
+    """
+    Describe the machine and library versions the results were measured on.
+    """
+    import pennylane as qml
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pennylane': qml.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def run_benchmarks(patterns: Optional[List[str]] = None, warmup: int = 1, repeat: int = 5, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run the registered benchmarks.
+
+    Every benchmark is set up and timed with NumPy's global generator reseeded to ``seed``,
+    so the inputs are identical across invocations.
+
+    Args:
+        patterns: fnmatch patterns selecting benchmarks by name. Defaults to all.
+        warmup: The number of untimed calls per benchmark.
+        repeat: The number of timed repeats per benchmark.
+        seed: The seed of the inputs.
+
+    Returns:
+        A dictionary with the ``environment`` and the ``results`` per benchmark name.
+    """
+    results = {}
+    for name, (setup, info) in BENCHMARKS.items():
+        if patterns and not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            continue
+        np.random.seed(seed)
+        fn = setup()
+        np.random.seed(seed)
+        # The pipeline logs every run; keep the benchmark output readable
+        logging.disable(logging.INFO)
+        try:
+            results[name] = {**info, **measure(fn, warmup, repeat)}
+        finally:
+            logging.disable(logging.NOTSET)
+        logging.info(f"{name}: {results[name]['median'] * 1e3:.3f} ms per call (median of {repeat} x {results[name]['number']})")
+    return {'environment': environment(), 'seed': seed, 'results': results}
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.2) -> List[Dict[str, Any]]:
+    """
+    Compare median times with a baseline.
+
+    Args:
+        results: The output of run_benchmarks.
+        baseline: An earlier output of run_benchmarks.
+        threshold: The relative slowdown above which a benchmark counts as a regression.
+
+    Returns:
+        One row per benchmark with the current and baseline medians, their ratio and a
+        status: 'regression', 'improvement', 'ok' or 'new'.
+    """
+    rows = []
+    for name, result in results['results'].items():
+        reference = baseline.get('results', {}).get(name)
+        if reference is None:
+            rows.append({'name': name, 'median': result['median'], 'baseline': None, 'ratio': None, 'status': 'new'})
+            continue
+        ratio = result['median'] / reference['median']
+        status = 'regression' if ratio > 1 + threshold else 'improvement' if ratio < 1 / (1 + threshold) else 'ok'
+        rows.append({'name': name, 'median': result['median'], 'baseline': reference['median'], 'ratio': ratio, 'status': status})
+    return rows
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks of the VQE pipeline with baseline regression checks')
+    parser.add_argument('patterns', nargs='*', help='fnmatch patterns selecting benchmarks (default: all)')
+    parser.add_argument('--list', action='store_true', help='List the benchmarks and exit')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed calls per benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repeats per benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the benchmark inputs')
+    parser.add_argument('--output', type=str, default='benchmarks/results.json', help='Path of the JSON results')
+    parser.add_argument('--baseline', type=str, help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+    import benchmarks.suite  # noqa: F401  (registers the benchmarks)
+
+    if args.list:
+        for name, (_, info) in BENCHMARKS.items():
+            print(name, json.dumps(info) if info else '')
+        return 0
+
+    results = run_benchmarks(args.patterns, args.warmup, args.repeat, args.seed)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    logging.info(f"Results saved at {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold)
+    print(f"{'benchmark':<40} {'median ms':>12} {'baseline ms':>12} {'ratio':>7}  status")
+    for row in rows:
+        reference = f"{row['baseline'] * 1e3:>12.3f}" if row['baseline'] is not None else f"{'-':>12}"
+        ratio = f"{row['ratio']:>7.2f}" if row['ratio'] is not None else f"{'-':>7}"
+        print(f"{row['name']:<40} {row['median'] * 1e3:>12.3f} {reference} {ratio}  {row['status']}")
+    regressions = [row['name'] for row in rows if row['status'] == 'regression']
+    if regressions:
+        logging.warning(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
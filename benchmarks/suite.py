@@ -0,0 +1,76 @@
+import os
+import atexit
+import shutil
+import tempfile
+import numpy as np
+from pennylane import numpy as pnp
+
+from benchmarks.runner import register_benchmark
+from circuits import num_params
+from optimization import cost_fn, optimize_vqe
+from quantum_metrics import calculate_statistics
+from analysis import analyze_results
+from worker_pool import WorkerPool
+from main import parallel_optimize_vqe
+
+CIRCUIT = 'default'
+STEPSIZE = 0.1
+PARALLEL_STEPS = 50
+STATISTICS_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
+
+def _params() -> np.ndarray:
+    return pnp.array(np.random.random(num_params(CIRCUIT)), requires_grad=True)
+
+def _scratch_dir() -> str:
+    path = tempfile.mkdtemp(prefix='vqe_bench_')
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+def _cost_fn(backend: str):
+    def setup():
+        params = _params()
+        return lambda: cost_fn(params, CIRCUIT, backend=backend)
+    return setup
+
+def _optimize(steps: int):
+    def setup():
+        params = _params()
+        return lambda: optimize_vqe(params, steps, STEPSIZE, CIRCUIT)
+    return setup
+
+def _parallel(processes: int, starts: int):
+    def setup():
+        params_list = [np.random.random(num_params(CIRCUIT)) for _ in range(starts)]
+
+        def run():
+            # Запуск пула входит в измерение, как и в main.py
+            with WorkerPool(processes=processes) as pool:
+                parallel_optimize_vqe(params_list, PARALLEL_STEPS, STEPSIZE, CIRCUIT, pool=pool)
+        return run
+    return setup
+
+def _statistics(size: int):
+    def setup():
+        values = np.random.normal(size=size)
+        return lambda: calculate_statistics(values)
+    return setup
+
+def _analysis(artifacts: str):
+    def setup():
+        results_dir = _scratch_dir()
+        params = np.random.random(num_params(CIRCUIT))
+        cost_history = (np.exp(-np.arange(200) / 40) - 1 + 0.01 * np.random.normal(size=200)).tolist()
+        return lambda: analyze_results(params, cost_history, results_dir, artifacts=artifacts)
+    return setup
+
+register_benchmark('cost_fn/default.qubit', _cost_fn('default.qubit'), circuit=CIRCUIT)
+register_benchmark('cost_fn/numpy', _cost_fn('numpy'), circuit=CIRCUIT)
+register_benchmark('optimize_vqe/1_step', _optimize(1), circuit=CIRCUIT, steps=1)
+register_benchmark('optimize_vqe/200_steps', _optimize(200), circuit=CIRCUIT, steps=200)
+for _processes in range(1, (os.cpu_count() or 1) + 1):
+    # Одинаковая нагрузка при любом числе процессов дает кривую масштабирования
+    register_benchmark(f'parallel_optimize_vqe/{_processes}_processes', _parallel(_processes, 2 * (os.cpu_count() or 1)), processes=_processes, starts=2 * (os.cpu_count() or 1), steps=PARALLEL_STEPS)
+for _size in STATISTICS_SIZES:
+    register_benchmark(f"calculate_statistics/{_size:.0e}".replace('e+0', 'e'), _statistics(_size), size=_size)
+register_benchmark('analyze_results/none', _analysis('none'), steps=200)
+register_benchmark('analyze_results/full', _analysis('full'), steps=200)
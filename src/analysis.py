@@ -1,48 +1,88 @@
 import os
-import matplotlib.pyplot as plt
-import pandas as pd
+import json
 import logging
 import numpy as np
-import plotly.graph_objs as go
-import plotly.io as pio
-import seaborn as sns
-from calculate_moving_average import calculate_moving_average
-from quantum_metrics import calculate_statistics
-from typing import List, Union
-
-def analyze_results(params: Union[List[float], np.ndarray], cost_history: List[Union[float, np.ndarray]]) -> None:
+from calculate_moving_average import calculate_moving_average, calculate_moving_average_batch
+from quantum_metrics import calculate_statistics, calculate_metrics_batch, pad_histories
+from report import get_axes, lttb, inline_image, html_table, html_section, html_image, render_page
+import profiling
+from typing import List, Optional, Sequence, Tuple, Union
+
+# Набор артефактов анализа: none — только числа, summary — основные графики и отчет, full — все
+ARTIFACTS = {
+    'none': (),
+    'summary': ('cost', 'moving_average', 'report'),
+    'full': ('cost', 'histogram', 'moving_average', 'boxplot', 'density', 'interactive', 'report'),
+}
+
+# Ограничения размера: строки таблицы истории в отчете и точки интерактивного графика
+REPORT_TABLE_ROWS = 100
+INTERACTIVE_POINTS = 2000
+
+def _save_axes(ax, path: str) -> None:
+    ax.figure.savefig(path)
+
+@profiling.task('analysis')
+def analyze_results(params: Union[List[float], np.ndarray], cost_history: List[Union[float, np.ndarray]], results_dir: Optional[str] = None, run_id: Optional[str] = None, save_csv: bool = True, artifacts: str = 'full') -> None:
     """
     Analyze and visualize the results of the optimization process.
 
     Args:
         params: Optimized parameters.
         cost_history: List of cost values over the optimization steps.
+        results_dir: Directory to save the results. Defaults to the project's results directory.
+        run_id: If given, the outputs go to their own ``results_dir/run_id`` subdirectory,
+            so parallel runs never overwrite each other.
+        save_csv: Whether to write the cost history to results.csv. Multi-run pipelines
+            keep the histories in the consolidated results store instead.
+        artifacts: Which outputs to render: 'none' (statistics.json only), 'summary'
+            (cost and moving average plots plus the report) or 'full' (all plots).
 
     Returns:
         None
+
+    Raises:
+        ValueError: If the artifact set is unknown.
     """
     logging.info(f"Optimized Parameters: {params}")
     
-    # Сохранение результатов
-    results_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'results')
+    # Сохранение результатов (каждый запуск в своем подкаталоге)
+    if results_dir is None:
+        results_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'results')
+    if run_id is not None:
+        results_dir = os.path.join(results_dir, run_id)
     if not os.path.exists(results_dir):
-        os.makedirs(results_dir)
+        os.makedirs(results_dir, exist_ok=True)
     
-    results_file = os.path.join(results_dir, 'results.csv')
-    results_df = pd.DataFrame({'Step': range(len(cost_history)), 'Cost': [cost.item() if isinstance(cost, np.ndarray) else cost for cost in cost_history]})
-    results_df.to_csv(results_file, index=False)
+    if artifacts not in ARTIFACTS:
+        raise ValueError(f"Unknown artifact set: {artifacts}")
+    selected = ARTIFACTS[artifacts]
+
+    if save_csv:
+        import pandas as pd
+        results_file = os.path.join(results_dir, 'results.csv')
+        results_df = pd.DataFrame({'Step': range(len(cost_history)), 'Cost': [cost.item() if isinstance(cost, np.ndarray) else cost for cost in cost_history]})
+        results_df.to_csv(results_file, index=False)
     
     # Визуализация с Matplotlib
     cost_history_simple = [cost.item() if isinstance(cost, np.ndarray) else cost for cost in cost_history]
+
+    # Быстрый режим: только числа, без графиков
+    if not selected:
+        statistics_path = os.path.join(results_dir, 'statistics.json')
+        with open(statistics_path, 'w', encoding='utf-8') as f:
+            json.dump({key: float(value) for key, value in calculate_statistics(cost_history_simple).items()}, f, indent=2)
+        logging.info(f"Statistics saved at {statistics_path}")
+        return
     
-    plot_path = plot_cost_history(cost_history_simple, results_dir)
-    histogram_path = plot_histogram(cost_history_simple, results_dir)
-    moving_average_path = plot_moving_average(cost_history_simple, results_dir)
-    boxplot_path = plot_boxplot(cost_history_simple, results_dir)
-    density_plot_path = plot_density(cost_history_simple, results_dir)
+    plot_path = plot_cost_history(cost_history_simple, results_dir) if 'cost' in selected else None
+    histogram_path = plot_histogram(cost_history_simple, results_dir) if 'histogram' in selected else None
+    moving_average_path = plot_moving_average(cost_history_simple, results_dir) if 'moving_average' in selected else None
+    boxplot_path = plot_boxplot(cost_history_simple, results_dir) if 'boxplot' in selected else None
+    density_plot_path = plot_density(cost_history_simple, results_dir) if 'density' in selected else None
 
     # Визуализация с Plotly
-    interactive_plot_path = plot_interactive(cost_history, results_dir)
+    interactive_plot_path = plot_interactive(cost_history_simple, results_dir) if 'interactive' in selected else None
     
     # Генерация HTML-отчета
     html_report_path = generate_report(params, cost_history_simple, plot_path, histogram_path, moving_average_path, boxplot_path, density_plot_path, interactive_plot_path, results_dir)
@@ -51,6 +91,29 @@ def analyze_results(params: Union[List[float], np.ndarray], cost_history: List[U
     # pdf_report_path = os.path.join(results_dir, 'report.pdf')
     # convert_html_to_pdf(html_report_path, pdf_report_path)
 
+def analyze_batch(results: Sequence[Tuple[Union[List[float], np.ndarray], List[Union[float, np.ndarray]]]], window_size: int = 10, run_ids: Optional[Sequence[str]] = None) -> 'pd.DataFrame':
+    """
+    Compute the statistics and moving average of every run in one vectorized pass.
+
+    Args:
+        results: A list of tuples containing optimized parameters and cost history, one per run.
+        window_size: Window size for moving average calculation.
+        run_ids: The ids of the runs. Defaults to the position of each run.
+
+    Returns:
+        A DataFrame indexed by run with one column per metric, the optimized parameters
+        and each run's moving average.
+    """
+    import pandas as pd
+    values = pad_histories([cost_history for _, cost_history in results])
+    metrics = calculate_metrics_batch(values)
+    moving_average = calculate_moving_average_batch(values, window_size)
+    summary = pd.DataFrame(metrics, index=run_ids)
+    summary.index.name = 'Run'
+    summary['Parameters'] = [np.asarray(params, dtype=float).tolist() for params, _ in results]
+    summary['Moving Average'] = [row[~np.isnan(row)] for row in moving_average]
+    return summary
+
 def plot_cost_history(cost_history: List[float], results_dir: str) -> str:
     """
     Plot and save the cost history.
@@ -62,13 +125,13 @@ def plot_cost_history(cost_history: List[float], results_dir: str) -> str:
     Returns:
         Path to the saved plot.
     """
-    plt.plot(cost_history)
-    plt.xlabel('Step')
-    plt.ylabel('Cost')
-    plt.title('Optimization Cost History')
+    ax = get_axes()
+    ax.plot(cost_history)
+    ax.set_xlabel('Step')
+    ax.set_ylabel('Cost')
+    ax.set_title('Optimization Cost History')
     plot_path = os.path.join(results_dir, 'Figure_1.png')
-    plt.savefig(plot_path)
-    plt.close()
+    _save_axes(ax, plot_path)
     logging.info(f"Cost plot saved at {plot_path}")
     return plot_path
 
@@ -83,13 +146,13 @@ def plot_histogram(cost_history: List[float], results_dir: str) -> str:
     Returns:
         Path to the saved histogram.
     """
-    plt.hist(cost_history, bins=20)
-    plt.xlabel('Cost')
-    plt.ylabel('Frequency')
-    plt.title('Cost Distribution')
+    ax = get_axes()
+    ax.hist(cost_history, bins=20)
+    ax.set_xlabel('Cost')
+    ax.set_ylabel('Frequency')
+    ax.set_title('Cost Distribution')
     histogram_path = os.path.join(results_dir, 'Histogram.png')
-    plt.savefig(histogram_path)
-    plt.close()
+    _save_axes(ax, histogram_path)
     logging.info(f"Histogram saved at {histogram_path}")
     return histogram_path
 
@@ -106,13 +169,13 @@ def plot_moving_average(cost_history: List[float], results_dir: str, window_size
         Path to the saved plot.
     """
     moving_average = calculate_moving_average(cost_history, window_size)
-    plt.plot(moving_average)
-    plt.xlabel('Step')
-    plt.ylabel('Moving Average Cost')
-    plt.title('Moving Average of Cost')
+    ax = get_axes()
+    ax.plot(moving_average)
+    ax.set_xlabel('Step')
+    ax.set_ylabel('Moving Average Cost')
+    ax.set_title('Moving Average of Cost')
     moving_average_path = os.path.join(results_dir, 'Moving_Average.png')
-    plt.savefig(moving_average_path)
-    plt.close()
+    _save_axes(ax, moving_average_path)
     logging.info(f"Moving average plot saved at {moving_average_path}")
     return moving_average_path
 
@@ -127,12 +190,12 @@ def plot_boxplot(cost_history: List[float], results_dir: str) -> str:
     Returns:
         Path to the saved boxplot.
     """
-    plt.boxplot(cost_history, vert=False)
-    plt.xlabel('Cost')
-    plt.title('Boxplot of Cost')
+    ax = get_axes()
+    ax.boxplot(cost_history, vert=False)
+    ax.set_xlabel('Cost')
+    ax.set_title('Boxplot of Cost')
     boxplot_path = os.path.join(results_dir, 'Boxplot.png')
-    plt.savefig(boxplot_path)
-    plt.close()
+    _save_axes(ax, boxplot_path)
     logging.info(f"Boxplot saved at {boxplot_path}")
     return boxplot_path
 
@@ -147,14 +210,14 @@ def plot_density(cost_history: List[float], results_dir: str) -> str:
     Returns:
         Path to the saved density plot.
     """
-    plt.figure()
-    sns.kdeplot(cost_history, fill=True)
-    plt.xlabel('Cost')
-    plt.ylabel('Density')
-    plt.title('Density Plot of Cost')
+    import seaborn as sns
+    ax = get_axes()
+    sns.kdeplot(cost_history, fill=True, ax=ax)
+    ax.set_xlabel('Cost')
+    ax.set_ylabel('Density')
+    ax.set_title('Density Plot of Cost')
     density_plot_path = os.path.join(results_dir, 'Density_Plot.png')
-    plt.savefig(density_plot_path)
-    plt.close()
+    _save_axes(ax, density_plot_path)
     logging.info(f"Density plot saved at {density_plot_path}")
     return density_plot_path
 
@@ -169,17 +232,24 @@ def plot_interactive(cost_history: List[float], results_dir: str) -> str:
     Returns:
         Path to the saved interactive plot.
     """
+    import plotly.graph_objs as go
+    import plotly.io as pio
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=list(range(len(cost_history))), y=cost_history, mode='lines', name='Cost'))
+    steps, costs = lttb(cost_history, INTERACTIVE_POINTS)
+    fig.add_trace(go.Scatter(x=steps.tolist(), y=costs.tolist(), mode='lines', name='Cost'))
     fig.update_layout(title='Optimization Cost History', xaxis_title='Step', yaxis_title='Cost')
     interactive_plot_path = os.path.join(results_dir, 'interactive_plot.html')
     pio.write_html(fig, file=interactive_plot_path, auto_open=False)
     return interactive_plot_path
 
-def generate_report(params: Union[List[float], np.ndarray], cost_history: List[float], plot_path: str, histogram_path: str, moving_average_path: str, boxplot_path: str, density_plot_path: str, interactive_plot_path: str, results_dir: str) -> str:
+def generate_report(params: Union[List[float], np.ndarray], cost_history: List[float], plot_path: Optional[str], histogram_path: Optional[str], moving_average_path: Optional[str], boxplot_path: Optional[str], density_plot_path: Optional[str], interactive_plot_path: Optional[str], results_dir: str, max_rows: int = REPORT_TABLE_ROWS) -> str:
     """
     Generate an HTML report of the optimization results.
 
+    The cost history table is downsampled with LTTB to at most ``max_rows`` rows and the
+    plots are inlined as base64 images, so the report is one self-contained file of
+    bounded size written in a single pass.
+
     Args:
         params: Optimized parameters.
         cost_history: List of cost values over the optimization steps.
@@ -190,88 +260,36 @@ def generate_report(params: Union[List[float], np.ndarray], cost_history: List[f
         density_plot_path: Path to the density plot.
         interactive_plot_path: Path to the interactive plot.
         results_dir: Directory to save the report.
+        max_rows: The maximum number of rows of the cost history table.
+
+        Plots passed as None were not rendered and are left out of the report.
 
     Returns:
         Path to the saved HTML report.
     """
     statistics = calculate_statistics(cost_history)
-    report_path = os.path.join(results_dir, 'report.html')
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write(f"""
-        <html>
-        <head>
-            <title>Optimization Report</title>
-            <style>
-                body {{ font-family: 'Arial', sans-serif; margin: 40px; line-height: 1.6; color: #333; background-color: #f9f9f9; }}
-                h1, h2 {{ color: #333; }}
-                h1 {{ font-size: 28px; text-align: center; }}
-                h2 {{ font-size: 24px; border-bottom: 2px solid #ddd; padding-bottom: 10px; text-align: center; }}
-                table {{ width: 80%; border-collapse: collapse; margin: 20px auto; background-color: #fff; }}
-                th, td {{ padding: 12px; border: 1px solid #ddd; text-align: center; }}
-                th {{ background-color: #f4f4f4; }}
-                .explanation, .conclusion {{ margin-top: 20px; text-align: center; }}
-                .conclusion {{ font-weight: bold; }}
-                .container {{ max-width: 1200px; margin: auto; padding: 20px; }}
-                img {{ max-width: 100%; height: auto; display: block; margin-left: auto; margin-right: auto; }}
-            </style>
-        </head>
-        <body>
-        <div class="container">
-            <h1>Optimization Report</h1>
-            <h2>Optimized Parameters</h2>
-            <p style="text-align: center;">{params}</p>
-            <h2>Cost History</h2>
-            <table>
-                <tr><th>Step</th><th>Cost</th></tr>
-        """)
-        for i, cost in enumerate(cost_history):
-            f.write(f"<tr><td>{i+1}</td><td>{cost}</td></tr>")
-        f.write(f"""
-            </table>
-            <h2>Statistical Analysis</h2>
-            <table>
-                <tr><th>Metric</th><th>Value</th></tr>
-        """)
-        for key, value in statistics.items():
-            f.write(f"<tr><td>{key}</td><td>{value}</td></tr>")
-        f.write(f"""
-            </table>
-            <h2>Cost Plot</h2>
-            <img src="file://{os.path.abspath(plot_path)}" alt="Cost Plot">
-            <div class="explanation">
-                <p>This plot shows the change in cost at each step of the optimization. As seen, the cost decreases over the course of the optimization, indicating a converging optimization process.</p>
-            </div>
-            <h2>Cost Distribution</h2>
-            <img src="file://{os.path.abspath(histogram_path)}" alt="Cost Distribution">
-            <div class="explanation">
-                <p>The histogram shows the distribution of cost values throughout the optimization. Most values are concentrated around the minimum values, indicating successful finding of the optimal solution.</p>
-            </div>
-            <h2>Moving Average Plot</h2>
-            <img src="file://{os.path.abspath(moving_average_path)}" alt="Moving Average Plot">
-            <div class="explanation">
-                <p>The moving average plot helps to smooth out fluctuations in the cost, providing a clearer view of the downward trend in cost throughout the optimization.</p>
-            </div>
-            <h2>Boxplot</h2>
-            <img src="file://{os.path.abspath(boxplot_path)}" alt="Boxplot">
-            <div class="explanation">
-                <p>The boxplot visualizes the distribution of cost data through their quartile values, including the median and outliers.</p>
-            </div>
-            <h2>Density Plot</h2>
-            <img src="file://{os.path.abspath(density_plot_path)}" alt="Density Plot">
-            <div class="explanation">
-                <p>The density plot shows the density of cost values, providing a better understanding of their distribution.</p>
-            </div>
-            <h2>Interactive Cost Plot</h2>
-            <a href="{interactive_plot_path}" target="_blank" style="display: block; text-align: center;">Interactive Plot</a>
-            <div class="explanation">
-                <p>The interactive plot allows for a more detailed examination of the change in cost at each step of the optimization.</p>
-            </div>
-            <div class="conclusion">
-                <p>Based on the conducted analysis, we can conclude that the optimization process converges successfully, as the cost values decrease and stabilize at minimal values.</p>
-            </div>
-        </div>
-        </body>
-        </html>
-        """)
+    steps, costs = lttb(cost_history, max_rows)
+    body = [
+        html_section('Optimized Parameters', f'    <p style="text-align: center;">{params}</p>'),
+        html_section('Cost History', html_table(['Step', 'Cost'], [[step + 1, cost] for step, cost in zip(steps, costs)]),
+                     f"{len(steps)} of {len(cost_history)} steps, selected with LTTB downsampling." if len(steps) < len(cost_history) else None),
+        html_section('Statistical Analysis', html_table(['Metric', 'Value'], statistics.items())),
+    ]
+    sections = [
+        ('Cost Plot', plot_path, "This plot shows the change in cost at each step of the optimization. As seen, the cost decreases over the course of the optimization, indicating a converging optimization process."),
+        ('Cost Distribution', histogram_path, "The histogram shows the distribution of cost values throughout the optimization. Most values are concentrated around the minimum values, indicating successful finding of the optimal solution."),
+        ('Moving Average Plot', moving_average_path, "The moving average plot helps to smooth out fluctuations in the cost, providing a clearer view of the downward trend in cost throughout the optimization."),
+        ('Boxplot', boxplot_path, "The boxplot visualizes the distribution of cost data through their quartile values, including the median and outliers."),
+        ('Density Plot', density_plot_path, "The density plot shows the density of cost values, providing a better understanding of their distribution."),
+    ]
+    for title, path, explanation in sections:
+        if path is None:
+            continue
+        body.append(html_section(title, html_image(inline_image(path), title), explanation))
+    if interactive_plot_path is not None:
+        link = f'    <a href="{os.path.basename(interactive_plot_path)}" target="_blank" style="display: block; text-align: center;">Interactive Plot</a>'
+        body.append(html_section('Interactive Cost Plot', link, "The interactive plot allows for a more detailed examination of the change in cost at each step of the optimization."))
+    body.append('    <div class="conclusion">\n        <p>Based on the conducted analysis, we can conclude that the optimization process converges successfully, as the cost values decrease and stabilize at minimal values.</p>\n    </div>\n')
+    report_path = render_page(os.path.join(results_dir, 'report.html'), 'Optimization Report', body)
     logging.info(f"Report generated at {report_path}")
     return report_path
@@ -0,0 +1,63 @@
+import logging
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple, Union
+from convergence import ConvergenceMonitor, CostHistory
+from statevector import expval_and_grad
+import profiling
+
+def batched_optimize_vqe(params_list: List[Union[List[float], np.ndarray]], steps: int = 100, stepsize: float = 0.1, circuit_type: str = 'default', convergence: Optional[Dict[str, Any]] = None, hamiltonian: Optional[str] = None) -> List[Tuple[np.ndarray, List[float]]]:
+    """
+    Optimize many VQE starts at once with vectorized gradient descent.
+
+    All initial parameter vectors are stacked into one (N, n_params) array and every
+    step evaluates the costs and adjoint gradients of all active starts in a single
+    NumPy pass. Starts that converge or are pruned leave the batch.
+
+    Args:
+        params_list: A list of initial parameters, one per start.
+        steps: An integer representing the number of optimization steps.
+        stepsize: A float representing the step size for the gradient descent optimizer.
+        circuit_type: A string indicating the type of the circuit.
+        convergence: Early-stopping criteria (the ``optimization.convergence`` config section), or None to always run all steps.
+        hamiltonian: The name of a registered Hamiltonian whose energy is minimized, or None to minimize <PauliZ(0)>.
+
+    Returns:
+        A list of tuples containing optimized parameters and cost history for each start,
+        in the same order as ``params_list``.
+    """
+    params = np.array([np.asarray(p, dtype=float) for p in params_list])
+    n_starts = params.shape[0]
+    costs = np.full((steps, n_starts), np.nan)
+    stop_reasons = ['max_steps'] * n_starts
+    stop_steps = [steps] * n_starts
+    active = np.arange(n_starts)
+    monitor = ConvergenceMonitor.from_config(convergence, n_runs=n_starts)
+
+    logging.info(f"Starting batched optimization of {n_starts} starts...")
+    profiling.start('batched')
+    for i in range(steps):
+        # Прямой проход и градиент считаются вместе и учитываются как градиент
+        with profiling.phase('gradient'):
+            step_costs, grads = expval_and_grad(params[active], circuit_type, hamiltonian)
+        profiling.mark('batched', i, active.size)
+        costs[i, active] = step_costs
+        params[active] = params[active] - stepsize * grads
+        if (i + 1) % 10 == 0:
+            logging.info(f"Step {i+1}, Best cost: {step_costs.min():.4f}, Active starts: {active.size}")
+        if monitor is not None:
+            reasons = monitor.update(i, step_costs, np.linalg.norm(grads, axis=1), np.nanmin(costs[:i + 1]))
+            stopped = reasons != ''
+            for j, reason in zip(active[stopped], reasons[stopped]):
+                stop_reasons[j], stop_steps[j] = reason, i + 1
+            if stopped.any():
+                monitor.select(~stopped)
+                active = active[~stopped]
+            if active.size == 0:
+                break
+
+    logging.info("Batched optimization finished.")
+    profiling.flush()
+    return [
+        (params[j], CostHistory(costs[:stop_steps[j], j].tolist(), stop_reason=stop_reasons[j], stop_step=stop_steps[j], evaluations=stop_steps[j], gradient_evaluations=stop_steps[j]))
+        for j in range(n_starts)
+    ]
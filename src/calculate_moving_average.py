@@ -1,10 +1,14 @@
 import numpy as np
 from typing import List
+from rolling import moving_average
 
 def calculate_moving_average(data: List[float], window_size: int) -> np.ndarray:
     """
     Calculate the moving average of a given list of numbers.
 
+    Uses cumulative sums (rolling.moving_average), so the cost is linear in the length
+    of the data. A window larger than the data is shrunk to the length of the data.
+
     Args:
         data: A list of float numbers representing the data.
         window_size: An integer representing the size of the moving window.
@@ -12,9 +16,21 @@ def calculate_moving_average(data: List[float], window_size: int) -> np.ndarray:
     Returns:
         A NumPy array containing the moving averages.
     """
-    if window_size <= 0:
-        raise ValueError("Window size must be greater than 0")
-    if window_size > len(data):
-        raise ValueError("Window size must not be greater than the length of the data")
-    
-    return np.convolve(data, np.ones(window_size), 'valid') / window_size
+    return moving_average(data, window_size)
+
+def calculate_moving_average_batch(data: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    Calculate the moving average of every row of a (runs x steps) array in one pass.
+
+    Uses cumulative sums along the step axis. Windows that reach into NaN padding
+    after a run's last step are NaN, and a window larger than the number of steps is
+    shrunk to it.
+
+    Args:
+        data: A 2-D float array, one run per row, padded with NaN.
+        window_size: An integer representing the size of the moving window.
+
+    Returns:
+        A (runs x steps - window_size + 1) array of moving averages.
+    """
+    return moving_average(data, window_size)
@@ -0,0 +1,218 @@
+import os
+import struct
+import zlib
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MAGIC = b'VQECKPT1'
+RECORD = struct.Struct('<2sBxIIII')
+RECORD_MAGIC = b'RC'
+KIND_RUN, KIND_COSTS, KIND_PARAMS = 1, 2, 3
+
+class CheckpointIndex:
+    """
+    The record index of a checkpoint file, built by scanning record headers only.
+
+    Attributes:
+        runs: Maps run id to the run number used in the records.
+        costs: Maps run number to a list of (offset, first step, count, crc) cost segments.
+        params: Maps run number to a list of (offset, step, count, crc) parameter records.
+        size: The byte length of the valid part of the file.
+        valid: Whether the file starts with the checkpoint magic.
+    """
+
+    def __init__(self) -> None:
+        self.runs: Dict[str, int] = {}
+        self.costs: Dict[int, List[Tuple[int, int, int, int]]] = {}
+        self.params: Dict[int, List[Tuple[int, int, int, int]]] = {}
+        self.size = len(MAGIC)
+        self.valid = False
+
+    def history_length(self, run: int) -> int:
+        """
+        Return the number of cost entries currently stored for a run.
+        """
+        length = 0
+        for _, start, count, _ in self.costs.get(run, []):
+            length = start + count
+        return length
+
+def _read_index(f) -> CheckpointIndex:
+    """
+    Scan the record headers of an open checkpoint file.
+
+    A torn or corrupted record ends the scan, so a crash in the middle of an append
+    never makes earlier records unreadable.
+    """
+    index = CheckpointIndex()
+    f.seek(0)
+    if f.read(len(MAGIC)) != MAGIC:
+        return index
+    index.valid = True
+    offset = len(MAGIC)
+    while True:
+        header = f.read(RECORD.size)
+        if len(header) < RECORD.size:
+            break
+        magic, kind, run, step, count, crc = RECORD.unpack(header)
+        if magic != RECORD_MAGIC:
+            break
+        size = count if kind == KIND_RUN else 8 * count
+        payload_offset = offset + RECORD.size
+        if kind == KIND_RUN:
+            payload = f.read(size)
+            if len(payload) < size or zlib.crc32(payload) != crc:
+                break
+            index.runs[payload.decode('utf-8')] = run
+        else:
+            f.seek(size, os.SEEK_CUR)
+            if f.tell() > os.fstat(f.fileno()).st_size:
+                break
+            target = index.costs if kind == KIND_COSTS else index.params
+            target.setdefault(run, []).append((payload_offset, step, count, crc))
+        offset = payload_offset + size
+        index.size = offset
+    return index
+
+def _record(kind: int, run: int, step: int, payload: bytes, count: int) -> bytes:
+    return RECORD.pack(RECORD_MAGIC, kind, run, step, count, zlib.crc32(payload)) + payload
+
+class CheckpointStore:
+    """
+    An append-only binary checkpoint log holding any number of runs keyed by run id.
+
+    Every checkpoint appends only the cost entries recorded since the previous one,
+    followed by the current parameters, in a single write under an exclusive file
+    lock. A cost segment that starts before the end of the stored history replaces
+    the history from that step on, so a run can be resumed from any earlier step.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path: The path of the checkpoint file. It is created on the first write.
+        """
+        self.path = os.path.abspath(path)
+        self._saved: Dict[str, int] = {}
+
+    def _append(self, build) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        with os.fdopen(fd, 'r+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                file_size = os.fstat(f.fileno()).st_size
+                index = _read_index(f)
+                if file_size == 0:
+                    f.write(MAGIC)
+                elif not index.valid:
+                    raise ValueError(f"{self.path} is not a checkpoint file")
+                elif index.size < file_size:
+                    f.truncate(index.size)
+                f.write(build(index))
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def save(self, params: np.ndarray, cost_history: List[float], run_id: str = '0') -> None:
+        """
+        Append the new part of a run's cost history and its current parameters.
+
+        Args:
+            params: The current parameters.
+            cost_history: The full cost history of the run so far.
+            run_id: The id of the run inside the file.
+
+        Raises:
+            ValueError: If the file exists but is not a checkpoint file.
+        """
+        params = np.asarray(params, dtype='<f8').ravel()
+
+        def build(index: CheckpointIndex) -> bytes:
+            data = b''
+            if run_id not in index.runs:
+                index.runs[run_id] = len(index.runs)
+                name = run_id.encode('utf-8')
+                data += _record(KIND_RUN, index.runs[run_id], 0, name, len(name))
+            run = index.runs[run_id]
+            start = self._saved.get(run_id, 0)
+            if start > index.history_length(run) or start > len(cost_history):
+                start = 0
+            costs = np.asarray([float(cost) for cost in cost_history[start:]], dtype='<f8')
+            data += _record(KIND_COSTS, run, start, costs.tobytes(), costs.size)
+            data += _record(KIND_PARAMS, run, len(cost_history), params.tobytes(), params.size)
+            return data
+
+        self._append(build)
+        self._saved[run_id] = len(cost_history)
+
+    def index(self) -> CheckpointIndex:
+        """
+        Return the record index of the file.
+        """
+        with open(self.path, 'rb') as f:
+            return _read_index(f)
+
+    def run_ids(self) -> List[str]:
+        """
+        Return the ids of all runs stored in the file.
+        """
+        return list(self.index().runs)
+
+    def load(self, run_id: Optional[str] = None, step: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load a run's parameters and cost history, optionally as of an earlier checkpoint.
+
+        Only the record headers are scanned; the cost values are read through a memory
+        map and only up to the requested step.
+
+        Args:
+            run_id: The id of the run. Defaults to the only (or first) run in the file.
+            step: Load the latest checkpoint taken at or before this step. Defaults to the latest one.
+
+        Returns:
+            A tuple of the parameters and the cost history up to the checkpoint's step.
+
+        Raises:
+            KeyError: If the run or a checkpoint at or before ``step`` does not exist.
+        """
+        index = self.index()
+        if run_id is None:
+            if not index.runs:
+                raise KeyError(f"No runs stored in {self.path}")
+            run_id = next(iter(index.runs))
+        if run_id not in index.runs:
+            raise KeyError(f"Run {run_id} not found in {self.path}")
+        run = index.runs[run_id]
+        candidates = [record for record in index.params.get(run, []) if step is None or record[1] <= step]
+        if not candidates:
+            raise KeyError(f"No checkpoint of run {run_id} at or before step {step}")
+        params_offset, params_step, params_count, params_crc = candidates[-1]
+
+        data = np.memmap(self.path, dtype=np.uint8, mode='r')
+        params = np.array(_payload(data, params_offset, params_count, params_crc))
+        segments = [segment for segment in index.costs.get(run, []) if segment[0] < params_offset]
+        history = np.empty(max([start + count for _, start, count, _ in segments], default=0))
+        length = 0
+        for offset, start, count, crc in segments:
+            history[start:start + count] = _payload(data, offset, count, crc)
+            length = start + count
+        self._saved[run_id] = length
+        return params, history[:length]
+
+def _payload(data: np.ndarray, offset: int, count: int, crc: int) -> np.ndarray:
+    """
+    View a float64 payload of a memory-mapped checkpoint and verify its checksum.
+    """
+    payload = data[offset:offset + 8 * count]
+    if zlib.crc32(payload) != crc:
+        raise ValueError(f"Corrupted checkpoint record at byte {offset}")
+    return payload.view('<f8')
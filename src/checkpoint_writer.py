@@ -0,0 +1,159 @@
+import os
+import time
+import atexit
+import signal
+import logging
+import threading
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+_WRITER: Optional['CheckpointWriter'] = None
+_WRITER_PID: Optional[int] = None
+
+class CheckpointWriter:
+    """
+    Write optimization checkpoints from a background thread.
+
+    ``submit`` only copies a snapshot and returns, so disk latency stays out of the
+    optimizer steps. The thread keeps just the latest snapshot per (path, run id):
+    snapshots submitted while a write is in progress, or within ``interval`` seconds of
+    the previous write, replace each other and are written once.
+    """
+
+    def __init__(self, write: Callable, interval: float = 1.0) -> None:
+        """
+        Args:
+            write: Writes one snapshot, called as ``write(params, cost_history, path, run_id)``.
+            interval: The minimum number of seconds between two writes; 0 writes as soon as possible.
+        """
+        self.write = write
+        self.interval = interval
+        self.submitted = 0
+        self.written = 0
+        self._pending: Dict[Tuple[str, str], Tuple[np.ndarray, List[float]]] = {}
+        # Reentrant, so a signal handler interrupting submit() in the main thread can still flush
+        self._condition = threading.Condition(threading.RLock())
+        self._busy = False
+        self._flushing = 0
+        self._closed = False
+        self._last_write = 0.0
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, params: np.ndarray, cost_history: List[float], path: str, run_id: str = '0') -> None:
+        """
+        Queue a snapshot of a run, replacing any queued snapshot of the same run.
+
+        Args:
+            params: The current parameters.
+            cost_history: The full cost history of the run so far.
+            path: The checkpoint path (see optimization.save_state).
+            run_id: The id of the run inside the checkpoint file.
+        """
+        snapshot = (np.array(params, dtype=float), list(cost_history))
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The checkpoint writer is closed")
+            self._pending[(path, run_id)] = snapshot
+            self.submitted += 1
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                deadline = self._last_write + self.interval
+                self._condition.wait_for(lambda: self._closed or self._flushing or time.monotonic() >= deadline, timeout=max(0.0, deadline - time.monotonic()))
+                batch, self._pending = self._pending, {}
+                self._busy = True
+            for (path, run_id), (params, cost_history) in batch.items():
+                try:
+                    self.write(params, cost_history, path, run_id)
+                    self.written += 1
+                except Exception as e:
+                    logging.error(f"Writing the checkpoint of run {run_id} to {path} failed.", exc_info=True)
+                    self._error = e
+            with self._condition:
+                self._busy = False
+                self._last_write = time.monotonic()
+                self._condition.notify_all()
+
+    def flush(self) -> None:
+        """
+        Block until every submitted snapshot is written.
+
+        Raises:
+            Exception: The first error raised by a write since the previous flush.
+        """
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                self._condition.wait_for(lambda: not self._pending and not self._busy)
+            finally:
+                self._flushing -= 1
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """
+        Write the remaining snapshots and stop the thread.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+def get_writer(write: Callable, interval: float = 1.0) -> CheckpointWriter:
+    """
+    Return this process's background checkpoint writer, starting it on first use.
+
+    The writer is flushed when the interpreter exits and when the process receives SIGTERM
+    or SIGINT (before the previous handler runs), so pending checkpoints survive a shutdown
+    or a terminated worker pool.
+
+    Args:
+        write: Writes one snapshot, called as ``write(params, cost_history, path, run_id)``.
+        interval: The minimum number of seconds between two writes.
+
+    Returns:
+        The CheckpointWriter.
+    """
+    global _WRITER, _WRITER_PID
+    if _WRITER is None or _WRITER_PID != os.getpid():
+        # A forked child inherits the object but not its thread
+        _WRITER = CheckpointWriter(write, interval)
+        _WRITER_PID = os.getpid()
+        atexit.register(_WRITER.close)
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, _flush_on_signal(signal.getsignal(signum)))
+    _WRITER.write = write
+    _WRITER.interval = interval
+    return _WRITER
+
+def flush_writer() -> None:
+    """
+    Flush this process's background checkpoint writer, if it has one.
+    """
+    if _WRITER is not None and _WRITER_PID == os.getpid():
+        _WRITER.flush()
+
+def _flush_on_signal(previous) -> Callable:
+    def handler(signum, frame):
+        try:
+            flush_writer()
+        except Exception:
+            logging.error("Flushing checkpoints on shutdown failed.", exc_info=True)
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+    return handler
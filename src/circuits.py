@@ -1,40 +1,185 @@
+import functools
 import pennylane as qml
-from typing import Callable, List
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
-def create_vqe_circuit(params: List[float], circuit_type: str = 'default') -> Callable:
+# Each gate is (operation name, wires, index of the trainable parameter or None).
+CIRCUITS: Dict[str, Tuple[Tuple[str, Tuple[int, ...], Optional[int]], ...]] = {
+    'default': (
+        ('RX', (0,), 0),
+        ('RY', (1,), 1),
+        ('CNOT', (0, 1), None),
+    ),
+    'alternate': (
+        ('Hadamard', (0,), None),
+        ('CRX', (0, 1), 0),
+        ('RY', (1,), 1),
+        ('CNOT', (0, 1), None),
+    ),
+}
+
+QNODE_CACHE_SIZE = 32
+
+GRADIENT_METHODS = ('best', 'backprop', 'adjoint', 'parameter-shift', 'finite-diff')
+
+def register_circuit(circuit_type: str, gates: Sequence[Tuple[str, Sequence[int], Optional[int]]]) -> None:
     """
-    Create a Variational Quantum Eigensolver (VQE) circuit based on the specified type.
+    Register a new circuit type in the circuit registry.
 
     Args:
-        params: A list of float numbers representing the parameters for the quantum gates.
-        circuit_type: A string indicating the type of the circuit ('default' or 'alternate').
+        circuit_type: A string naming the circuit.
+        gates: A sequence of (operation name, wires, parameter index or None) tuples.
+
+    Returns:
+        None
+    """
+    CIRCUITS[circuit_type] = tuple((name, tuple(wires), index) for name, wires, index in gates)
+    get_vqe_qnode.cache_clear()
+
+def hardware_efficient_gates(n_qubits: int, layers: int) -> List[Tuple[str, Tuple[int, ...], Optional[int]]]:
+    """
+    Build the gate sequence of a hardware-efficient ansatz.
+
+    Every layer applies RY and RZ rotations to all qubits followed by a chain of CNOTs.
+
+    Args:
+        n_qubits: The number of qubits.
+        layers: The number of layers.
+
+    Returns:
+        A list of (operation name, wires, parameter index or None) tuples with
+        ``2 * n_qubits * layers`` trainable parameters.
+    """
+    gates = []
+    for layer in range(layers):
+        offset = 2 * n_qubits * layer
+        gates += [('RY', (wire,), offset + wire) for wire in range(n_qubits)]
+        gates += [('RZ', (wire,), offset + n_qubits + wire) for wire in range(n_qubits)]
+        gates += [('CNOT', (wire, wire + 1), None) for wire in range(n_qubits - 1)]
+    return gates
+
+def register_hardware_efficient(n_qubits: int, layers: int) -> str:
+    """
+    Register a hardware-efficient ansatz of the given size.
+
+    Args:
+        n_qubits: The number of qubits.
+        layers: The number of layers.
+
+    Returns:
+        The name of the registered circuit, ``hardware_efficient_<n_qubits>q<layers>l``.
+    """
+    circuit_type = f"hardware_efficient_{n_qubits}q{layers}l"
+    if circuit_type not in CIRCUITS:
+        register_circuit(circuit_type, hardware_efficient_gates(n_qubits, layers))
+    return circuit_type
+
+def get_circuit_gates(circuit_type: str) -> Tuple[Tuple[str, Tuple[int, ...], Optional[int]], ...]:
+    """
+    Look up the gate sequence of a registered circuit.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
 
     Returns:
-        A callable quantum node (QNode) representing the VQE circuit.
+        The registered gate sequence.
 
     Raises:
         ValueError: If the specified circuit type is unknown.
     """
-    dev = qml.device('default.qubit', wires=2)
+    if circuit_type not in CIRCUITS:
+        raise ValueError("Unknown circuit type")
+    return CIRCUITS[circuit_type]
 
-    @qml.qnode(dev)
-    def default_circuit():
-        qml.RX(params[0], wires=0)
-        qml.RY(params[1], wires=1)
-        qml.CNOT(wires=[0, 1])
-        return qml.expval(qml.PauliZ(0))
+def num_params(circuit_type: str) -> int:
+    """
+    Return the number of trainable parameters of a registered circuit.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+
+    Returns:
+        The number of trainable parameters.
+    """
+    indices = [index for _, _, index in get_circuit_gates(circuit_type) if index is not None]
+    return max(indices) + 1 if indices else 0
+
+def num_wires(circuit_type: str) -> int:
+    """
+    Return the number of wires used by a registered circuit.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+
+    Returns:
+        The number of wires.
+    """
+    return max(max(wires) for _, wires, _ in get_circuit_gates(circuit_type)) + 1
+
+def apply_ansatz(params, circuit_type: str) -> None:
+    """
+    Queue the gates of a registered circuit inside a quantum function.
+
+    Args:
+        params: The trainable parameters of the circuit.
+        circuit_type: A string indicating the type of the circuit.
+
+    Returns:
+        None
+    """
+    for name, wires, index in get_circuit_gates(circuit_type):
+        operation = getattr(qml, name)
+        if index is None:
+            operation(wires=list(wires))
+        else:
+            operation(params[index], wires=list(wires))
+
+@functools.lru_cache(maxsize=QNODE_CACHE_SIZE)
+def get_vqe_qnode(circuit_type: str = 'default', wires: Optional[int] = None, device: str = 'default.qubit', gradient_method: str = 'best') -> qml.QNode:
+    """
+    Build (or fetch from the cache) the parameterized QNode of a registered circuit.
+
+    The device and QNode are created once per (circuit_type, wires, device, gradient_method)
+    key and reused for every evaluation; the parameters are passed as a trainable argument.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+        wires: The number of wires of the device. Defaults to the circuit's own width.
+        device: The name of the PennyLane device.
+        gradient_method: The differentiation method ('best', 'backprop', 'adjoint',
+            'parameter-shift' or 'finite-diff'). Parameter-shift submits all shifted
+            circuits of a gradient as one batch execution.
+
+    Returns:
+        A QNode taking the circuit parameters as its only argument.
 
-    @qml.qnode(dev)
-    def alternate_circuit():
-        qml.Hadamard(wires=0)
-        qml.CRX(params[0], wires=[0, 1])
-        qml.RY(params[1], wires=1)
-        qml.CNOT(wires=[0, 1])
+    Raises:
+        ValueError: If the specified circuit type or gradient method is unknown.
+    """
+    get_circuit_gates(circuit_type)
+    if gradient_method not in GRADIENT_METHODS:
+        raise ValueError(f"Unknown gradient method: {gradient_method}")
+    dev = qml.device(device, wires=wires if wires is not None else num_wires(circuit_type))
+
+    @qml.qnode(dev, diff_method=gradient_method)
+    def circuit(params):
+        apply_ansatz(params, circuit_type)
         return qml.expval(qml.PauliZ(0))
 
-    if circuit_type == 'default':
-        return default_circuit
-    elif circuit_type == 'alternate':
-        return alternate_circuit
-    else:
-        raise ValueError("Unknown circuit type")
+    return circuit
+
+def create_vqe_circuit(params: List[float], circuit_type: str = 'default') -> Callable:
+    """
+    Create a Variational Quantum Eigensolver (VQE) circuit based on the specified type.
+
+    Args:
+        params: A list of float numbers representing the parameters for the quantum gates.
+        circuit_type: A string indicating the type of the circuit ('default' or 'alternate').
+
+    Returns:
+        A callable evaluating the cached VQE QNode at the given parameters.
+
+    Raises:
+        ValueError: If the specified circuit type is unknown.
+    """
+    qnode = get_vqe_qnode(circuit_type)
+    return functools.partial(qnode, params)
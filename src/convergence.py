@@ -0,0 +1,151 @@
+import numpy as np
+from typing import Any, Dict, Iterable, Optional
+from rolling import RollingStats
+
+_shared_best = None
+
+class CostHistory(list):
+    """
+    A list of cost values that also records why and at which step the optimization stopped
+    and how many cost and gradient evaluations (and, in finite-shot mode, measurement shots) it took.
+    """
+
+    def __init__(self, iterable: Iterable = (), stop_reason: Optional[str] = None, stop_step: Optional[int] = None, evaluations: int = 0, gradient_evaluations: int = 0, shots: int = 0) -> None:
+        super().__init__(iterable)
+        self.stop_reason = stop_reason
+        self.stop_step = stop_step
+        self.evaluations = evaluations
+        self.gradient_evaluations = gradient_evaluations
+        self.shots = shots
+
+class ConvergenceMonitor:
+    """
+    Early-stopping criteria evaluated once per optimizer step for one or many runs.
+
+    All criteria are optional; a criterion set to None is never triggered. The monitor
+    works on arrays of shape (n_runs,) so that the batched engine can check every start
+    in one vectorized call.
+    """
+
+    def __init__(self, n_runs: int = 1, abs_tol: Optional[float] = None, rel_tol: Optional[float] = None, grad_tol: Optional[float] = None, patience: Optional[int] = None, window: int = 10, min_delta: float = 0.0, prune_after: Optional[int] = None, prune_margin: Optional[float] = None) -> None:
+        """
+        Args:
+            n_runs: The number of runs monitored together.
+            abs_tol: Stop when the absolute cost change between two steps falls below this value.
+            rel_tol: Stop when the cost change relative to the previous cost falls below this value.
+            grad_tol: Stop when the gradient norm falls below this value.
+            patience: Stop when the rolling mean cost has not improved by ``min_delta`` for this many steps.
+            window: The window size of the rolling mean used by ``patience``.
+            min_delta: The minimum decrease of the rolling mean that counts as an improvement.
+            prune_after: The first step at which a run may be pruned.
+            prune_margin: Prune a run whose cost is worse than the best known cost by more than this value.
+        """
+        self.abs_tol = abs_tol
+        self.rel_tol = rel_tol
+        self.grad_tol = grad_tol
+        self.patience = patience
+        self.window = window
+        self.min_delta = min_delta
+        self.prune_after = prune_after
+        self.prune_margin = prune_margin
+        self._previous = np.full(n_runs, np.nan)
+        self._rolling = RollingStats(window, shape=(n_runs,), extrema=False)
+        self._best_rolling = np.full(n_runs, np.inf)
+        self._since_improvement = np.zeros(n_runs, dtype=int)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], n_runs: int = 1) -> Optional['ConvergenceMonitor']:
+        """
+        Build a monitor from the ``optimization.convergence`` config section.
+
+        Args:
+            config: The convergence section, or None to disable early stopping.
+            n_runs: The number of runs monitored together.
+
+        Returns:
+            A ConvergenceMonitor, or None if ``config`` is empty.
+        """
+        if not config:
+            return None
+        return cls(n_runs=n_runs, **config)
+
+    def update(self, step: int, costs: np.ndarray, grad_norms: Optional[np.ndarray] = None, best_cost: Optional[float] = None) -> np.ndarray:
+        """
+        Record the costs of one step and check every criterion.
+
+        Args:
+            step: The zero-based index of the step.
+            costs: The cost of each run at this step.
+            grad_norms: The gradient norm of each run at this step.
+            best_cost: The best cost known across all runs, used for pruning.
+
+        Returns:
+            An array holding, for each run, the name of the criterion that triggered or '' to continue.
+        """
+        costs = np.atleast_1d(np.asarray(costs, dtype=float))
+        reasons = np.full(costs.shape, '', dtype=object)
+
+        def mark(condition: np.ndarray, reason: str) -> None:
+            reasons[(reasons == '') & condition] = reason
+
+        delta = np.abs(costs - self._previous)
+        if self.abs_tol is not None:
+            mark(delta < self.abs_tol, 'abs_tol')
+        if self.rel_tol is not None:
+            mark(delta < self.rel_tol * np.abs(self._previous), 'rel_tol')
+        if self.grad_tol is not None and grad_norms is not None:
+            mark(np.atleast_1d(grad_norms) < self.grad_tol, 'grad_tol')
+
+        self._rolling.push(costs)
+        if self.patience is not None and self._rolling.full:
+            rolling = self._rolling.mean
+            improved = rolling < self._best_rolling - self.min_delta
+            self._best_rolling = np.where(improved, rolling, self._best_rolling)
+            self._since_improvement = np.where(improved, 0, self._since_improvement + 1)
+            mark(self._since_improvement >= self.patience, 'patience')
+
+        if self.prune_margin is not None and step + 1 >= (self.prune_after or 0):
+            best = np.min(costs) if best_cost is None else min(best_cost, np.min(costs))
+            mark(costs > best + self.prune_margin, 'pruned')
+
+        self._previous = costs
+        return reasons
+
+    def select(self, mask: np.ndarray) -> None:
+        """
+        Keep only the runs selected by ``mask`` (used when finished runs leave a batch).
+
+        Args:
+            mask: A boolean array over the currently monitored runs.
+        """
+        self._previous = self._previous[mask]
+        self._rolling.select(mask)
+        self._best_rolling = self._best_rolling[mask]
+        self._since_improvement = self._since_improvement[mask]
+
+def init_shared_best(shared_value) -> None:
+    """
+    Install the cross-process best cost in a worker (used as a pool initializer).
+
+    Args:
+        shared_value: A multiprocessing.Value('d') holding the best cost seen by any start.
+    """
+    global _shared_best
+    _shared_best = shared_value
+
+def report_cost(cost: float) -> Optional[float]:
+    """
+    Publish a cost to the shared best and return the updated best.
+
+    Args:
+        cost: The latest cost of this worker's run.
+
+    Returns:
+        The best cost across all workers, or None outside a pool with a shared best.
+    """
+    if _shared_best is None:
+        return None
+    with _shared_best.get_lock():
+        if cost < _shared_best.value:
+            _shared_best.value = cost
+        return _shared_best.value
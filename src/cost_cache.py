@@ -0,0 +1,147 @@
+import os
+import hashlib
+import sqlite3
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from circuits import get_circuit_gates
+from hamiltonian import get_hamiltonian
+
+_CACHES: Dict[Tuple, 'CostCache'] = {}
+
+def circuit_fingerprint(circuit_type: str, hamiltonian: Optional[str] = None) -> str:
+    """
+    Hash the gate sequence and Hamiltonian behind a circuit name.
+
+    Cache keys use this fingerprint instead of the names, so a shared on-disk cache never
+    mixes up different circuits or Hamiltonians registered under the same name.
+    """
+    content = repr(get_circuit_gates(circuit_type))
+    if hamiltonian is not None:
+        observable = get_hamiltonian(hamiltonian)
+        content += repr((observable.words, observable.coeffs.tolist()))
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+class CostCache:
+    """
+    An LRU cache of cost values (and gradients) keyed on quantized parameters.
+
+    Parameters are rounded to ``decimals`` decimal places before hashing, so identical or
+    near-identical points (repeated seeds, resumed checkpoints, re-run configs) reuse one
+    evaluation. An optional sqlite file backs the in-memory LRU and is shared by all
+    workers and by later invocations.
+    """
+
+    def __init__(self, maxsize: int = 4096, decimals: int = 10, path: Optional[str] = None) -> None:
+        """
+        Args:
+            maxsize: The maximum number of entries kept in memory.
+            decimals: The number of decimal places the parameters are rounded to.
+            path: The path of a sqlite file shared across processes, or None to stay in memory.
+        """
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.path = os.path.abspath(path) if path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[bytes, Tuple[float, Optional[np.ndarray]]]' = OrderedDict()
+        self._connection = None
+        self._pid = None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional['CostCache']:
+        """
+        Return the process-wide cache described by the ``optimization.cache`` config section.
+
+        Args:
+            config: The cache section, or None to disable caching.
+
+        Returns:
+            A CostCache shared by all calls in this process with the same settings, or None
+            if the cache is disabled.
+        """
+        if not config or not config.get('enabled', True):
+            return None
+        settings = (config.get('maxsize', 4096), config.get('decimals', 10), config.get('path') or None)
+        if settings not in _CACHES:
+            _CACHES[settings] = cls(*settings)
+        return _CACHES[settings]
+
+    def key(self, params: np.ndarray, fingerprint: str, backend: str, gradient_method: str) -> bytes:
+        """
+        Build the key of a parameter point.
+
+        Args:
+            params: The circuit parameters.
+            fingerprint: The circuit_fingerprint of the circuit and Hamiltonian.
+            backend: The simulator backend.
+            gradient_method: The differentiation method, since finite differences give different gradients.
+
+        Returns:
+            The key as bytes.
+        """
+        quantized = np.round(np.asarray(params, dtype=float).ravel(), self.decimals) + 0.0
+        return hashlib.sha1(f"{fingerprint}|{backend}|{gradient_method}|".encode('utf-8') + quantized.tobytes()).digest()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS costs (key BLOB PRIMARY KEY, cost REAL NOT NULL, grad BLOB)')
+            self._pid = os.getpid()
+        return self._connection
+
+    def _remember(self, key: bytes, entry: Tuple[float, Optional[np.ndarray]]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key: bytes, need_grad: bool = False) -> Optional[Tuple[float, Optional[np.ndarray]]]:
+        """
+        Look up a cost, first in memory and then on disk.
+
+        Args:
+            key: The key built by ``key``.
+            need_grad: Only count entries that also hold a gradient as hits.
+
+        Returns:
+            A tuple of the cost and the gradient (None if not stored), or None on a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and (entry[1] is not None or not need_grad):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if self.path is not None:
+            row = self._db().execute('SELECT cost, grad FROM costs WHERE key = ?', (key,)).fetchone()
+            if row is not None and (row[1] is not None or not need_grad):
+                entry = (row[0], None if row[1] is None else np.frombuffer(row[1], dtype=float).copy())
+                self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: bytes, cost: float, grad: Optional[np.ndarray] = None) -> None:
+        """
+        Store a cost and optionally its gradient.
+
+        Args:
+            key: The key built by ``key``.
+            cost: The cost value.
+            grad: The gradient at the same point.
+        """
+        grad = None if grad is None else np.array(grad, dtype=float).ravel()
+        self._remember(key, (float(cost), grad))
+        if self.path is not None:
+            self._db().execute('INSERT OR REPLACE INTO costs VALUES (?, ?, ?)', (key, float(cost), None if grad is None else grad.tobytes()))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the hit and miss counters and the number of entries in memory.
+        """
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses, 'size': len(self._entries)}
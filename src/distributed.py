@@ -0,0 +1,499 @@
+import os
+import sys
+import time
+import queue
+import socket
+import logging
+import argparse
+import threading
+import traceback
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from worker_pool import _run_chunk
+
+AUTHKEY_ENV = 'VQE_AUTHKEY'
+
+class DistributedResult:
+    """
+    The pending result of a task run by a remote worker, like multiprocessing's AsyncResult.
+    """
+
+    def __init__(self, callback: Optional[Callable] = None) -> None:
+        self._event = threading.Event()
+        self._value = None
+        self._error: Optional[BaseException] = None
+        self._callback = callback
+
+    def _set(self, value: Any = None, error: Optional[BaseException] = None) -> None:
+        self._value, self._error = value, error
+        self._event.set()
+        if self._callback is not None:
+            self._callback(self)
+
+    def ready(self) -> bool:
+        return self._event.is_set()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        Wait for the task and return its result.
+
+        Raises:
+            TimeoutError: If the task has not finished within ``timeout`` seconds.
+            Exception: The error raised by the task, or a RuntimeError if it could not be run.
+        """
+        if not self._event.wait(timeout):
+            raise TimeoutError("The task has not finished yet")
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+class _Task:
+    def __init__(self, task_id: int, func: Callable, args: Tuple, result: DistributedResult) -> None:
+        self.id = task_id
+        self.func = func
+        self.args = args
+        self.result = result
+        self.assignments = 0
+
+class _Worker:
+    def __init__(self, conn: Connection, name: str) -> None:
+        self.conn = conn
+        self.name = name
+        self.task: Optional[_Task] = None
+        self.last_seen = time.monotonic()
+
+def _hang_up(conn: Connection) -> None:
+    """
+    Shut a worker's socket down so that the thread blocked in its recv() sees EOF and closes it.
+
+    Closing a Connection while another thread reads from it is not safe.
+    """
+    try:
+        with socket.fromfd(conn.fileno(), socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+class Coordinator:
+    """
+    Run tasks on worker processes on any host, connected over TCP.
+
+    The coordinator listens on ``address``; workers (``python src/distributed.py --connect
+    HOST:PORT``) connect, authenticate with the shared ``authkey`` and take one task at a
+    time. Tasks are pickled ``(function, args)`` pairs, so the functions must be importable
+    on the workers. Every worker sends a heartbeat every ``heartbeat_interval`` seconds
+    while it is connected; a worker that disconnects or stays silent for
+    ``heartbeat_timeout`` seconds is dropped and its task is handed to another worker.
+
+    Has the interface of worker_pool.WorkerPool, so it can replace the process pool.
+    """
+
+    def __init__(self, address: Tuple[str, int] = ('0.0.0.0', 6000), authkey: Optional[bytes] = None, initializer: Optional[Callable] = None, initargs: Tuple = (), local_workers: int = 0, heartbeat_interval: float = 1.0, heartbeat_timeout: float = 10.0, max_reassignments: int = 3) -> None:
+        """
+        Start listening for workers.
+
+        Args:
+            address: The (host, port) to listen on; port 0 picks a free port.
+            authkey: The key workers must present. Defaults to the VQE_AUTHKEY environment
+                variable, else a random key that only the local workers know.
+            initializer: An optional function run once in every worker after it connects.
+            initargs: Arguments passed to ``initializer``.
+            local_workers: The number of worker processes to start on this machine.
+            heartbeat_interval: The seconds between two heartbeats of a worker.
+            heartbeat_timeout: The seconds of silence after which a worker counts as lost.
+            max_reassignments: How often a task may be handed to another worker after its
+                worker was lost before the task fails.
+        """
+        if authkey is None:
+            authkey = os.environ.get(AUTHKEY_ENV, '').encode('utf-8') or os.urandom(32)
+            if AUTHKEY_ENV not in os.environ:
+                logging.warning(f"No authkey configured; set distributed.authkey or {AUTHKEY_ENV} to accept remote workers.")
+        self.authkey = authkey
+        self.initializer = initializer
+        self.initargs = initargs
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_reassignments = max_reassignments
+        self._listener = Listener(address, authkey=authkey)
+        self.address = self._listener.address
+        self._condition = threading.Condition()
+        self._queue: Deque[_Task] = deque()
+        self._workers: Dict[str, _Worker] = {}
+        self._next_id = 0
+        self._closed = False
+        # Локальные работники запускаются до потоков, чтобы не наследовать захваченные блокировки
+        self._local = [multiprocessing.Process(target=run_worker, args=(self._connect_address(), authkey), daemon=True) for _ in range(local_workers)]
+        for process in self._local:
+            process.start()
+        self._threads = [
+            threading.Thread(target=self._accept, name='coordinator-accept', daemon=True),
+            threading.Thread(target=self._monitor, name='coordinator-monitor', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logging.info(f"Coordinator listening on {self.address[0]}:{self.address[1]} with {local_workers} local workers.")
+
+    @property
+    def processes(self) -> int:
+        """
+        The number of connected workers, at least one.
+        """
+        with self._condition:
+            return max(1, len(self._workers))
+
+    def _connect_address(self) -> Tuple[str, int]:
+        host, port = self.address
+        return ('127.0.0.1' if host in ('', '0.0.0.0') else host, port)
+
+    def __enter__(self) -> 'Coordinator':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError) as e:
+                if self._closed:
+                    return
+                logging.warning(f"Rejected a worker connection: {e!r}")
+                continue
+            if self._closed:
+                conn.close()
+                return
+            threading.Thread(target=self._serve, args=(conn,), name='coordinator-worker', daemon=True).start()
+
+    def _serve(self, conn: Connection) -> None:
+        """
+        Register a connected worker and handle its messages until it is lost.
+        """
+        try:
+            _, host, pid = conn.recv()
+            conn.send(('init', self.heartbeat_interval, self.initializer, self.initargs))
+        except (OSError, EOFError):
+            conn.close()
+            return
+        worker = _Worker(conn, f"{host}:{pid}")
+        with self._condition:
+            self._workers[worker.name] = worker
+            logging.info(f"Worker {worker.name} connected ({len(self._workers)} connected).")
+            self._dispatch()
+        while True:
+            try:
+                message = conn.recv()
+            except (OSError, EOFError):
+                self._lose(worker, 'disconnected')
+                conn.close()
+                return
+            with self._condition:
+                worker.last_seen = time.monotonic()
+                if message[0] in ('result', 'error') and worker.task is not None and worker.task.id == message[1]:
+                    task, worker.task = worker.task, None
+                    if message[0] == 'result':
+                        task.result._set(message[2])
+                    else:
+                        task.result._set(error=message[2])
+                    self._dispatch()
+                    self._condition.notify_all()
+
+    def _lose(self, worker: _Worker, reason: str) -> None:
+        """
+        Drop a worker and hand its task to another one.
+        """
+        with self._condition:
+            if self._workers.get(worker.name) is not worker:
+                return
+            del self._workers[worker.name]
+            _hang_up(worker.conn)
+            task, worker.task = worker.task, None
+            note = ''
+            if task is not None and not self._closed:
+                if task.assignments > self.max_reassignments:
+                    task.result._set(error=RuntimeError(f"Task {task.id} was lost with {task.assignments} workers"))
+                    note = f"; task {task.id} failed"
+                else:
+                    # Задача потерянного работника идет в начало очереди
+                    self._queue.appendleft(task)
+                    note = f"; reassigning task {task.id}"
+            logging.warning(f"Worker {worker.name} {reason}{note} ({len(self._workers)} connected).")
+            self._dispatch()
+            self._condition.notify_all()
+
+    def _monitor(self) -> None:
+        while not self._closed:
+            time.sleep(self.heartbeat_interval)
+            with self._condition:
+                silent = [worker for worker in self._workers.values() if time.monotonic() - worker.last_seen > self.heartbeat_timeout]
+            for worker in silent:
+                self._lose(worker, f"sent no heartbeat for {self.heartbeat_timeout} s")
+
+    def _dispatch(self) -> None:
+        """
+        Hand queued tasks to idle workers. Called with the lock held.
+        """
+        for worker in list(self._workers.values()):
+            if not self._queue:
+                return
+            if worker.task is not None:
+                continue
+            task = self._queue.popleft()
+            try:
+                worker.conn.send(('task', task.id, task.func, task.args))
+            except (OSError, ValueError):
+                self._queue.appendleft(task)
+                continue
+            except Exception as e:
+                # Задачу нельзя сериализовать: ошибка задачи, а не работника
+                task.result._set(error=e)
+                continue
+            worker.task = task
+            task.assignments += 1
+
+    def submit(self, func: Callable, args: Sequence[Any] = (), callback: Optional[Callable] = None) -> DistributedResult:
+        """
+        Schedule a single task.
+
+        Args:
+            func: The task function, importable on the workers.
+            args: Positional arguments for ``func``.
+            callback: Called with the DistributedResult once the task finishes.
+
+        Returns:
+            A DistributedResult for the task.
+        """
+        result = DistributedResult(callback)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The coordinator is closed")
+            self._queue.append(_Task(self._next_id, func, tuple(args), result))
+            self._next_id += 1
+            self._dispatch()
+        return result
+
+    def imap_unordered(self, func: Callable, args_list: Iterable[Sequence[Any]], chunksize: int = 1) -> Iterator[Tuple[int, Any]]:
+        """
+        Run ``func`` over many argument tuples and yield results in completion order.
+
+        Like WorkerPool, only as many chunks as there are connected workers are queued at a
+        time, so tasks submitted in the meantime do not wait behind the whole backlog;
+        workers connecting later are given chunks within a heartbeat interval.
+
+        Args:
+            func: The task function, importable on the workers.
+            args_list: An iterable of positional argument tuples, one per task.
+            chunksize: The number of tasks sent to a worker at once.
+
+        Yields:
+            (task index, result) pairs as soon as each chunk finishes.
+
+        Raises:
+            ValueError: If ``chunksize`` is less than 1.
+        """
+        if chunksize < 1:
+            raise ValueError(f"chunksize must be at least 1, got {chunksize}")
+        tasks = list(enumerate(args_list))
+        chunks = iter([tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)])
+        done = queue.Queue()
+
+        def submit_next() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            self.submit(_run_chunk, (func, chunk), callback=done.put)
+            return True
+
+        in_flight = 0
+        while True:
+            # Число работников меняется: новые получают задачи, не дожидаясь завершения старых
+            while in_flight < self.processes and submit_next():
+                in_flight += 1
+            if not in_flight:
+                return
+            try:
+                item = done.get(timeout=self.heartbeat_interval).get()
+            except queue.Empty:
+                continue
+            in_flight -= 1
+            for index, result in item:
+                yield index, result
+
+    def map(self, func: Callable, args_list: Iterable[Sequence[Any]], chunksize: int = 1) -> List[Any]:
+        """
+        Run ``func`` over many argument tuples and return the results in input order.
+        """
+        results = dict(self.imap_unordered(func, args_list, chunksize))
+        return [results[index] for index in range(len(results))]
+
+    def close(self) -> None:
+        """
+        Wait for all scheduled tasks and stop the workers.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: not self._queue and all(worker.task is None for worker in self._workers.values()))
+        self._shutdown()
+
+    def terminate(self) -> None:
+        """
+        Stop the workers immediately, failing pending tasks.
+        """
+        with self._condition:
+            for task in list(self._queue) + [worker.task for worker in self._workers.values() if worker.task is not None]:
+                task.result._set(error=RuntimeError("The coordinator was terminated"))
+            self._queue.clear()
+        self._shutdown()
+        for process in self._local:
+            process.terminate()
+
+    def _shutdown(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            try:
+                worker.conn.send(('stop',))
+            except (OSError, ValueError):
+                pass
+            _hang_up(worker.conn)
+        # accept() blocks until a client arrives, so wake it up with one
+        try:
+            Client(self._connect_address(), authkey=self.authkey).close()
+        except (OSError, EOFError, multiprocessing.AuthenticationError):
+            pass
+        self._listener.close()
+        for process in self._local:
+            process.join(timeout=5)
+
+def run_worker(address: Tuple[str, int], authkey: bytes, connect_timeout: float = 30.0) -> None:
+    """
+    Connect to a coordinator and run its tasks until it stops or goes away.
+
+    Args:
+        address: The (host, port) of the coordinator.
+        authkey: The coordinator's key.
+        connect_timeout: How long to keep retrying while the coordinator is not up yet.
+
+    Raises:
+        ConnectionError: If the coordinator cannot be reached within ``connect_timeout``.
+    """
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            conn = Client(address, authkey=authkey)
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise ConnectionError(f"No coordinator at {address[0]}:{address[1]}")
+            time.sleep(0.5)
+    lock = threading.Lock()
+    stopped = threading.Event()
+
+    def send(message: Tuple) -> None:
+        with lock:
+            conn.send(message)
+
+    def heartbeat(interval: float) -> None:
+        # Отдельный поток: сердцебиение идет и во время долгой задачи
+        while not stopped.wait(interval):
+            try:
+                send(('heartbeat',))
+            except (OSError, ValueError):
+                return
+
+    try:
+        send(('hello', socket.gethostname(), os.getpid()))
+        while True:
+            try:
+                message = conn.recv()
+            except (OSError, EOFError):
+                break
+            if message[0] == 'init':
+                _, interval, initializer, initargs = message
+                # Сердцебиение до инициализации: импорт модулей может занять дольше таймаута
+                threading.Thread(target=heartbeat, args=(interval,), name='worker-heartbeat', daemon=True).start()
+                if initializer is not None:
+                    initializer(*initargs)
+            elif message[0] == 'task':
+                _, task_id, func, args = message
+                try:
+                    reply = ('result', task_id, func(*args))
+                except Exception as e:
+                    reply = ('error', task_id, e)
+                try:
+                    send(reply)
+                except (OSError, ValueError):
+                    break
+                except Exception:
+                    # Результат или исключение не сериализуются
+                    send(('error', task_id, RuntimeError(traceback.format_exc())))
+            elif message[0] == 'stop':
+                break
+    finally:
+        stopped.set()
+        conn.close()
+
+def init_remote_worker(config: Dict[str, Any], profile_dir: Optional[str] = None, cprofile: bool = False) -> None:
+    """
+    Initialize a distributed worker: register the configured Hamiltonian and ansatz and configure profiling.
+
+    Remote workers do not inherit the coordinator's registries like forked pool workers
+    do, and the best cost is not shared between hosts, so pruning is off.
+
+    Args:
+        config: The job's config.
+        profile_dir: The directory of the trace files on the worker's host, or None to disable profiling.
+        cprofile: Also run cProfile in the worker.
+
+    Returns:
+        None
+    """
+    from hamiltonian import configure_hamiltonian
+    import profiling
+    configure_hamiltonian(config)
+    profiling.configure(profile_dir, cprofile)
+
+def coordinator_from_config(config: Dict[str, Any], initargs: Tuple = ()) -> Coordinator:
+    """
+    Start the coordinator described by the ``distributed`` config section, with init_remote_worker as the worker initializer.
+    """
+    settings = config.get('distributed', {})
+    authkey = settings.get('authkey')
+    return Coordinator(
+        address=(settings.get('host', '0.0.0.0'), settings.get('port', 6000)),
+        authkey=authkey.encode('utf-8') if authkey else None,
+        initializer=init_remote_worker,
+        initargs=(config,) + tuple(initargs),
+        local_workers=settings.get('local_workers', 0),
+        heartbeat_interval=settings.get('heartbeat_interval', 1.0),
+        heartbeat_timeout=settings.get('heartbeat_timeout', 10.0),
+        max_reassignments=settings.get('max_reassignments', 3),
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run optimization tasks for a coordinator started by main.py with distributed.enabled')
+    parser.add_argument('--connect', type=str, required=True, help='The HOST:PORT of the coordinator')
+    parser.add_argument('--processes', type=int, default=1, help='Number of worker processes to run on this host')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Seconds to keep retrying while the coordinator is not up')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+
+    host, port = args.connect.rsplit(':', 1)
+    key = os.environ.get(AUTHKEY_ENV, '').encode('utf-8')
+    if not key:
+        sys.exit(f"Set {AUTHKEY_ENV} to the coordinator's distributed.authkey")
+    workers = [multiprocessing.Process(target=run_worker, args=((host, int(port)), key, args.timeout)) for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
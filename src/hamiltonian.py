@@ -0,0 +1,264 @@
+import os
+import json
+import logging
+import functools
+import yaml
+import numpy as np
+import pennylane as qml
+from pennylane import numpy as pnp
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from circuits import QNODE_CACHE_SIZE, GRADIENT_METHODS, apply_ansatz, num_wires, register_hardware_efficient
+
+PAULIS = 'IXYZ'
+
+class Hamiltonian:
+    """
+    A weighted sum of Pauli words, e.g. ``-1.05 * II + 0.39 * ZI + 0.18 * XX``.
+
+    Each word is a string over 'I', 'X', 'Y' and 'Z' with one character per qubit,
+    qubit 0 first. Duplicate words are merged and identity terms are kept as a constant.
+    """
+
+    def __init__(self, terms: Sequence[Tuple[float, str]]) -> None:
+        """
+        Args:
+            terms: A sequence of (coefficient, Pauli word) pairs.
+
+        Raises:
+            ValueError: If the terms are empty, a word contains other characters than
+                'IXYZ' or the words differ in length.
+        """
+        merged: Dict[str, float] = {}
+        for coefficient, word in terms:
+            word = str(word).strip().upper()
+            if not word or any(char not in PAULIS for char in word):
+                raise ValueError(f"Invalid Pauli word: {word}")
+            merged[word] = merged.get(word, 0.0) + float(coefficient)
+        if not merged:
+            raise ValueError("A Hamiltonian needs at least one term")
+        if len({len(word) for word in merged}) > 1:
+            raise ValueError("All Pauli words must have the same length")
+        self.words = tuple(merged)
+        self.coeffs = np.array([merged[word] for word in self.words])
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Hamiltonian':
+        """
+        Load a Hamiltonian from a JSON or YAML list of [coefficient, word] pairs (optionally
+        under a ``terms`` key) or from a text file with one ``coefficient word`` pair per line.
+
+        Args:
+            path: The path of the file.
+
+        Returns:
+            The loaded Hamiltonian.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            extension = os.path.splitext(path)[1].lower()
+            if extension == '.json':
+                data = json.load(f)
+            elif extension in ('.yaml', '.yml'):
+                data = yaml.safe_load(f)
+            else:
+                data = [line.split('#')[0].split() for line in f]
+                data = [fields for fields in data if fields]
+        if isinstance(data, dict):
+            data = data['terms']
+        return cls([(float(coefficient), word) for coefficient, word in data])
+
+    @property
+    def n_qubits(self) -> int:
+        return len(self.words[0])
+
+    @property
+    def constant(self) -> float:
+        """
+        The sum of the identity coefficients, which needs no measurement.
+        """
+        return float(sum(c for c, word in zip(self.coeffs, self.words) if set(word) == {'I'}))
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @functools.cached_property
+    def groups(self) -> List[Tuple[str, List[int]]]:
+        """
+        Partition the non-identity terms into qubit-wise commuting groups.
+
+        Two words commute qubit-wise when, on every qubit, they act with the same Pauli
+        or one of them acts with the identity, so every group can be measured in one
+        shared basis. Terms are placed greedily by decreasing absolute coefficient.
+
+        Returns:
+            A list of (measurement basis word, term indices) pairs.
+        """
+        groups: List[Tuple[List[str], List[int]]] = []
+        for index in np.argsort(-np.abs(self.coeffs), kind='stable'):
+            word = self.words[index]
+            if set(word) == {'I'}:
+                continue
+            for basis, members in groups:
+                if all(a == 'I' or b == 'I' or a == b for a, b in zip(word, basis)):
+                    basis[:] = [b if a == 'I' else a for a, b in zip(word, basis)]
+                    members.append(int(index))
+                    break
+            else:
+                groups.append((list(word), [int(index)]))
+        return [(''.join(basis), members) for basis, members in groups]
+
+    def group_weights(self, basis: str, members: List[int]) -> Tuple[List[int], np.ndarray]:
+        """
+        Fold the terms of a group into one weight per computational basis state.
+
+        After rotating into the group's basis, every term is a product of Z's, so the
+        group's energy is the measured probabilities dotted with these weights.
+
+        Args:
+            basis: The measurement basis word of the group.
+            members: The indices of the group's terms.
+
+        Returns:
+            A tuple of the measured wires and the weights over their 2**len(wires) basis states.
+        """
+        wires = [wire for wire, pauli in enumerate(basis) if pauli != 'I']
+        bits = (np.arange(2 ** len(wires))[:, None] >> np.arange(len(wires) - 1, -1, -1)) & 1
+        weights = np.zeros(2 ** len(wires))
+        for index in members:
+            active = [position for position, wire in enumerate(wires) if self.words[index][wire] != 'I']
+            weights += self.coeffs[index] * (1 - 2 * (bits[:, active].sum(axis=1) % 2))
+        return wires, weights
+
+HAMILTONIANS: Dict[str, Hamiltonian] = {}
+
+def register_hamiltonian(name: str, hamiltonian: Union[Hamiltonian, Sequence[Tuple[float, str]]]) -> None:
+    """
+    Register a Hamiltonian under a name so that workers and caches can refer to it by that name.
+
+    Args:
+        name: A string naming the Hamiltonian.
+        hamiltonian: A Hamiltonian or a sequence of (coefficient, Pauli word) pairs.
+
+    Returns:
+        None
+    """
+    HAMILTONIANS[name] = hamiltonian if isinstance(hamiltonian, Hamiltonian) else Hamiltonian(hamiltonian)
+    get_group_qnodes.cache_clear()
+
+def get_hamiltonian(name: str) -> Hamiltonian:
+    """
+    Look up a registered Hamiltonian.
+
+    Raises:
+        ValueError: If no Hamiltonian is registered under ``name``.
+    """
+    if name not in HAMILTONIANS:
+        raise ValueError(f"Unknown Hamiltonian: {name}")
+    return HAMILTONIANS[name]
+
+def _rotate_to_basis(basis: str) -> None:
+    for wire, pauli in enumerate(basis):
+        if pauli == 'X':
+            qml.Hadamard(wires=wire)
+        elif pauli == 'Y':
+            qml.RX(np.pi / 2, wires=wire)
+
+@functools.lru_cache(maxsize=QNODE_CACHE_SIZE)
+def get_group_qnodes(circuit_type: str, hamiltonian: str, device: str = 'default.qubit', gradient_method: str = 'best') -> Tuple[Tuple[qml.QNode, np.ndarray], ...]:
+    """
+    Build (or fetch from the cache) one QNode per qubit-wise commuting group of a Hamiltonian.
+
+    Every QNode applies the ansatz, rotates the group's qubits into its measurement
+    basis and returns the probabilities of the measured wires, so one execution yields
+    all terms of the group. All QNodes share one device.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+        hamiltonian: The name of a registered Hamiltonian.
+        device: The name of the PennyLane device.
+        gradient_method: The differentiation method of the QNodes.
+
+    Returns:
+        A tuple of (QNode, weights) pairs, one per group.
+
+    Raises:
+        ValueError: If the circuit, Hamiltonian or gradient method is unknown, or the
+            gradient method is 'adjoint'.
+    """
+    observable = get_hamiltonian(hamiltonian)
+    if gradient_method not in GRADIENT_METHODS:
+        raise ValueError(f"Unknown gradient method: {gradient_method}")
+    if gradient_method == 'adjoint':
+        raise ValueError("Adjoint differentiation does not support grouped probability measurements")
+    dev = qml.device(device, wires=max(num_wires(circuit_type), observable.n_qubits))
+    qnodes = []
+    for basis, members in observable.groups:
+        wires, weights = observable.group_weights(basis, members)
+
+        @qml.qnode(dev, diff_method=gradient_method)
+        def circuit(params, basis=basis, wires=wires):
+            apply_ansatz(params, circuit_type)
+            _rotate_to_basis(basis)
+            return qml.probs(wires=wires)
+
+        qnodes.append((circuit, weights))
+    return tuple(qnodes)
+
+def get_energy_fn(circuit_type: str, hamiltonian: str, gradient_method: str = 'best', device: str = 'default.qubit') -> Callable:
+    """
+    Return a differentiable function computing the energy of a registered Hamiltonian.
+
+    Evaluating the energy costs one circuit execution per qubit-wise commuting group
+    instead of one per term.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+        hamiltonian: The name of a registered Hamiltonian.
+        gradient_method: The differentiation method of the group QNodes.
+        device: The name of the PennyLane device.
+
+    Returns:
+        A callable taking the circuit parameters and returning the energy.
+    """
+    groups = get_group_qnodes(circuit_type, hamiltonian, device, gradient_method)
+    constant = get_hamiltonian(hamiltonian).constant
+
+    def energy(params):
+        total = constant
+        for qnode, weights in groups:
+            total = total + pnp.dot(qnode(params), weights)
+        return total
+
+    return energy
+
+def configure_hamiltonian(config: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """
+    Register the Hamiltonian and ansatz described by a configuration.
+
+    The ``hamiltonian`` section gives the terms inline (``terms``) or in a file (``file``).
+    The circuit ``hardware_efficient`` is expanded to a hardware-efficient ansatz with
+    ``optimization.ansatz.layers`` layers on ``optimization.ansatz.qubits`` qubits,
+    defaulting to the Hamiltonian's width.
+
+    Args:
+        config: A dictionary containing configuration parameters.
+
+    Returns:
+        A tuple of the circuit type to optimize and the name of the registered
+        Hamiltonian, or None to measure PauliZ(0).
+    """
+    section = config.get('hamiltonian') or {}
+    observable = None
+    if section.get('file'):
+        observable = Hamiltonian.from_file(section['file'])
+    elif section.get('terms'):
+        observable = Hamiltonian(section['terms'])
+    if observable is not None:
+        register_hamiltonian('config', observable)
+        logging.info(f"Loaded a {observable.n_qubits}-qubit Hamiltonian with {len(observable)} terms in {len(observable.groups)} measurement groups.")
+
+    circuit_type = config['optimization']['circuit']
+    if circuit_type == 'hardware_efficient':
+        ansatz = config['optimization'].get('ansatz') or {}
+        qubits = ansatz.get('qubits') or (observable.n_qubits if observable is not None else 2)
+        circuit_type = register_hardware_efficient(qubits, ansatz.get('layers', 2))
+    return circuit_type, None if observable is None else 'config'
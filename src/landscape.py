@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import logging
+import argparse
+import yaml
+import numpy as np
+from scipy.ndimage import minimum_filter
+from scipy.stats import qmc
+from typing import Any, Dict, Optional, Sequence, Tuple
+from circuits import num_params, num_wires
+from hamiltonian import configure_hamiltonian, get_hamiltonian
+from statevector import expval
+
+DEFAULT_BOUNDS = (0.0, 2 * np.pi)
+# Память одного пакета: состояние, результат гейта и наблюдаемая для каждой точки
+MAX_BATCH_BYTES = 256 * 2 ** 20
+MAX_GRID_POINTS = 2 ** 31
+
+class Landscape:
+    """
+    The cost of a circuit sampled over its parameter space.
+
+    Attributes:
+        costs: For a grid, an array of shape ``(resolution,) * n_params`` with the cost at
+            every grid point; for a Sobol sample, the ``(samples,)`` costs of ``points``.
+            Memory-mapped when the landscape is stored on disk.
+        points: The ``(samples, n_params)`` Sobol points, or None for a grid.
+        metadata: The method, circuit, Hamiltonian, bounds and size of the scan.
+    """
+
+    def __init__(self, costs: np.ndarray, metadata: Dict[str, Any], points: Optional[np.ndarray] = None) -> None:
+        self.costs = costs
+        self.metadata = metadata
+        self.points = points
+
+    @property
+    def period(self) -> float:
+        low, high = self.metadata['bounds']
+        return high - low
+
+    @property
+    def axis(self) -> Optional[np.ndarray]:
+        """
+        The coordinates of a grid axis, or None for a Sobol sample.
+        """
+        if self.metadata['method'] != 'grid':
+            return None
+        low, high = self.metadata['bounds']
+        return np.linspace(low, high, self.metadata['resolution'], endpoint=False)
+
+    def parameters(self, flat_indices: np.ndarray) -> np.ndarray:
+        """
+        Return the parameter vectors of points given by their flat indices into ``costs``.
+        """
+        flat_indices = np.asarray(flat_indices)
+        if self.points is not None:
+            return np.asarray(self.points[flat_indices])
+        return self.axis[np.stack(np.unravel_index(flat_indices, self.costs.shape), axis=-1)]
+
+    def basins(self, count: int, min_distance: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the lowest-cost basins.
+
+        On a grid, the candidates are the local minima of the cost (compared with all
+        neighbors, wrapping around the periodic parameter range). For a Sobol sample, every
+        point is a candidate. Candidates are taken in order of cost and skipped if they lie
+        within ``min_distance`` (periodic Euclidean distance) of an already selected one.
+
+        Args:
+            count: The maximum number of basins.
+            min_distance: The minimum distance between two basins. Defaults to a tenth of the parameter range.
+
+        Returns:
+            A tuple of the (k, n_params) basin minima, k <= count, and their costs, lowest first.
+        """
+        if min_distance is None:
+            min_distance = self.period / 10
+        costs = np.asarray(self.costs)
+        if self.points is None:
+            candidates = np.flatnonzero(minimum_filter(costs, size=3, mode='wrap') == costs)
+        else:
+            candidates = np.arange(costs.size)
+        candidates = candidates[np.argsort(costs.reshape(-1)[candidates], kind='stable')]
+
+        selected = []
+        for index in candidates:
+            point = self.parameters(index)
+            if selected:
+                delta = np.abs(self.parameters(np.array(selected)) - point) % self.period
+                if np.linalg.norm(np.minimum(delta, self.period - delta), axis=1).min() < min_distance:
+                    continue
+            selected.append(index)
+            if len(selected) == count:
+                break
+        selected = np.array(selected, dtype=int)
+        return self.parameters(selected), costs.reshape(-1)[selected]
+
+    @classmethod
+    def load(cls, path: str) -> 'Landscape':
+        """
+        Open a landscape stored by scan_landscape, memory-mapped read-only.
+        """
+        with open(_metadata_path(path), 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        points = np.load(_points_path(path), mmap_mode='r') if metadata['method'] == 'sobol' else None
+        return cls(np.load(path, mmap_mode='r'), metadata, points)
+
+def _metadata_path(path: str) -> str:
+    return os.path.splitext(path)[0] + '.json'
+
+def _points_path(path: str) -> str:
+    return os.path.splitext(path)[0] + '_points.npy'
+
+def _batch_size(circuit_type: str, hamiltonian: Optional[str], batch_size: int, sobol: bool) -> int:
+    n_wires = num_wires(circuit_type)
+    if hamiltonian is not None:
+        n_wires = max(n_wires, get_hamiltonian(hamiltonian).n_qubits)
+    size = max(1, min(batch_size, MAX_BATCH_BYTES // (3 * 16 * 2 ** n_wires)))
+    # Sobol points keep their balance properties only in blocks of powers of two
+    return 2 ** int(np.log2(size)) if sobol else size
+
+def scan_landscape(circuit_type: str, hamiltonian: Optional[str] = None, method: str = 'grid', resolution: int = 64, samples: int = 4096, bounds: Sequence[float] = DEFAULT_BOUNDS, path: Optional[str] = None, batch_size: int = 65536, seed: Optional[int] = None) -> Landscape:
+    """
+    Evaluate the cost of a circuit over a dense grid or a Sobol sample of its parameters.
+
+    The points are evaluated in broadcast batches on the NumPy statevector simulator
+    (statevector.expval), bounded so that a batch never holds more than about
+    MAX_BATCH_BYTES of statevectors, and written straight into the output array.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+        hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+        method: 'grid' for ``resolution`` points per parameter, or 'sobol' for a scrambled
+            Sobol sample of ``samples`` points (rounded up to a power of two).
+        resolution: The grid points per parameter. The range is treated as periodic, so the
+            upper bound is excluded.
+        samples: The number of Sobol points.
+        bounds: The (low, high) range of every parameter.
+        path: A ``.npy`` file to store the costs in as a memory-mapped array, with the
+            metadata (and the Sobol points) next to it. Kept in memory if None.
+        batch_size: The maximum number of points evaluated at once.
+        seed: The seed of the Sobol scrambling.
+
+    Returns:
+        The Landscape.
+
+    Raises:
+        ValueError: If the method is unknown or the grid is too large.
+    """
+    n_params = num_params(circuit_type)
+    low, high = bounds
+    if method == 'grid':
+        if resolution ** n_params > MAX_GRID_POINTS:
+            raise ValueError(f"A grid of {resolution}^{n_params} points is too large; use method 'sobol'")
+        shape = (resolution,) * n_params
+        axis = np.linspace(low, high, resolution, endpoint=False)
+    elif method == 'sobol':
+        samples = 2 ** int(np.ceil(np.log2(samples)))
+        shape = (samples,)
+        sampler = qmc.Sobol(n_params, scramble=True, seed=seed)
+    else:
+        raise ValueError(f"Unknown landscape method: {method}")
+    metadata = {'method': method, 'circuit_type': circuit_type, 'hamiltonian': hamiltonian, 'bounds': [float(low), float(high)], 'n_params': n_params, 'resolution': resolution if method == 'grid' else None, 'samples': samples if method == 'sobol' else None, 'seed': seed}
+
+    if path is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        costs = np.lib.format.open_memmap(path, mode='w+', dtype=float, shape=shape)
+        points = np.lib.format.open_memmap(_points_path(path), mode='w+', dtype=float, shape=(samples, n_params)) if method == 'sobol' else None
+    else:
+        costs = np.empty(shape)
+        points = np.empty((samples, n_params)) if method == 'sobol' else None
+
+    flat = costs.reshape(-1)
+    total = flat.size
+    batch = _batch_size(circuit_type, hamiltonian, batch_size, method == 'sobol')
+    started = time.perf_counter()
+    for begin in range(0, total, batch):
+        end = min(begin + batch, total)
+        if method == 'grid':
+            params = axis[np.stack(np.unravel_index(np.arange(begin, end), shape), axis=1)]
+        else:
+            params = low + (high - low) * sampler.random(end - begin)
+            points[begin:end] = params
+        flat[begin:end] = expval(params, circuit_type, hamiltonian)
+    logging.info(f"Evaluated {total} points of {circuit_type} in {time.perf_counter() - started:.2f} s ({batch} per batch).")
+
+    if path is not None:
+        costs.flush()
+        if points is not None:
+            points.flush()
+        with open(_metadata_path(path), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+        logging.info(f"Landscape saved at {path}")
+    return Landscape(costs, metadata, points)
+
+def seed_starts(landscape: Landscape, count: int, min_distance: Optional[float] = None, spread: float = 0.05, seed: Optional[int] = None) -> np.ndarray:
+    """
+    Choose initial parameters for a multi-start optimization from the lowest-cost basins.
+
+    If the landscape has fewer basins than ``count``, the basins are reused in order of cost
+    with Gaussian perturbations of standard deviation ``spread`` (as a fraction of the range).
+
+    Args:
+        landscape: The scanned landscape.
+        count: The number of starts.
+        min_distance: The minimum distance between two basins (see Landscape.basins).
+        spread: The relative size of the perturbations of reused basins.
+        seed: The seed of the perturbations.
+
+    Returns:
+        A (count, n_params) array of initial parameters.
+    """
+    minima, costs = landscape.basins(count, min_distance)
+    rng = np.random.default_rng(seed)
+    starts = minima[np.arange(count) % len(minima)].copy()
+    reused = np.arange(count) >= len(minima)
+    starts[reused] += rng.normal(scale=spread * landscape.period, size=(reused.sum(), starts.shape[1]))
+    logging.info(f"Seeded {count} starts from {len(minima)} basins (lowest cost {costs[0]:.4f}).")
+    return starts
+
+def landscape_from_config(config: Dict[str, Any], circuit_type: str, hamiltonian: Optional[str]) -> Landscape:
+    """
+    Scan the landscape described by the ``landscape`` config section.
+    """
+    settings = config.get('landscape', {})
+    return scan_landscape(
+        circuit_type,
+        hamiltonian,
+        method=settings.get('method', 'grid'),
+        resolution=settings.get('resolution', 64),
+        samples=settings.get('samples', 4096),
+        bounds=settings.get('bounds') or DEFAULT_BOUNDS,
+        path=settings.get('path') or None,
+        batch_size=settings.get('batch_size', 65536),
+        seed=settings.get('seed'),
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Scan the cost landscape of the configured circuit and list its lowest basins')
+    parser.add_argument('--config', type=str, default='config.yaml', help='Path to the configuration file')
+    parser.add_argument('--basins', type=int, default=10, help='Number of basins to list')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+
+    with open(args.config, 'r', encoding='utf-8') as file:
+        config = yaml.safe_load(file)
+
+    circuit_type, hamiltonian = configure_hamiltonian(config)
+    minima, costs = landscape_from_config(config, circuit_type, hamiltonian).basins(args.basins)
+    for params, cost in zip(minima, costs):
+        logging.info(f"Basin at {np.round(params, 4).tolist()}: cost {cost:.6f}")
@@ -4,15 +4,26 @@ import logging
 import argparse
 import yaml
 import multiprocessing
-from typing import Dict, Any, List, Tuple, Union
-from circuits import create_vqe_circuit
-from optimization import optimize_vqe, load_state
-from analysis import analyze_results
+from typing import Dict, Any, List, Optional, Tuple, Union
+from circuits import create_vqe_circuit, num_params
+from hamiltonian import configure_hamiltonian
+from optimization import optimize_vqe, load_state, save_state
+from batched_optimization import batched_optimize_vqe
+from analysis import ARTIFACTS, analyze_results, analyze_batch
+from report import build_multi_run_report
+from results_store import write_results_store
+from worker_pool import WorkerPool, call_safely
+from distributed import coordinator_from_config
+from manifest import JobManifest, config_hash
+from landscape import landscape_from_config, seed_starts
+from warm_start import store_from_config, warm_starts
+from convergence import init_shared_best
+import profiling
 from quantum_metrics import calculate_metrics
 # from error_handler import send_error_email
 import numpy as np
 
-def parallel_optimize_vqe(params_list: List[Union[List[float], np.ndarray]], steps: int, stepsize: float, circuit_type: str) -> List[Tuple[np.ndarray, List[float]]]:
+def parallel_optimize_vqe(params_list: List[Union[List[float], np.ndarray]], steps: int, stepsize: float, circuit_type: str, gradient_method: str = 'best', pool: Optional[WorkerPool] = None, chunksize: int = 1, convergence: Optional[Dict[str, Any]] = None, save_path: Optional[str] = None, hamiltonian: Optional[str] = None, backend: str = 'default.qubit', cache: Optional[Dict[str, Any]] = None, optimizer: Union[str, Dict[str, Any], None] = None, checkpoint: Optional[Dict[str, Any]] = None, shots: Optional[Dict[str, Any]] = None) -> List[Tuple[np.ndarray, List[float]]]:
     """
     Optimize VQE circuits in parallel.
 
@@ -21,42 +32,170 @@ def parallel_optimize_vqe(params_list: List[Union[List[float], np.ndarray]], ste
         steps: An integer representing the number of optimization steps.
         stepsize: A float representing the step size for the gradient descent optimizer.
         circuit_type: A string indicating the type of the circuit.
+        gradient_method: The differentiation method used by each optimization.
+        pool: A shared worker pool. A temporary one is created if omitted.
+        chunksize: The number of starts handed to a worker at once.
+        convergence: Early-stopping criteria passed to every optimization.
+        save_path: A checkpoint file shared by all starts, each stored under the run id ``start_<index>``.
+        hamiltonian: The name of a registered Hamiltonian whose energy is minimized, or None to minimize <PauliZ(0)>.
+        backend: A PennyLane device name, or 'numpy' for the native statevector simulator.
+        cache: The ``optimization.cache`` config section passed to every optimization.
+        optimizer: The ``optimization.optimizer`` config value passed to every optimization.
+        checkpoint: The ``optimization.checkpoint`` config section passed to every optimization.
+        shots: The ``optimization.shots`` config section passed to every optimization.
 
     Returns:
         A list of tuples containing optimized parameters and cost history for each set of initial parameters.
     """
     logging.info("Starting parallel optimization...")
-    pool = multiprocessing.Pool(processes=multiprocessing.cpu_count())
-    results = pool.starmap(optimize_vqe, [(params, steps, stepsize, circuit_type) for params in params_list])
-    pool.close()
-    pool.join()
+    tasks = [(params, steps, stepsize, circuit_type, save_path, gradient_method, convergence, f"start_{index}", hamiltonian, backend, cache, optimizer, checkpoint, shots) for index, params in enumerate(params_list)]
+    if pool is None:
+        with WorkerPool() as pool:
+            results = pool.map(optimize_vqe, tasks, chunksize)
+    else:
+        results = pool.map(optimize_vqe, tasks, chunksize)
     logging.info("Parallel optimization completed.")
     return results
 
-def parallel_analyze_results(results: List[Tuple[np.ndarray, List[float]]], results_dir: str) -> None:
+def parallel_analyze_results(results: List[Tuple[np.ndarray, List[float]]], results_dir: str, pool: Optional[WorkerPool] = None, chunksize: int = 1, artifacts: str = 'full', run_ids: Optional[List[str]] = None) -> None:
     """
     Analyze optimization results in parallel.
 
     Args:
         results: A list of tuples containing optimized parameters and cost history.
-        results_dir: The directory to save the analysis results.
+        results_dir: The directory to save the analysis results; each run gets its own ``start_<index>`` subdirectory.
+        pool: A shared worker pool. A temporary one is created if omitted.
+        chunksize: The number of results handed to a worker at once.
+        artifacts: The artifact set rendered per run ('none', 'summary' or 'full').
+        run_ids: The run ids (and subdirectories) of the results. Defaults to ``start_<index>``.
 
     Returns:
         None
     """
     logging.info("Starting parallel analysis...")
-    pool = multiprocessing.Pool(processes=multiprocessing.cpu_count())
-    pool.starmap(analyze_results, [(params, cost_history) for params, cost_history in results])
-    pool.close()
-    pool.join()
+    run_ids = run_ids or [f"start_{index}" for index in range(len(results))]
+    tasks = [(params, cost_history, results_dir, run_id, False, artifacts) for run_id, (params, cost_history) in zip(run_ids, results)]
+    if pool is None:
+        with WorkerPool() as pool:
+            pool.map(analyze_results, tasks, chunksize)
+    else:
+        pool.map(analyze_results, tasks, chunksize)
     logging.info("Parallel analysis completed.")
 
-def main(config: Dict[str, Any]) -> None:
+def optimize_and_analyze(pool: WorkerPool, params_list: List[Union[List[float], np.ndarray]], steps: int, stepsize: float, circuit_type: str, results_dir: str, gradient_method: str = 'best', chunksize: int = 1, convergence: Optional[Dict[str, Any]] = None, save_path: Optional[str] = None, artifacts: str = 'full', hamiltonian: Optional[str] = None, backend: str = 'default.qubit', cache: Optional[Dict[str, Any]] = None, optimizer: Union[str, Dict[str, Any], None] = None, checkpoint: Optional[Dict[str, Any]] = None, shots: Optional[Dict[str, Any]] = None, run_ids: Optional[List[str]] = None, manifest: Optional[JobManifest] = None, retries: int = 0, time_budget: Optional[float] = None) -> List[Tuple[np.ndarray, List[float]]]:
+    """
+    Optimize VQE circuits on a shared pool and analyze each start as soon as it finishes.
+
+    Optimization results stream back in completion order, so the analysis of finished
+    starts overlaps with the optimization of the remaining ones. A start that raises is
+    retried up to ``retries`` times, continuing from its checkpoint.
+
+    Args:
+        pool: The shared worker pool, or a distributed.Coordinator.
+        params_list: A list of initial parameters for the quantum circuits.
+        steps: An integer representing the number of optimization steps.
+        stepsize: A float representing the step size for the gradient descent optimizer.
+        circuit_type: A string indicating the type of the circuit.
+        results_dir: The directory to save the analysis results; each run gets its own ``start_<index>`` subdirectory.
+        gradient_method: The differentiation method used by each optimization.
+        chunksize: The number of starts handed to a worker at once.
+        convergence: Early-stopping criteria passed to every optimization.
+        save_path: A checkpoint file shared by all starts, each stored under its run id.
+        artifacts: The artifact set rendered per run ('none', 'summary' or 'full').
+        hamiltonian: The name of a registered Hamiltonian whose energy is minimized, or None to minimize <PauliZ(0)>.
+        backend: A PennyLane device name, or 'numpy' for the native statevector simulator.
+        cache: The ``optimization.cache`` config section passed to every optimization.
+        optimizer: The ``optimization.optimizer`` config value passed to every optimization.
+        checkpoint: The ``optimization.checkpoint`` config section passed to every optimization.
+        shots: The ``optimization.shots`` config section passed to every optimization.
+        run_ids: The run ids of the starts. Defaults to ``start_<index>``.
+        manifest: The job manifest recording the status of every start. Starts it marks as
+            started before continue from their checkpoints.
+        retries: How often a failed start is retried. With a manifest, whose checkpoint keys
+            belong to this job alone, a retry continues from the start's checkpoint;
+            without one it starts over from the initial parameters.
+        time_budget: The time budget of every start in seconds.
+
+    Returns:
+        A list of tuples containing optimized parameters and cost history for each set of initial parameters.
+
+    Raises:
+        RuntimeError: If a start still fails after its retries. The other starts complete first.
+    """
+    logging.info("Starting parallel optimization and analysis...")
+    run_ids = run_ids or [f"start_{index}" for index in range(len(params_list))]
+    tasks = {
+        run_id: [optimize_vqe, params, steps, stepsize, circuit_type, save_path, gradient_method, convergence, run_id, hamiltonian, backend, cache, optimizer, checkpoint, shots, time_budget, manifest.checkpoint_id(run_id) if manifest is not None else None, manifest is not None and manifest.started(run_id)]
+        for run_id, params in zip(run_ids, params_list)
+    }
+    results = {}
+    analyses = []
+    pending = list(run_ids)
+    for attempt in range(retries + 1):
+        if manifest is not None:
+            for run_id in pending:
+                manifest.runs[run_id]['attempts'] += 1
+            manifest.update(pending, status='running')
+        failed = []
+        for index, (result, error) in pool.imap_unordered(call_safely, [tasks[run_id] for run_id in pending], chunksize):
+            run_id = pending[index]
+            if error is not None:
+                logging.error(f"Start {run_id} failed (attempt {attempt + 1} of {retries + 1}):\n{error}")
+                failed.append(run_id)
+                if manifest is not None:
+                    manifest.update([run_id], status='failed', error=error.strip().splitlines()[-1])
+                continue
+            params, cost_history = result
+            logging.info(f"Start {run_id} finished with cost {float(cost_history[-1]):.4f} ({cost_history.stop_reason} at step {cost_history.stop_step}, {cost_history.evaluations} cost and {cost_history.gradient_evaluations} gradient evaluations" + (f", {cost_history.shots} shots)." if cost_history.shots else ")."))
+            results[run_id] = result
+            if manifest is not None:
+                manifest.record_result(run_id, cost_history)
+            analyses.append(pool.submit(analyze_results, (params, cost_history, results_dir, run_id, False, artifacts)))
+        # Повторные попытки продолжают с контрольной точки, если ее ключ принадлежит этому заданию
+        pending = failed
+        for run_id in pending:
+            tasks[run_id][-1] = manifest is not None
+        if not pending:
+            break
+    for analysis in analyses:
+        analysis.get()
+    if pending:
+        raise RuntimeError(f"{len(pending)} start(s) failed after {retries + 1} attempt(s): {', '.join(pending)}")
+    logging.info("Parallel optimization and analysis completed.")
+    return [results[run_id] for run_id in run_ids]
+
+def init_worker(config: Dict[str, Any], shared_best, profile_dir: Optional[str] = None, cprofile: bool = False) -> None:
+    """
+    Initialize a pool worker: register the configured Hamiltonian and ansatz, share the best cost and configure profiling.
+
+    The registries are filled again in every worker, since workers only inherit them
+    from the parent under the fork start method.
+
+    Args:
+        config: The job's config.
+        shared_best: The shared best cost (see convergence.init_shared_best).
+        profile_dir: The directory of the trace files, or None to disable profiling.
+        cprofile: Also run cProfile in the worker.
+
+    Returns:
+        None
+    """
+    configure_hamiltonian(config)
+    init_shared_best(shared_best)
+    profiling.configure(profile_dir, cprofile)
+
+def main(config: Dict[str, Any], profile: Optional[str] = None, resume: bool = False) -> None:
     """
     Main function to execute the quantum VQE optimization project.
 
     Args:
         config: A dictionary containing configuration parameters.
+        profile: None, 'trace' to record per-step phase timings and circuit executions of
+            every run to ``results_dir/profile`` (trace.json, trace.csv, summary.json), or
+            'cprofile' to additionally merge cProfile statistics of all processes into
+            ``profile.pstats``.
+        resume: Continue the job recorded in ``results_dir/manifest.json``: completed starts
+            are read from their checkpoints, the others continue where they left off.
 
     Returns:
         None
@@ -66,25 +205,144 @@ def main(config: Dict[str, Any]) -> None:
         parallel_processes = config.get('parallel_processes', multiprocessing.cpu_count())
         logging.info(f"Using {parallel_processes} parallel processes.")
 
+        # Профилирование: каждый процесс пишет свой файл трассировки, объединяем в конце
+        profile_dir = os.path.join(config['results_dir'], 'profile') if profile else None
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+            profiling.clear(profile_dir)
+        profiling.configure(profile_dir, profile == 'cprofile')
+
+        # Гамильтониан и анзац из конфигурации (по умолчанию измеряется PauliZ(0))
+        circuit_type, hamiltonian = configure_hamiltonian(config)
+
         # Загрузка состояния, если указан путь
+        manifest = None
+        store = store_from_config(config)
+        save_path = config['optimization'].get('save_path') or None
         if config['optimization']['load_path']:
-            initial_params, cost_history = load_state(config['optimization']['load_path'])
+            initial_params, cost_history = load_state(config['optimization']['load_path'], config['optimization'].get('load_run_id'))
             logging.info("Continuing optimization from loaded state.")
             params_list = [initial_params]
+            run_ids = None
         else:
-            params_list = [np.random.random(2) for _ in range(parallel_processes)]
-            logging.info(f"Initialized {parallel_processes} sets of random initial parameters.")
+            # Манифест задания: сид, контрольная точка и статус каждого запуска
+            manifest_path = os.path.join(config['results_dir'], 'manifest.json')
+            if resume and os.path.exists(manifest_path):
+                manifest = JobManifest.load(manifest_path, config)
+                logging.info(f"Resuming job from {manifest_path}: {len(manifest.runs) - len(manifest.incomplete())} of {len(manifest.runs)} starts already completed.")
+            else:
+                starts = config['optimization'].get('starts')
+                starts = parallel_processes if starts is None else starts
+                save_path = save_path or os.path.join(config['results_dir'], 'state.ckpt')
+                initial_params, source = None, 'random'
+                if store is not None:
+                    # Начальные точки из лучших ранее найденных решений; остальные запуски случайные
+                    warm_start = config['warm_start']
+                    initial_params = warm_starts(store, circuit_type, hamiltonian, starts - warm_start.get('random_starts', 0), warm_start.get('spread', 0.05), warm_start.get('min_distance', 1e-2), config['optimization'].get('seed'))
+                    source = 'warm-started' if initial_params is not None else source
+                landscape = config.get('landscape', {})
+                if initial_params is None and landscape.get('enabled', False):
+                    # Начальные точки из бассейнов с наименьшей стоимостью
+                    initial_params = seed_starts(landscape_from_config(config, circuit_type, hamiltonian), starts, landscape.get('min_distance'), landscape.get('spread', 0.05), config['optimization'].get('seed'))
+                    source = 'landscape-seeded'
+                manifest = JobManifest.create(manifest_path, config, starts, save_path, config['optimization'].get('seed'), initial_params)
+                logging.info(f"Initialized {starts} sets of {source} initial parameters.")
+            first_run = next(iter(manifest.runs.values()), None)
+            if first_run is None:
+                raise ValueError(f"The job in {manifest_path} has no starts")
+            save_path = first_run['checkpoint']
+            run_ids = manifest.incomplete()
+            params_list = [manifest.initial_params(run_id, num_params(circuit_type)) for run_id in run_ids]
         
-        # Параллельная оптимизация
-        results = parallel_optimize_vqe(
-            params_list,
-            steps=config['optimization']['steps'],
-            stepsize=config['optimization']['stepsize'],
-            circuit_type=config['optimization']['circuit']
-        )
-
-        # Параллельный анализ результатов
-        parallel_analyze_results(results, config['results_dir'])
+        # Общий пул процессов для оптимизации и анализа; лучшая стоимость общая для всех процессов
+        chunksize = config.get('chunksize', 1)
+        artifacts = config.get('analysis', {}).get('artifacts', 'full')
+        convergence = config['optimization'].get('convergence')
+        if config.get('distributed', {}).get('enabled', False):
+            # Распределенный режим: задачи раздает координатор работникам на любых хостах
+            pool = coordinator_from_config(config, (profile_dir, profile == 'cprofile'))
+        else:
+            shared_best = multiprocessing.Value('d', float('inf'))
+            pool = WorkerPool(processes=parallel_processes, initializer=init_worker, initargs=(config, shared_best, profile_dir, profile == 'cprofile'))
+        with pool:
+            if not params_list:
+                results = []
+            elif config['optimization'].get('batched', False):
+                if (config['optimization'].get('shots') or {}).get('enabled', False):
+                    raise ValueError("Finite-shot mode is not supported by the batched engine")
+                results = batched_optimize_vqe(
+                    params_list,
+                    steps=config['optimization']['steps'],
+                    stepsize=config['optimization']['stepsize'],
+                    circuit_type=circuit_type,
+                    convergence=convergence,
+                    hamiltonian=hamiltonian
+                )
+                if manifest is not None:
+                    for run_id, (params, cost_history) in zip(run_ids, results):
+                        save_state(params, cost_history, save_path, manifest.checkpoint_id(run_id))
+                        manifest.runs[run_id]['attempts'] += 1
+                        manifest.record_result(run_id, cost_history)
+                parallel_analyze_results(results, config['results_dir'], pool=pool, chunksize=chunksize, artifacts=artifacts, run_ids=run_ids)
+            else:
+                results = optimize_and_analyze(
+                    pool,
+                    params_list,
+                    steps=config['optimization']['steps'],
+                    stepsize=config['optimization']['stepsize'],
+                    circuit_type=circuit_type,
+                    results_dir=config['results_dir'],
+                    gradient_method=config['optimization'].get('gradient_method', 'best'),
+                    chunksize=chunksize,
+                    convergence=convergence,
+                    save_path=save_path,
+                    artifacts=artifacts,
+                    hamiltonian=hamiltonian,
+                    backend=config['optimization'].get('backend', 'default.qubit'),
+                    cache=config['optimization'].get('cache'),
+                    optimizer=config['optimization'].get('optimizer'),
+                    checkpoint=config['optimization'].get('checkpoint'),
+                    shots=config['optimization'].get('shots'),
+                    run_ids=run_ids,
+                    manifest=manifest,
+                    retries=config['optimization'].get('retries', 0),
+                    time_budget=config['optimization'].get('time_budget')
+                )
+
+        # Запуски, завершенные до возобновления, читаются из контрольных точек
+        if manifest is not None:
+            computed = dict(zip(run_ids, results))
+            run_ids = list(manifest.runs)
+            results = [computed[run_id] if run_id in computed else manifest.load_result(run_id) for run_id in run_ids]
+        else:
+            run_ids = [f"start_{index}" for index in range(len(results))]
+
+        # Решения сохраняются для теплого старта следующих заданий
+        if store is not None:
+            added = store.record(circuit_type, hamiltonian, results, config_hash(config), run_ids)
+            logging.info(f"Stored {added} new or improved solutions in {store.path} ({len(store)} in total).")
+            store.close()
+
+        # Все истории стоимости одним файлом, записанным из родительского процесса
+        os.makedirs(config['results_dir'], exist_ok=True)
+        write_results_store(results, os.path.join(config['results_dir'], 'results.npz'), run_ids, metadata=config['optimization'])
+
+        # Сводная статистика по всем запускам за один векторизованный проход
+        summary = analyze_batch(results, run_ids=run_ids)
+        summary_path = os.path.join(config['results_dir'], 'summary.csv')
+        summary.drop(columns=['Moving Average']).to_csv(summary_path)
+        best = summary['Final Cost'].idxmin()
+        logging.info(f"Best run {best}: final cost {summary.loc[best, 'Final Cost']:.4f}, median final cost {summary['Final Cost'].median():.4f}. Summary saved at {summary_path}")
+
+        # Общий отчет по всем запускам фиксированного размера
+        if 'report' in ARTIFACTS[artifacts]:
+            build_multi_run_report(results, config['results_dir'], run_ids)
+
+        if profile_dir:
+            profiling.flush()
+            totals = profiling.collect(profile_dir)['totals']
+            phases = ", ".join(f"{name} {totals[name]:.2f} s" for name in profiling.PHASES)
+            logging.info(f"Profile: {totals['wall']:.2f} s of run time ({phases}), {totals['executions']} circuit executions. Trace saved at {profile_dir}")
         logging.info("Main function completed successfully.")
     
     except Exception as e:
@@ -94,12 +352,14 @@ def main(config: Dict[str, Any]) -> None:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Quantum VQE Project')
     parser.add_argument('--config', type=str, default='config.yaml', help='Path to the configuration file')
+    parser.add_argument('--resume', action='store_true', help='Resume the job recorded in results_dir/manifest.json, skipping completed starts')
+    parser.add_argument('--profile', nargs='?', const='trace', choices=['trace', 'cprofile'], help='Record per-step timings and circuit executions to results_dir/profile (cprofile: also cProfile statistics)')
 
     args = parser.parse_args()
     
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
     
     with open(args.config, 'r', encoding='utf-8') as file:  # Добавлено указание кодировки
         config = yaml.safe_load(file)
     
-    main(config)
+    main(config, args.profile, args.resume)
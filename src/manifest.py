@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import hashlib
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from convergence import CostHistory
+from optimization import load_state
+
+STATUSES = ('pending', 'running', 'completed', 'failed')
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """
+    Hash the parts of the config that determine the results of a job.
+
+    The results directory, the worker count, checkpoint writing and the retry and time
+    budget settings are left out, so a job can be resumed elsewhere, with a different
+    number of processes or with a larger budget for the remaining starts.
+    """
+    optimization = {key: value for key, value in config.get('optimization', {}).items() if key not in ('load_path', 'load_run_id', 'checkpoint', 'retries', 'time_budget')}
+    content = {'optimization': optimization, 'hamiltonian': config.get('hamiltonian')}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+class JobManifest:
+    """
+    The record of a multi-start job: per start its seed, checkpoint location, status,
+    attempts and outcome.
+
+    Only the parent process changes the manifest, and every change rewrites the file
+    through a temporary file and an atomic rename, so after a crash the file always
+    describes which starts completed and where the others left off.
+    """
+
+    def __init__(self, path: str, config_hash: str, runs: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Args:
+            path: The path of the manifest file.
+            config_hash: The config_hash of the job's config.
+            runs: Maps run id to the run's record.
+        """
+        self.path = os.path.abspath(path)
+        self.config_hash = config_hash
+        self.runs = runs
+
+    @classmethod
+    def create(cls, path: str, config: Dict[str, Any], starts: int, checkpoint: str, seed: Optional[int] = None, initial_params: Optional[Sequence[np.ndarray]] = None) -> 'JobManifest':
+        """
+        Create and save the manifest of a new job.
+
+        Args:
+            path: The path of the manifest file.
+            config: The job's config.
+            starts: The number of starts.
+            checkpoint: The checkpoint file shared by the starts. Every start is stored under
+                its run id with a suffix unique to this job (see ``checkpoint_id``), so a
+                start never resumes from a checkpoint an earlier job wrote to the same file.
+            seed: The seed of the first start; start ``i`` uses ``seed + i``. Drawn at random if None.
+            initial_params: Explicit initial parameters per start (e.g. seeded from a
+                landscape scan), recorded instead of being drawn from the seeds.
+
+        Returns:
+            The JobManifest.
+
+        Raises:
+            ValueError: If ``starts`` is below 1, or if a JSON checkpoint, which holds a single
+                run, is shared by several starts.
+        """
+        if starts < 1:
+            raise ValueError(f"The number of starts must be at least 1, got {starts}")
+        if starts > 1 and checkpoint.endswith('.json'):
+            raise ValueError(f"A JSON checkpoint holds a single run; set save_path to a binary checkpoint (e.g. results/state.ckpt) for {starts} starts")
+        if seed is None:
+            seed = int(np.random.SeedSequence().generate_state(1)[0])
+        job = os.urandom(4).hex()
+        runs = {
+            f"start_{index}": {'seed': seed + index, 'checkpoint': os.path.abspath(checkpoint), 'checkpoint_id': f"start_{index}-{job}", 'status': 'pending', 'attempts': 0}
+            for index in range(starts)
+        }
+        if initial_params is not None:
+            for run, params in zip(runs.values(), initial_params):
+                run['initial_params'] = np.asarray(params, dtype=float).tolist()
+        manifest = cls(path, config_hash(config), runs)
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, path: str, config: Optional[Dict[str, Any]] = None) -> 'JobManifest':
+        """
+        Load a manifest.
+
+        Args:
+            path: The path of the manifest file.
+            config: If given, the config the job is resumed with.
+
+        Returns:
+            The JobManifest.
+
+        Raises:
+            ValueError: If ``config`` differs from the job's config.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if config is not None and config_hash(config) != data['config_hash']:
+            raise ValueError(f"The configuration differs from the one of the job in {path}; start a new job instead of resuming")
+        return cls(path, data['config_hash'], data['runs'])
+
+    def save(self) -> None:
+        """
+        Write the manifest atomically.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'config_hash': self.config_hash, 'updated': time.strftime('%Y-%m-%dT%H:%M:%S'), 'runs': self.runs}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def update(self, run_ids: List[str], **fields: Any) -> None:
+        """
+        Update the records of some runs and save the manifest.
+
+        Args:
+            run_ids: The ids of the runs.
+            fields: The fields to set; ``status`` must be one of STATUSES.
+
+        Raises:
+            ValueError: If the status is unknown.
+        """
+        if fields.get('status', 'pending') not in STATUSES:
+            raise ValueError(f"Unknown run status: {fields['status']}")
+        for run_id in run_ids:
+            self.runs[run_id].update(fields)
+        self.save()
+
+    def record_result(self, run_id: str, cost_history: CostHistory) -> None:
+        """
+        Mark a run as completed and store its outcome.
+        """
+        self.update(
+            [run_id],
+            status='completed',
+            steps=len(cost_history),
+            final_cost=float(cost_history[-1]),
+            stop_reason=cost_history.stop_reason,
+            stop_step=cost_history.stop_step,
+            evaluations=int(cost_history.evaluations),
+            gradient_evaluations=int(cost_history.gradient_evaluations),
+            shots=int(getattr(cost_history, 'shots', 0)),
+            error=None,
+        )
+
+    def incomplete(self) -> List[str]:
+        """
+        Return the ids of the runs that have not completed.
+        """
+        return [run_id for run_id, run in self.runs.items() if run['status'] != 'completed']
+
+    def started(self, run_id: str) -> bool:
+        """
+        Return whether a run was started by this job, i.e. whether its checkpoint belongs to it.
+        """
+        return self.runs[run_id]['attempts'] > 0
+
+    def checkpoint_id(self, run_id: str) -> str:
+        """
+        Return the key of a run inside the checkpoint file (the run id in manifests written before job-unique keys).
+        """
+        return self.runs[run_id].get('checkpoint_id', run_id)
+
+    def initial_params(self, run_id: str, n_params: int) -> np.ndarray:
+        """
+        Return the initial parameters of a run: the recorded ones, or random ones reproduced from its seed.
+        """
+        if 'initial_params' in self.runs[run_id]:
+            return np.array(self.runs[run_id]['initial_params'])
+        return np.random.default_rng(self.runs[run_id]['seed']).random(n_params)
+
+    def load_result(self, run_id: str) -> Tuple[np.ndarray, CostHistory]:
+        """
+        Load the final parameters and cost history of a completed run from its checkpoint.
+
+        Returns:
+            A tuple of the parameters and the CostHistory with the recorded stop reason, evaluation counts and shots.
+        """
+        run = self.runs[run_id]
+        params, history = load_state(run['checkpoint'], self.checkpoint_id(run_id))
+        return params, CostHistory(history, stop_reason=run['stop_reason'], stop_step=run['stop_step'], evaluations=run['evaluations'], gradient_evaluations=run['gradient_evaluations'], shots=run.get('shots', 0))
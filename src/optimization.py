@@ -1,93 +1,331 @@
 import pennylane as qml
 from pennylane import numpy as np
-from circuits import create_vqe_circuit
+from circuits import get_vqe_qnode
+from hamiltonian import get_energy_fn, get_group_qnodes
+from statevector import NATIVE_BACKEND, compile_circuit
+from cost_cache import CostCache, circuit_fingerprint
+from optimizers import SCIPY_METHODS, SPSAOptimizer, CountingObjective, get_optimizer, minimize_scipy, optimizer_step, parse_optimizer, scipy_options
+from convergence import ConvergenceMonitor, CostHistory, report_cost
+from checkpoint import CheckpointStore
+from checkpoint_writer import flush_writer, get_writer
+from quantum_metrics import StatsAccumulator
+from rolling import RollingStats
+from shots import ShotObjective
+import profiling
 import logging
 import json
+import time
 import os
-from typing import List, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-def cost_fn(params: Union[List[float], np.ndarray], circuit_type: str) -> float:
+_STORES: Dict[str, CheckpointStore] = {}
+
+def get_cost_function(circuit_type: str, gradient_method: str = 'best', hamiltonian: Optional[str] = None, backend: str = 'default.qubit'):
+    """
+    Return the differentiable cost of a circuit: <PauliZ(0)> or the energy of a registered Hamiltonian.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+        gradient_method: The differentiation method used when the cost is differentiated.
+        hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+        backend: A PennyLane device name, or 'numpy' for the native statevector simulator,
+            which always uses adjoint gradients and ignores ``gradient_method``.
+
+    Returns:
+        A callable taking the circuit parameters and returning the cost.
+    """
+    if backend == NATIVE_BACKEND:
+        return compile_circuit(circuit_type, hamiltonian).cost
+    if hamiltonian is None:
+        return get_vqe_qnode(circuit_type, device=backend, gradient_method=gradient_method)
+    return get_energy_fn(circuit_type, hamiltonian, gradient_method, device=backend)
+
+def get_cost_devices(circuit_type: str, gradient_method: str = 'best', hamiltonian: Optional[str] = None, backend: str = 'default.qubit') -> List[qml.Device]:
+    """
+    Return the PennyLane devices that execute the circuits of get_cost_function.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+        gradient_method: The differentiation method used when the cost is differentiated.
+        hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+        backend: A PennyLane device name, or 'numpy' for the native statevector simulator.
+
+    Returns:
+        The distinct devices (backprop QNodes each run on their own), or an empty list for the native backend.
+    """
+    if backend == NATIVE_BACKEND:
+        return []
+    if hamiltonian is None:
+        return [get_vqe_qnode(circuit_type, device=backend, gradient_method=gradient_method).device]
+    qnodes = get_group_qnodes(circuit_type, hamiltonian, backend, gradient_method)
+    return list({id(qnode.device): qnode.device for qnode, _ in qnodes}.values())
+
+def cost_fn(params: Union[List[float], np.ndarray], circuit_type: str, gradient_method: str = 'best', hamiltonian: Optional[str] = None, backend: str = 'default.qubit', cache: Optional[Dict[str, Any]] = None) -> float:
     """
     Calculate the cost function for the given parameters and circuit type.
 
     Args:
         params: A list or NumPy array of float numbers representing the parameters for the quantum circuit.
         circuit_type: A string indicating the type of the circuit.
+        gradient_method: The differentiation method used when the cost is differentiated.
+        hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+        backend: A PennyLane device name, or 'numpy' for the native statevector simulator.
+        cache: The ``optimization.cache`` config section, or None to always evaluate the circuit.
 
     Returns:
         The calculated cost as a float.
     """
-    circuit = create_vqe_circuit(params, circuit_type)
-    return circuit()
+    cost_cache = CostCache.from_config(cache)
+    if cost_cache is not None:
+        key = cost_cache.key(params, circuit_fingerprint(circuit_type, hamiltonian), backend, gradient_method)
+        cached = cost_cache.get(key)
+        if cached is not None:
+            return cached[0]
+    circuit = get_cost_function(circuit_type, gradient_method, hamiltonian, backend)
+    cost = circuit(params)
+    if cost_cache is not None:
+        cost_cache.put(key, cost)
+    return cost
 
-def optimize_vqe(initial_params: Union[List[float], np.ndarray], steps: int = 100, stepsize: float = 0.1, circuit_type: str = 'default', save_path: str = None) -> Tuple[np.ndarray, List[float]]:
+def optimize_vqe(initial_params: Union[List[float], np.ndarray], steps: int = 100, stepsize: float = 0.1, circuit_type: str = 'default', save_path: str = None, gradient_method: str = 'best', convergence: Optional[Dict[str, Any]] = None, run_id: str = '0', hamiltonian: Optional[str] = None, backend: str = 'default.qubit', cache: Optional[Dict[str, Any]] = None, optimizer: Union[str, Dict[str, Any], None] = None, checkpoint: Optional[Dict[str, Any]] = None, shots: Optional[Dict[str, Any]] = None, time_budget: Optional[float] = None, checkpoint_id: Optional[str] = None, resume: bool = False) -> Tuple[np.ndarray, List[float]]:
     """
-    Optimize the VQE circuit parameters using gradient descent.
+    Optimize the VQE circuit parameters.
 
     Args:
         initial_params: A list or NumPy array of float numbers representing the initial parameters for the quantum circuit.
-        steps: An integer representing the number of optimization steps.
-        stepsize: A float representing the step size for the gradient descent optimizer.
+        steps: An integer representing the number of optimization steps (iterations for scipy methods).
+        stepsize: A float representing the step size of the optimizer (the initial gain for SPSA; unused by scipy methods).
         circuit_type: A string indicating the type of the circuit.
         save_path: A string representing the path to save the optimization state.
+        gradient_method: The differentiation method ('best', 'backprop', 'adjoint', 'parameter-shift' or 'finite-diff').
+        convergence: Early-stopping criteria (the ``optimization.convergence`` config section), or None to always run all steps.
+        run_id: The id of this run inside the checkpoint file.
+        hamiltonian: The name of a registered Hamiltonian whose energy is minimized, or None to minimize <PauliZ(0)>.
+        backend: A PennyLane device name, or 'numpy' for the native statevector simulator.
+        cache: The ``optimization.cache`` config section. When enabled, the cost and gradient
+            of every step are memoized on the quantized parameters and reused by later
+            steps, runs and (with a sqlite ``path``) other workers and invocations. Only
+            optimizers using exact gradients are cached.
+        optimizer: The ``optimization.optimizer`` config value: 'gradient_descent', 'momentum',
+            'adam', 'spsa', 'l-bfgs-b' or 'cobyla', or a dictionary with a ``name`` key and
+            the optimizer's options. Defaults to gradient descent.
+        checkpoint: The ``optimization.checkpoint`` config section: ``every`` (steps between
+            checkpoints, default 10), ``background`` (hand checkpoints to a background writer
+            thread that coalesces them, default True) and ``interval`` (minimum seconds
+            between background writes, default 1.0). The final state is checkpointed and
+            written before optimize_vqe returns.
+        shots: The ``optimization.shots`` config section. When enabled, the cost and its
+            parameter-shift gradient are estimated from sampled measurement outcomes with
+            an adaptive number of shots (see shots.ShotObjective) instead of analytically,
+            and neither the cost cache nor the convergence criteria comparing single
+            estimates (``abs_tol``, ``rel_tol``, ``grad_tol``) are used.
+        time_budget: Stop with reason 'time_budget' once the run has taken this many seconds.
+        checkpoint_id: The key of this run inside the checkpoint file. Defaults to ``run_id``;
+            job manifests make it unique to the job, so runs of different jobs sharing
+            ``save_path`` never read each other's checkpoints.
+        resume: Continue from the run's checkpoint in ``save_path`` if it has one, running
+            only the remaining steps and keeping the stored cost history.
 
     Returns:
-        A tuple containing the optimized parameters and the cost history.
+        A tuple containing the optimized parameters and the cost history. The history is a
+        CostHistory whose ``stop_reason`` and ``stop_step`` record why and when the run ended
+        and whose ``evaluations`` and ``gradient_evaluations`` count the cost function calls
+        and ``shots`` the measurement shots they consumed.
     """
+    started = time.perf_counter()
     params = np.array(initial_params, requires_grad=True)
-    opt = qml.GradientDescentOptimizer(stepsize=stepsize)
-    cost_history = []
+    history = []
+    checkpoint_id = checkpoint_id or run_id
+    if resume and save_path:
+        try:
+            params, history = load_state(save_path, checkpoint_id)
+            params = np.array(params, requires_grad=True)
+            logging.info(f"Resuming run {run_id} at step {len(history)}.")
+        except (FileNotFoundError, KeyError):
+            logging.info(f"No checkpoint of run {run_id} in {save_path}, starting from the initial parameters.")
+    first = len(history)
+    name, options = parse_optimizer(optimizer)
+    profiling.start(run_id)
+    with profiling.phase('construction'):
+        sampler = ShotObjective.from_config(shots, circuit_type, hamiltonian, run_id)
+        objective = sampler or CountingObjective(get_cost_function(circuit_type, gradient_method, hamiltonian, backend))
+    profiling.mark(run_id)
+    executions = profiling.ExecutionCounter(get_cost_devices(circuit_type, gradient_method, hamiltonian, backend) if profiling.enabled() and sampler is None else [], lambda: objective.evaluations)
+    if sampler is not None and convergence:
+        # Отдельные оценки с шумом выборки: сравнивать можно только скользящее среднее
+        convergence = dict(convergence, abs_tol=None, rel_tol=None, grad_tol=None)
+    if name in SCIPY_METHODS and convergence:
+        # Итерации scipy могут повторяться: пороги изменения стоимости передаются самому методу
+        options = scipy_options(name, convergence, options)
+        convergence = dict(convergence, abs_tol=None, rel_tol=None, grad_tol=None)
+    monitor = ConvergenceMonitor.from_config(convergence)
+    cost_history = CostHistory(history, stop_reason='max_steps', stop_step=steps)
+    statistics = StatsAccumulator()
+    recent = RollingStats((convergence or {}).get('window', 10))
+    for cost in history:
+        statistics.update(cost)
+        recent.push(cost)
+    checkpoint = checkpoint or {}
+    saved_steps = first
+    every = checkpoint.get('every', 10)
+    writer = get_writer(_write_state, checkpoint.get('interval', 1.0)) if save_path and checkpoint.get('background', True) else None
 
-    logging.info("Starting optimization...")
-    for i in range(steps):
-        params, cost = opt.step_and_cost(lambda p: cost_fn(p, circuit_type), params)
+    def save(params: np.ndarray) -> None:
+        nonlocal saved_steps
+        saved_steps = len(cost_history)
+        if writer is not None:
+            with profiling.phase('checkpoint'):
+                writer.submit(params, cost_history, save_path, checkpoint_id)
+        else:
+            save_state(params, cost_history, save_path, checkpoint_id)
+
+    def record(i: int, params: np.ndarray, cost: float, grad: Optional[np.ndarray]) -> bool:
+        stop = False
         cost_history.append(cost)
+        statistics.update(cost)
+        recent.push(cost)
+        if sampler is not None and grad is not None:
+            sampler.adapt(grad)
         if (i + 1) % 10 == 0:
-            logging.info(f"Step {i+1}, Cost: {cost:.4f}")
-            if save_path:
-                save_state(params, cost_history, save_path)
-    
-    logging.info("Optimization finished.")
+            logging.info(f"Step {i+1}, Cost: {cost:.4f}, Mean: {statistics.mean:.4f}, Std: {statistics.std:.4f}, Median: {statistics.quantile(0.5):.4f}, Window mean: {recent.mean:.4f}, Window min: {recent.min:.4f}" + (f", Shots: {sampler.shots_per_evaluation}/evaluation" if sampler is not None else ""))
+        if save_path and (i + 1) % every == 0:
+            save(params)
+        if monitor is not None:
+            reason = monitor.update(i, cost, None if grad is None else np.linalg.norm(grad), report_cost(float(cost)))[0]
+            if reason:
+                cost_history.stop_reason, cost_history.stop_step = reason, i + 1
+                logging.info(f"Stopping at step {i+1}: {reason}, Cost: {cost:.4f}")
+                stop = True
+        if not stop and time_budget is not None and time.perf_counter() - started > time_budget:
+            cost_history.stop_reason, cost_history.stop_step = 'time_budget', i + 1
+            logging.info(f"Stopping at step {i+1}: time budget of {time_budget} s used up, Cost: {cost:.4f}")
+            stop = True
+        profiling.mark(run_id, i, executions.take())
+        return stop
+
+    logging.info(f"Starting optimization with {name}...")
+    with executions:
+        if name in SCIPY_METHODS:
+            if first < steps:
+                params = minimize_scipy(objective, params, name, steps - first, lambda i, *args: record(first + i, *args), options)
+            if not cost_history:
+                record(0, params, float(objective(params)), None)
+            if cost_history.stop_reason == 'max_steps' and len(cost_history) < steps:
+                cost_history.stop_reason, cost_history.stop_step = 'converged', len(cost_history)
+        else:
+            opt = get_optimizer(name, stepsize, options)
+            cost_cache = CostCache.from_config(cache) if not isinstance(opt, SPSAOptimizer) and sampler is None else None
+            fingerprint = circuit_fingerprint(circuit_type, hamiltonian) if cost_cache is not None else None
+            for i in range(first, steps):
+                cached = None
+                if cost_cache is not None:
+                    key = cost_cache.key(params, fingerprint, backend, gradient_method)
+                    cached = cost_cache.get(key, need_grad=True)
+                if cached is not None:
+                    cost, grad = cached[0], np.array(cached[1].reshape(np.shape(params)))
+                    params = opt.apply_grad((grad,), (params,))[0]
+                elif sampler is not None and not isinstance(opt, SPSAOptimizer):
+                    # Градиент по правилу сдвига параметров из выборок
+                    cost, grad = sampler.value_and_grad(params)
+                    params = opt.apply_grad((grad,), (params,))[0]
+                else:
+                    params, cost, grad = optimizer_step(opt, objective, params)
+                    if cost_cache is not None:
+                        cost_cache.put(key, cost, grad)
+                if record(i, params, cost, grad):
+                    break
+            if cost_cache is not None:
+                logging.info(f"Cost cache (this process): {cost_cache.hits} hits ({cost_cache.disk_hits} from disk), {cost_cache.misses} misses.")
+
+    if save_path and saved_steps != len(cost_history):
+        save(params)
+    if writer is not None:
+        with profiling.phase('checkpoint'):
+            writer.flush()
+    profiling.mark(run_id)
+    cost_history.evaluations = objective.evaluations
+    cost_history.gradient_evaluations = objective.gradient_evaluations
+    cost_history.shots = sampler.shots if sampler is not None else 0
+    logging.info(f"Optimization finished after {len(cost_history)} steps, {objective.evaluations} cost and {objective.gradient_evaluations} gradient evaluations" + (f", {sampler.shots} shots." if sampler is not None else "."))
+    profiling.flush()
     return params, cost_history
 
-def save_state(params: np.ndarray, cost_history: List[float], save_path: str) -> None:
+def _get_store(path: str) -> CheckpointStore:
+    path = os.path.abspath(path)
+    if path not in _STORES:
+        _STORES[path] = CheckpointStore(path)
+    return _STORES[path]
+
+def save_state(params: np.ndarray, cost_history: List[float], save_path: str, run_id: str = '0') -> None:
     """
     Save the optimization state to a file.
 
+    Paths ending in ``.json`` use the legacy JSON format, which rewrites the whole state
+    through a temporary file and an atomic rename. Any other path is an append-only binary
+    checkpoint (see checkpoint.CheckpointStore) that only appends the costs recorded since
+    the previous save and can hold many runs.
+
     Args:
         params: A NumPy array of float numbers representing the optimized parameters for the quantum circuit.
         cost_history: A list of float numbers representing the cost history during optimization.
         save_path: A string representing the path to save the optimization state.
+        run_id: The id of the run inside a binary checkpoint file; a JSON file records it next to the state.
 
     Returns:
         None
     """
+    with profiling.phase('checkpoint'):
+        _write_state(params, cost_history, save_path, run_id)
+
+def _write_state(params: np.ndarray, cost_history: List[float], save_path: str, run_id: str = '0') -> None:
     save_path = os.path.abspath(save_path)
     save_dir = os.path.dirname(save_path)
     if not os.path.exists(save_dir):
         os.makedirs(save_dir)
-        
+
+    if not save_path.endswith('.json'):
+        _get_store(save_path).save(params, cost_history, run_id)
+        logging.info(f"State of run {run_id} saved to {save_path}")
+        return
+
     state = {
+        'run_id': run_id,
         'params': params.tolist(),
         'cost_history': [cost.item() if isinstance(cost, np.ndarray) else cost for cost in cost_history]
     }
-    with open(save_path, 'w') as f:
+    # Атомарная запись: читатель видит либо старое, либо новое состояние
+    temp_path = f"{save_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
         json.dump(state, f)
+    os.replace(temp_path, save_path)
     logging.info(f"State saved to {save_path}")
 
-def load_state(load_path: str) -> Tuple[np.ndarray, List[float]]:
+def load_state(load_path: str, run_id: Optional[str] = None, step: Optional[int] = None) -> Tuple[np.ndarray, List[float]]:
     """
     Load the optimization state from a file.
 
     Args:
         load_path: A string representing the path to load the optimization state.
+        run_id: The id of the run inside a binary checkpoint file. Defaults to the first run.
+            A JSON file holds one run; if it records a different run id, it is rejected.
+        step: Load the latest binary checkpoint taken at or before this step instead of the latest one.
 
     Returns:
         A tuple containing the loaded parameters and the cost history.
+
+    Raises:
+        KeyError: If the file holds no checkpoint of ``run_id``.
     """
     load_path = os.path.abspath(load_path)
+    flush_writer()
+    if not load_path.endswith('.json'):
+        params, cost_history = _get_store(load_path).load(run_id, step)
+        logging.info(f"State loaded from {load_path} at step {len(cost_history)}")
+        return np.array(params), cost_history.tolist()
     with open(load_path, 'r') as f:
         state = json.load(f)
+    if run_id is not None and state.get('run_id', run_id) != run_id:
+        raise KeyError(f"Run {run_id} not found in {load_path}")
     params = np.array(state['params'])
     cost_history = state['cost_history']
     logging.info(f"State loaded from {load_path}")
@@ -0,0 +1,261 @@
+import pennylane as qml
+from pennylane import numpy as np
+from scipy.optimize import minimize
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+import profiling
+
+class CountingObjective:
+    """
+    Wrap a cost function and count its evaluations.
+
+    Attributes:
+        evaluations: The number of cost evaluations, including the forward pass of every gradient.
+        gradient_evaluations: The number of analytic gradient evaluations.
+    """
+
+    def __init__(self, fn: Callable) -> None:
+        self.fn = fn
+        self.evaluations = 0
+        self.gradient_evaluations = 0
+
+    def __call__(self, params):
+        self.evaluations += 1
+        with profiling.phase('forward'):
+            return self.fn(params)
+
+    def value_and_grad(self, params) -> Tuple[float, np.ndarray]:
+        """
+        Return the cost and its gradient from one differentiated evaluation.
+        """
+        gradient = qml.grad(self)
+        with profiling.phase('gradient'):
+            grad = gradient(params)
+        self.gradient_evaluations += 1
+        return gradient.forward, grad
+
+class SPSAOptimizer:
+    """
+    Simultaneous perturbation stochastic approximation.
+
+    Every step estimates the gradient from two cost evaluations along a random ±1
+    direction, independent of the number of parameters. The gains decay as
+    ``a_k = stepsize / (k + 1 + A) ** alpha`` and ``c_k = c / (k + 1) ** gamma``.
+    """
+
+    def __init__(self, stepsize: float = 0.1, c: float = 0.1, alpha: float = 0.602, gamma: float = 0.101, A: float = 0.0, seed: Optional[int] = None) -> None:
+        """
+        Args:
+            stepsize: The initial gain ``a``.
+            c: The initial perturbation size.
+            alpha: The decay exponent of the gain.
+            gamma: The decay exponent of the perturbation.
+            A: The stability constant of the gain.
+            seed: The seed of the perturbation directions.
+        """
+        self.stepsize = stepsize
+        self.c = c
+        self.alpha = alpha
+        self.gamma = gamma
+        self.A = A
+        self.k = 0
+        self.rng = np.random.default_rng(seed)
+
+    def compute_grad(self, objective_fn: Callable, args: Tuple, kwargs: Dict) -> Tuple[Tuple[np.ndarray], float]:
+        """
+        Estimate the gradient at ``args[0]``.
+
+        Returns:
+            A tuple of the one-element gradient tuple and the mean of the two evaluations,
+            which estimates the cost at ``args[0]``.
+        """
+        params = np.array(args[0], requires_grad=False)
+        ck = self.c / (self.k + 1) ** self.gamma
+        delta = self.rng.choice([-1.0, 1.0], size=params.shape)
+        plus = float(objective_fn(params + ck * delta, **kwargs))
+        minus = float(objective_fn(params - ck * delta, **kwargs))
+        return ((plus - minus) / (2 * ck) * delta,), (plus + minus) / 2
+
+    def apply_grad(self, grad: Tuple[np.ndarray], args: Tuple) -> Tuple[np.ndarray]:
+        ak = self.stepsize / (self.k + 1 + self.A) ** self.alpha
+        self.k += 1
+        return (np.array(args[0] - ak * grad[0], requires_grad=True),)
+
+OPTIMIZERS: Dict[str, Callable] = {
+    'gradient_descent': qml.GradientDescentOptimizer,
+    'momentum': qml.MomentumOptimizer,
+    'adam': qml.AdamOptimizer,
+    'spsa': SPSAOptimizer,
+}
+
+SCIPY_METHODS = {'l-bfgs-b': 'L-BFGS-B', 'cobyla': 'COBYLA'}
+
+def register_optimizer(name: str, factory: Callable) -> None:
+    """
+    Register a step-based optimizer.
+
+    Args:
+        name: A string naming the optimizer.
+        factory: A callable taking ``stepsize`` and the optimizer options and returning an
+            object with PennyLane's ``compute_grad`` and ``apply_grad`` methods.
+
+    Returns:
+        None
+    """
+    OPTIMIZERS[name] = factory
+
+def parse_optimizer(optimizer: Union[str, Dict[str, Any], None]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Split the ``optimization.optimizer`` config value into a name and options.
+
+    Args:
+        optimizer: A name, a dictionary with a ``name`` key and optimizer options, or None for gradient descent.
+
+    Returns:
+        A tuple of the lower-case name and the options.
+
+    Raises:
+        ValueError: If the optimizer is unknown.
+    """
+    if optimizer is None:
+        return 'gradient_descent', {}
+    if isinstance(optimizer, str):
+        name, options = optimizer, {}
+    else:
+        options = dict(optimizer)
+        name = options.pop('name', 'gradient_descent')
+    name = name.lower()
+    if name not in OPTIMIZERS and name not in SCIPY_METHODS:
+        raise ValueError(f"Unknown optimizer: {name}")
+    return name, options
+
+def get_optimizer(name: str, stepsize: float, options: Optional[Dict[str, Any]] = None):
+    """
+    Create a step-based optimizer from the registry.
+
+    Args:
+        name: The registered name.
+        stepsize: The step size (the initial gain for SPSA).
+        options: Further keyword arguments of the optimizer.
+
+    Returns:
+        The optimizer.
+
+    Raises:
+        ValueError: If the optimizer is unknown.
+    """
+    if name not in OPTIMIZERS:
+        raise ValueError(f"Unknown optimizer: {name}")
+    return OPTIMIZERS[name](stepsize=stepsize, **(options or {}))
+
+def optimizer_step(opt, objective: CountingObjective, params) -> Tuple[np.ndarray, float, Optional[np.ndarray]]:
+    """
+    Take one step of a step-based optimizer.
+
+    Args:
+        opt: The optimizer.
+        objective: The counted cost function.
+        params: The current parameters.
+
+    Returns:
+        A tuple of the new parameters, the cost at ``params`` and the (estimated) gradient.
+    """
+    with profiling.phase('gradient'):
+        grad, cost = opt.compute_grad(objective, (params,), {})
+    if not isinstance(opt, SPSAOptimizer):
+        objective.gradient_evaluations += 1
+        if cost is None:
+            cost = objective(params)
+    return opt.apply_grad(grad, (params,))[0], cost, grad[0]
+
+class _Stop(Exception):
+    pass
+
+def scipy_options(name: str, convergence: Optional[Dict[str, Any]], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Translate the step-to-step convergence criteria into the tolerances of a scipy method.
+
+    Consecutive scipy iterates may repeat (COBYLA reports an unchanged point while it
+    shrinks its trust region), so ``abs_tol``, ``rel_tol`` and ``grad_tol`` cannot be
+    checked between iterations. L-BFGS-B receives them as ``ftol``, its cost reduction
+    relative to ``max(|cost|, 1)`` (from ``rel_tol``, else ``abs_tol``), and ``gtol``, its
+    largest projected gradient component (from ``grad_tol``). COBYLA has no cost
+    tolerance and keeps its trust-region criterion ``tol``. Explicit options take precedence.
+
+    Args:
+        name: 'l-bfgs-b' or 'cobyla'.
+        convergence: The ``optimization.convergence`` config section, or None.
+        options: The scipy options from the optimizer config.
+
+    Returns:
+        The scipy options.
+    """
+    convergence = convergence or {}
+    tolerances = {}
+    if SCIPY_METHODS[name] == 'L-BFGS-B':
+        ftol = convergence.get('rel_tol') or convergence.get('abs_tol')
+        if ftol is not None:
+            tolerances['ftol'] = ftol
+        if convergence.get('grad_tol') is not None:
+            tolerances['gtol'] = convergence['grad_tol']
+    return {**tolerances, **(options or {})}
+
+def minimize_scipy(objective: CountingObjective, params, name: str, steps: int, on_step: Callable, options: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """
+    Minimize with scipy.optimize.minimize, reporting every iteration like a step-based optimizer.
+
+    L-BFGS-B receives the cost and its analytic gradient from one evaluation; COBYLA only
+    evaluates the cost. To stop early, L-BFGS-B, whose iterations run in Python, is
+    interrupted from the callback; COBYLA, whose callback is called from Fortran, is
+    handed NaN for its next cost, which ends its run without further evaluations.
+
+    Args:
+        objective: The counted cost function.
+        params: The initial parameters.
+        name: 'l-bfgs-b' or 'cobyla'.
+        steps: The maximum number of iterations.
+        on_step: Called as ``on_step(step, params, cost, grad)`` after every iteration with
+            the new iterate; returning True stops the minimization.
+        options: Further scipy options.
+
+    Returns:
+        The final parameters.
+    """
+    method = SCIPY_METHODS[name]
+    use_grad = method == 'L-BFGS-B'
+    shape = np.shape(params)
+    evaluated: Dict[bytes, Tuple[float, Optional[np.ndarray]]] = {}
+    state = {'step': 0, 'params': np.array(params, dtype=float).ravel(), 'stopped': False}
+
+    def evaluate(x: np.ndarray) -> Tuple[float, Optional[np.ndarray]]:
+        if state['stopped']:
+            return np.nan, None
+        x = np.asarray(x, dtype=float)
+        if x.tobytes() not in evaluated:
+            point = np.array(x.reshape(shape), requires_grad=use_grad)
+            if use_grad:
+                value, grad = objective.value_and_grad(point)
+                evaluated[x.tobytes()] = (float(value), np.asarray(grad, dtype=float).ravel())
+            else:
+                evaluated[x.tobytes()] = (float(objective(point)), None)
+        return evaluated[x.tobytes()]
+
+    def callback(x: np.ndarray) -> None:
+        # maxiter bounds the iterations; the callback only has to stop early
+        if state['step'] >= steps or state['stopped']:
+            return
+        value, grad = evaluate(x)
+        state['params'] = np.array(x, dtype=float)
+        stop = on_step(state['step'], np.array(x.reshape(shape), requires_grad=True), value, grad)
+        state['step'] += 1
+        if stop and use_grad:
+            raise _Stop
+        # Исключение не проходит через Fortran-код COBYLA: следующая стоимость NaN завершает его
+        state['stopped'] = stop
+
+    fun = evaluate if use_grad else (lambda x: evaluate(x)[0])
+    try:
+        result = minimize(fun, state['params'], method=method, jac=use_grad or None, callback=callback, options={'maxiter': steps, **(options or {})})
+        final = state['params'] if state['stopped'] else result.x
+    except _Stop:
+        final = state['params']
+    return np.array(np.asarray(final).reshape(shape), requires_grad=True)
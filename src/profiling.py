@@ -0,0 +1,225 @@
+import os
+import csv
+import glob
+import inspect
+import functools
+import json
+import time
+import contextlib
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+PHASES = ('construction', 'forward', 'gradient', 'checkpoint', 'analysis')
+TRACE_FIELDS = ('pid', 'run_id', 'step', 'wall') + PHASES + ('other', 'executions')
+
+_settings: Optional[Dict[str, Any]] = None
+_records: List[Dict[str, Any]] = []
+_phases: Dict[str, float] = defaultdict(float)
+_stack: List[float] = []
+_marker = 0.0
+_cprofile = None
+
+def configure(profile_dir: Optional[str], cprofile: bool = False) -> None:
+    """
+    Enable (or, with ``profile_dir`` None, disable) profiling in this process.
+
+    Every process writes its own trace file to ``profile_dir``; collect() merges them. Also
+    used as the pool initializer part that turns profiling on in the workers.
+
+    Args:
+        profile_dir: The directory of the trace files, or None to disable profiling.
+        cprofile: Also run cProfile and dump its statistics next to the trace.
+    """
+    global _settings, _cprofile
+    _records.clear()
+    _phases.clear()
+    _stack.clear()
+    if _cprofile is not None:
+        _cprofile.disable()
+        _cprofile = None
+    _settings = None if profile_dir is None else {'dir': profile_dir, 'cprofile': cprofile}
+    if _settings is not None and cprofile:
+        import cProfile
+        _cprofile = cProfile.Profile()
+        _cprofile.enable()
+
+def enabled() -> bool:
+    return _settings is not None
+
+@contextlib.contextmanager
+def phase(name: str):
+    """
+    Attribute the time spent in the block to a phase of the current step.
+
+    Phases nest: time spent in an inner phase (e.g. the forward pass traced during a
+    gradient) is subtracted from the outer one, so every second is counted once.
+    Does nothing while profiling is disabled.
+    """
+    if _settings is None:
+        yield
+        return
+    start = time.perf_counter()
+    _stack.append(0.0)
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        children = _stack.pop()
+        _phases[name] += elapsed - children
+        if _stack:
+            _stack[-1] += elapsed
+
+def start(run_id: str) -> None:
+    """
+    Start timing a run; the next mark() measures from here.
+    """
+    global _marker
+    if _settings is None:
+        return
+    _phases.clear()
+    _marker = time.perf_counter()
+
+def mark(run_id: str, step: Optional[int] = None, executions: int = 0) -> None:
+    """
+    Record the wall time and phase times since the previous mark (or start) as one trace row.
+
+    Args:
+        run_id: The id of the run.
+        step: The zero-based optimizer step, or None for work outside the steps (construction, analysis).
+        executions: The circuit executions since the previous mark.
+    """
+    global _marker
+    if _settings is None:
+        return
+    now = time.perf_counter()
+    row = {'pid': os.getpid(), 'run_id': run_id, 'step': step, 'wall': now - _marker, 'executions': executions}
+    row.update({name: _phases.get(name, 0.0) for name in PHASES})
+    row['other'] = row['wall'] - sum(row[name] for name in PHASES)
+    _records.append(row)
+    _phases.clear()
+    _marker = now
+
+def flush() -> None:
+    """
+    Append this process's recorded rows (and cProfile statistics) to its files in the profile directory.
+    """
+    if _settings is None:
+        return
+    os.makedirs(_settings['dir'], exist_ok=True)
+    if _records:
+        with open(os.path.join(_settings['dir'], f"trace_{os.getpid()}.jsonl"), 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(row) + '\n' for row in _records))
+        _records.clear()
+    if _cprofile is not None:
+        _cprofile.dump_stats(os.path.join(_settings['dir'], f"cprofile_{os.getpid()}.pstats"))
+        _cprofile.enable()
+
+def clear(profile_dir: str) -> None:
+    """
+    Remove the per-process files of a previous profile.
+    """
+    for path in glob.glob(os.path.join(profile_dir, 'trace_*.jsonl')) + glob.glob(os.path.join(profile_dir, 'cprofile_*.pstats')):
+        os.remove(path)
+
+def collect(profile_dir: str) -> Dict[str, Any]:
+    """
+    Merge the per-process files into ``trace.json``, ``trace.csv``, ``summary.json`` and,
+    if cProfile ran, ``profile.pstats``.
+
+    Args:
+        profile_dir: The profile directory.
+
+    Returns:
+        The summary: total seconds per phase, executions, and per-run totals.
+    """
+    rows = []
+    for path in sorted(glob.glob(os.path.join(profile_dir, 'trace_*.jsonl'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows += [json.loads(line) for line in f if line.strip()]
+    with open(os.path.join(profile_dir, 'trace.json'), 'w', encoding='utf-8') as f:
+        json.dump(rows, f)
+    with open(os.path.join(profile_dir, 'trace.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=TRACE_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    runs: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        run = runs[row['run_id']]
+        for name in ('wall',) + PHASES + ('other', 'executions'):
+            run[name] += row[name]
+        run['steps'] += row['step'] is not None
+    summary = {
+        'processes': len({row['pid'] for row in rows}),
+        'totals': {name: sum(row[name] for row in rows) for name in ('wall',) + PHASES + ('other', 'executions')},
+        'runs': {run_id: dict(values) for run_id, values in sorted(runs.items())},
+    }
+    with open(os.path.join(profile_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=4)
+
+    stats_paths = sorted(glob.glob(os.path.join(profile_dir, 'cprofile_*.pstats')))
+    if stats_paths:
+        import pstats
+        stats = pstats.Stats(*stats_paths)
+        stats.dump_stats(os.path.join(profile_dir, 'profile.pstats'))
+    return summary
+
+def task(phase_name: str) -> Callable:
+    """
+    Decorate a pool task so that every call is recorded as one row of its ``run_id`` argument
+    in the given phase, and the process's trace is flushed afterwards.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _settings is None:
+                return func(*args, **kwargs)
+            run_id = signature.bind(*args, **kwargs).arguments.get('run_id')
+            start(run_id)
+            try:
+                with phase(phase_name):
+                    return func(*args, **kwargs)
+            finally:
+                mark(run_id)
+                flush()
+        return wrapper
+    return decorator
+
+class ExecutionCounter:
+    """
+    Count circuit executions with a ``qml.Tracker`` on each PennyLane device, or with a
+    fallback counter for simulators without one. Counts nothing while profiling is disabled.
+    """
+
+    def __init__(self, devices: Sequence[Any], fallback: Callable[[], int]) -> None:
+        """
+        Args:
+            devices: The devices executing the circuits.
+            fallback: Returns the running execution count when ``devices`` is empty.
+        """
+        self.devices = devices
+        self.fallback = fallback
+        self._trackers: List[Any] = []
+        self._stack = contextlib.ExitStack()
+        self._last = 0
+
+    def __enter__(self) -> 'ExecutionCounter':
+        if _settings is not None and self.devices:
+            import pennylane as qml
+            self._trackers = [self._stack.enter_context(qml.Tracker(device)) for device in self.devices]
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stack.close()
+
+    def take(self) -> int:
+        """
+        Return the executions since the previous call.
+        """
+        if _settings is None:
+            return 0
+        total = sum(tracker.totals.get('executions', 0) for tracker in self._trackers) if self._trackers else self.fallback()
+        executions, self._last = total - self._last, total
+        return executions
@@ -1,5 +1,250 @@
+import math
 import numpy as np
-from typing import List, Dict, Union
+from typing import List, Dict, Sequence, Union
+
+STATISTICS_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+class P2Quantile:
+    """
+    Streaming estimate of a single quantile with the P² algorithm (Jain & Chlamtac, 1985).
+
+    Keeps five markers regardless of how many values were observed; every update is O(1).
+    """
+
+    def __init__(self, p: float) -> None:
+        """
+        Args:
+            p: The quantile to estimate, between 0 and 1.
+        """
+        self.p = p
+        self._heights: List[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, value: float) -> None:
+        """
+        Add one observation.
+        """
+        q = self._heights
+        if len(q) < 5:
+            q.append(value)
+            q.sort()
+            return
+
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= q[k + 1]:
+                k += 1
+
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def value(self) -> float:
+        """
+        Return the current quantile estimate (exact while fewer than five values were seen).
+        """
+        if not self._heights:
+            return float('nan')
+        if len(self._heights) < 5 or self._positions[4] < 5:
+            return float(np.percentile(self._heights, self.p * 100))
+        return self._heights[2]
+
+class StatsAccumulator:
+    """
+    Incremental statistics of a stream of cost values.
+
+    Mean and variance use Welford's algorithm, quantiles use P² estimators, so every
+    update is O(1) and no values are retained. ``statistics`` and ``metrics`` return the
+    same keys as calculate_statistics and calculate_metrics.
+    """
+
+    def __init__(self, quantiles: Sequence[float] = STATISTICS_QUANTILES) -> None:
+        """
+        Args:
+            quantiles: The quantiles to estimate, between 0 and 1.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.last = float('nan')
+        self._abs_sum = 0.0
+        self._square_sum = 0.0
+        self._quantiles = {q: P2Quantile(q) for q in quantiles}
+
+    def update(self, value: Union[float, np.ndarray]) -> None:
+        """
+        Add one cost value.
+        """
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.last = value
+        self._abs_sum += abs(value)
+        self._square_sum += value * value
+        for estimator in self._quantiles.values():
+            estimator.update(value)
+
+    def extend(self, values: Sequence[Union[float, np.ndarray]]) -> None:
+        """
+        Add several cost values.
+        """
+        for value in values:
+            self.update(value)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / self.count if self.count else float('nan')
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance) if self.count else float('nan')
+
+    def quantile(self, q: float) -> float:
+        """
+        Return the estimate of one of the tracked quantiles.
+        """
+        return self._quantiles[q].value()
+
+    def statistics(self) -> Dict[str, float]:
+        """
+        Return the current statistics with the keys of calculate_statistics.
+        """
+        return _statistics_dict(self.mean, self.variance, self.min, self.max, [self.quantile(q) for q in STATISTICS_QUANTILES])
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Return the current metrics with the keys of calculate_metrics.
+        """
+        metrics = {
+            'MAE': self._abs_sum / self.count if self.count else float('nan'),
+            'MSE': self._square_sum / self.count if self.count else float('nan'),
+            'Final Cost': self.last
+        }
+        metrics.update(self.statistics())
+        return metrics
+
+def _statistics_dict(mean: float, variance: float, minimum: float, maximum: float, percentiles: Sequence[float]) -> Dict[str, float]:
+    p10, p25, p50, p75, p90 = percentiles
+    std = math.sqrt(variance)
+    return {
+        'Mean': mean,
+        'Median': p50,
+        'Standard Deviation': std,
+        'Variance': variance,
+        'Minimum': minimum,
+        'Maximum': maximum,
+        '10th Percentile': p10,
+        '25th Percentile': p25,
+        '75th Percentile': p75,
+        '90th Percentile': p90,
+        'Interquartile Range': p75 - p25,
+        'Coefficient of Variation': std / mean if mean != 0 else float('inf')
+    }
+
+def pad_histories(cost_histories: Sequence[Sequence[Union[float, np.ndarray]]]) -> np.ndarray:
+    """
+    Stack ragged cost histories into one (runs x steps) array padded with NaN.
+
+    Args:
+        cost_histories: One cost history per run.
+
+    Returns:
+        A float array whose row ``i`` holds run ``i`` followed by NaN padding.
+    """
+    lengths = [len(history) for history in cost_histories]
+    values = np.full((len(cost_histories), max(lengths, default=0)), np.nan)
+    for row, history in enumerate(cost_histories):
+        values[row, :len(history)] = np.asarray(history, dtype=float).ravel()
+    return values
+
+def _row_percentiles(values: np.ndarray, lengths: np.ndarray, percentiles: Sequence[float]) -> List[np.ndarray]:
+    """
+    Linear-interpolation percentiles of NaN-padded rows (same definition as np.percentile).
+
+    NaN sorts to the end of every row, so one sort serves all percentiles without the
+    per-row loop of np.nanpercentile.
+    """
+    ordered = np.sort(values, axis=1)
+    rows = np.arange(values.shape[0])
+    result = []
+    for percentile in percentiles:
+        position = percentile / 100 * (lengths - 1)
+        lower = np.floor(position).astype(int)
+        upper = np.ceil(position).astype(int)
+        low_values = ordered[rows, lower]
+        result.append(low_values + (position - lower) * (ordered[rows, upper] - low_values))
+    return result
+
+def calculate_metrics_batch(cost_histories: Union[np.ndarray, Sequence[Sequence[Union[float, np.ndarray]]]]) -> Dict[str, np.ndarray]:
+    """
+    Calculate the calculate_metrics values of many runs in one vectorized pass.
+
+    Args:
+        cost_histories: A (runs x steps) array padded with NaN after each run's last step,
+            or a list of (possibly ragged) cost histories.
+
+    Returns:
+        A dictionary mapping each metric name to an array with one value per run.
+    """
+    values = cost_histories if isinstance(cost_histories, np.ndarray) else pad_histories(cost_histories)
+    lengths = np.sum(~np.isnan(values), axis=1)
+    mean = np.nanmean(values, axis=1)
+    variance = np.nanmean(np.square(values - mean[:, None]), axis=1)
+    std = np.sqrt(variance)
+    p10, p25, p50, p75, p90 = _row_percentiles(values, lengths, [10, 25, 50, 75, 90])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coefficient_of_variation = np.where(mean != 0, std / mean, np.inf)
+    return {
+        'Steps': lengths,
+        'MAE': np.nanmean(np.abs(values), axis=1),
+        'MSE': np.nanmean(np.square(values), axis=1),
+        'Final Cost': values[np.arange(values.shape[0]), lengths - 1],
+        'Mean': mean,
+        'Median': p50,
+        'Standard Deviation': std,
+        'Variance': variance,
+        'Minimum': np.nanmin(values, axis=1),
+        'Maximum': np.nanmax(values, axis=1),
+        '10th Percentile': p10,
+        '25th Percentile': p25,
+        '75th Percentile': p75,
+        '90th Percentile': p90,
+        'Interquartile Range': p75 - p25,
+        'Coefficient of Variation': coefficient_of_variation
+    }
+
+def _as_array(cost_history: List[Union[float, np.ndarray]]) -> np.ndarray:
+    return np.asarray([float(cost) for cost in cost_history], dtype=float)
 
 def mean_absolute_error(cost_history: List[Union[float, np.ndarray]]) -> float:
     """
@@ -37,48 +282,41 @@ def final_cost(cost_history: List[Union[float, np.ndarray]]) -> float:
     """
     return cost_history[-1]
 
-def calculate_statistics(cost_history: List[Union[float, np.ndarray]]) -> Dict[str, float]:
+def calculate_statistics(cost_history: Union[List[Union[float, np.ndarray]], StatsAccumulator]) -> Dict[str, float]:
     """
     Calculate various statistical metrics for the cost history.
 
     Args:
-        cost_history: A list of cost values from the optimization process.
+        cost_history: A list of cost values from the optimization process, or a StatsAccumulator
+            that has already seen them.
 
     Returns:
         A dictionary of statistical metrics.
     """
-    cost_history = [cost.item() if isinstance(cost, np.ndarray) else cost for cost in cost_history]
-    
-    statistics = {
-        'Mean': np.mean(cost_history),
-        'Median': np.median(cost_history),
-        'Standard Deviation': np.std(cost_history),
-        'Variance': np.var(cost_history),
-        'Minimum': np.min(cost_history),
-        'Maximum': np.max(cost_history),
-        '10th Percentile': np.percentile(cost_history, 10),
-        '25th Percentile': np.percentile(cost_history, 25),
-        '75th Percentile': np.percentile(cost_history, 75),
-        '90th Percentile': np.percentile(cost_history, 90),
-        'Interquartile Range': np.percentile(cost_history, 75) - np.percentile(cost_history, 25),
-        'Coefficient of Variation': np.std(cost_history) / np.mean(cost_history) if np.mean(cost_history) != 0 else float('inf')
-    }
-    return statistics
+    if isinstance(cost_history, StatsAccumulator):
+        return cost_history.statistics()
+    values = _as_array(cost_history)
+    mean = values.mean()
+    return _statistics_dict(mean, np.mean(np.square(values - mean)), values.min(), values.max(), np.percentile(values, [10, 25, 50, 75, 90]))
 
-def calculate_metrics(cost_history: List[Union[float, np.ndarray]]) -> Dict[str, float]:
+def calculate_metrics(cost_history: Union[List[Union[float, np.ndarray]], StatsAccumulator]) -> Dict[str, float]:
     """
     Calculate various metrics, including mean absolute error, mean squared error, and other statistical metrics.
 
     Args:
-        cost_history: A list of cost values from the optimization process.
+        cost_history: A list of cost values from the optimization process, or a StatsAccumulator
+            that has already seen them.
 
     Returns:
         A dictionary of calculated metrics.
     """
+    if isinstance(cost_history, StatsAccumulator):
+        return cost_history.metrics()
+    values = _as_array(cost_history)
     metrics = {
-        'MAE': mean_absolute_error(cost_history),
-        'MSE': mean_squared_error(cost_history),
-        'Final Cost': final_cost(cost_history)
+        'MAE': mean_absolute_error(values),
+        'MSE': mean_squared_error(values),
+        'Final Cost': final_cost(values)
     }
-    metrics.update(calculate_statistics(cost_history))
+    metrics.update(calculate_statistics(values))
     return metrics
@@ -0,0 +1,205 @@
+import os
+import math
+import logging
+import argparse
+import yaml
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from circuits import num_params
+from optimization import optimize_vqe, save_state, load_state
+from worker_pool import WorkerPool
+
+def sample_trials(search: Dict[str, Any], n_trials: int, rng: np.random.Generator, start_id: int = 0) -> List[Dict[str, Any]]:
+    """
+    Draw random hyperparameter configurations from the search space.
+
+    Args:
+        search: The ``search`` config section.
+        n_trials: The number of configurations to draw.
+        rng: The random generator.
+        start_id: The id of the first trial.
+
+    Returns:
+        A list of trial dictionaries with an id, circuit, stepsize and initial parameters.
+    """
+    low, high = search.get('stepsize', [0.01, 0.5])
+    circuits = search.get('circuit', ['default', 'alternate'])
+    trials = []
+    for trial_id in range(start_id, start_id + n_trials):
+        circuit_type = circuits[rng.integers(len(circuits))]
+        trials.append({
+            'trial': trial_id,
+            'circuit': circuit_type,
+            'stepsize': float(np.exp(rng.uniform(np.log(low), np.log(high)))),
+            'initial_params': rng.random(num_params(circuit_type)).tolist(),
+        })
+    return trials
+
+def run_trial(trial: Dict[str, Any], budget: int, checkpoint_dir: str, convergence: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Advance one trial to a total of ``budget`` optimizer steps, resuming from its checkpoint.
+
+    Args:
+        trial: The trial dictionary.
+        budget: The total number of steps the trial should have run after this call.
+        checkpoint_dir: The directory of the checkpoint file shared by all trials.
+        convergence: Early-stopping criteria passed to optimize_vqe.
+
+    Returns:
+        The trial dictionary updated with the steps run, costs and stop reason.
+    """
+    checkpoint = os.path.join(checkpoint_dir, 'search.ckpt')
+    run_id = f"trial_{trial['trial']:04d}_{trial['circuit']}_{trial['stepsize']:.6g}"
+    try:
+        params, cost_history = load_state(checkpoint, run_id)
+    except (FileNotFoundError, KeyError):
+        params, cost_history = trial['initial_params'], []
+
+    steps_before = len(cost_history)
+    stop_reason = trial.get('stop_reason', 'max_steps')
+    if budget > steps_before and stop_reason == 'max_steps':
+        params, new_history = optimize_vqe(params, budget - steps_before, trial['stepsize'], trial['circuit'], convergence=convergence)
+        cost_history = list(cost_history) + [float(cost) for cost in new_history]
+        stop_reason = new_history.stop_reason
+        save_state(params, cost_history, checkpoint, run_id)
+
+    trial = dict(trial)
+    trial.update({
+        'steps': len(cost_history),
+        'steps_run': len(cost_history) - steps_before,
+        'final_cost': float(cost_history[-1]),
+        'best_cost': float(min(cost_history)),
+        'stop_reason': stop_reason,
+        'checkpoint': checkpoint,
+        'run_id': run_id,
+    })
+    return trial
+
+def successive_halving(pool: WorkerPool, trials: List[Dict[str, Any]], min_steps: int, max_steps: int, eta: int, checkpoint_dir: str, convergence: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Run one successive-halving bracket.
+
+    Every rung advances the surviving trials to a larger step budget and keeps the best
+    ``1/eta`` of them. Trials resume from their checkpoints, so a promoted trial only pays
+    for the additional steps.
+
+    Args:
+        pool: The worker pool running the trials.
+        trials: The trials of the bracket.
+        min_steps: The step budget of the first rung.
+        max_steps: The step budget of the last rung.
+        eta: The reduction factor between rungs.
+        checkpoint_dir: The directory of the checkpoint file shared by all trials.
+        convergence: Early-stopping criteria passed to optimize_vqe.
+
+    Returns:
+        A tuple of the final state of every trial in the bracket and the optimizer steps spent.
+    """
+    finished = {}
+    survivors = trials
+    budget = min_steps
+    steps_spent = 0
+    while survivors:
+        logging.info(f"Rung with {len(survivors)} trials at {budget} steps.")
+        tasks = [(trial, budget, checkpoint_dir, convergence) for trial in survivors]
+        rung = [trial for _, trial in pool.imap_unordered(run_trial, tasks)]
+        steps_spent += sum(trial['steps_run'] for trial in rung)
+        for trial in rung:
+            finished[trial['trial']] = trial
+        if budget >= max_steps:
+            break
+        rung.sort(key=lambda trial: trial['final_cost'])
+        survivors = rung[:max(len(rung) // eta, 1)]
+        budget = min(budget * eta, max_steps)
+    return list(finished.values()), steps_spent
+
+def hyperband(pool: WorkerPool, search: Dict[str, Any], checkpoint_dir: str, rng: np.random.Generator, convergence: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Run Hyperband: several successive-halving brackets trading trial count for starting budget.
+
+    Args:
+        pool: The worker pool running the trials.
+        search: The ``search`` config section.
+        checkpoint_dir: The directory of the checkpoint file shared by all trials.
+        rng: The random generator.
+        convergence: Early-stopping criteria passed to optimize_vqe.
+
+    Returns:
+        A tuple of every trial's final state and the total optimizer steps spent.
+    """
+    eta = search.get('eta', 3)
+    max_steps = search.get('max_steps', 200)
+    min_steps = search.get('min_steps', 10)
+    s_max = int(math.log(max_steps / min_steps, eta) + 1e-9)
+    trials, steps_spent, next_id = [], 0, 0
+    for s in range(s_max, -1, -1):
+        n_trials = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        bracket = sample_trials(search, n_trials, rng, next_id)
+        next_id += n_trials
+        logging.info(f"Hyperband bracket {s}: {n_trials} trials starting at {max_steps // eta ** s} steps.")
+        bracket_trials, bracket_steps = successive_halving(pool, bracket, max(max_steps // eta ** s, 1), max_steps, eta, checkpoint_dir, convergence)
+        trials += bracket_trials
+        steps_spent += bracket_steps
+    return trials, steps_spent
+
+def write_leaderboard(trials: List[Dict[str, Any]], leaderboard_path: str) -> pd.DataFrame:
+    """
+    Write the trials ranked by final cost to a CSV file.
+
+    Args:
+        trials: The final state of every trial.
+        leaderboard_path: The path of the CSV file.
+
+    Returns:
+        The leaderboard as a DataFrame.
+    """
+    leaderboard = pd.DataFrame(trials).drop(columns=['initial_params', 'steps_run'])
+    leaderboard = leaderboard.sort_values('final_cost').reset_index(drop=True)
+    os.makedirs(os.path.dirname(os.path.abspath(leaderboard_path)), exist_ok=True)
+    leaderboard.to_csv(leaderboard_path, index=False)
+    logging.info(f"Leaderboard saved at {leaderboard_path}")
+    return leaderboard
+
+def random_search(config: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Search over stepsize and circuit type, allocating optimizer steps with successive halving.
+
+    Args:
+        config: A dictionary containing configuration parameters.
+
+    Returns:
+        The leaderboard as a DataFrame.
+    """
+    search = config.get('search', {})
+    rng = np.random.default_rng(search.get('seed'))
+    checkpoint_dir = search.get('checkpoint_dir', os.path.join(config['results_dir'], 'search'))
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    convergence = config['optimization'].get('convergence')
+
+    with WorkerPool(processes=config.get('parallel_processes')) as pool:
+        if search.get('method', 'hyperband') == 'hyperband':
+            trials, steps_spent = hyperband(pool, search, checkpoint_dir, rng, convergence)
+        else:
+            trials = sample_trials(search, search.get('trials', 27), rng)
+            trials, steps_spent = successive_halving(pool, trials, search.get('min_steps', 10), search.get('max_steps', 200), search.get('eta', 3), checkpoint_dir, convergence)
+
+    flat_steps = len(trials) * search.get('max_steps', 200)
+    logging.info(f"Search spent {steps_spent} optimizer steps ({steps_spent / flat_steps:.1%} of a flat search over {len(trials)} trials).")
+    leaderboard = write_leaderboard(trials, search.get('leaderboard', os.path.join(config['results_dir'], 'leaderboard.csv')))
+    best = leaderboard.iloc[0]
+    logging.info(f"Best trial {best['trial']}: circuit={best['circuit']}, stepsize={best['stepsize']:.4f}, cost={best['final_cost']:.4f}")
+    return leaderboard
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Successive-halving hyperparameter search for the VQE')
+    parser.add_argument('--config', type=str, default='config.yaml', help='Path to the configuration file')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+
+    with open(args.config, 'r', encoding='utf-8') as file:
+        config = yaml.safe_load(file)
+
+    random_search(config)
@@ -0,0 +1,243 @@
+import io
+import os
+import base64
+import logging
+import numpy as np
+from string import Template
+from typing import List, Optional, Sequence, Tuple, Union
+from quantum_metrics import calculate_metrics_batch, pad_histories
+
+MAX_POINTS = 500
+MAX_TABLE_ROWS = 20
+
+STYLE = """
+    body { font-family: 'Arial', sans-serif; margin: 40px; line-height: 1.6; color: #333; background-color: #f9f9f9; }
+    h1, h2 { color: #333; }
+    h1 { font-size: 28px; text-align: center; }
+    h2 { font-size: 24px; border-bottom: 2px solid #ddd; padding-bottom: 10px; text-align: center; }
+    table { width: 80%; border-collapse: collapse; margin: 20px auto; background-color: #fff; }
+    th, td { padding: 12px; border: 1px solid #ddd; text-align: center; }
+    th { background-color: #f4f4f4; }
+    .explanation, .conclusion { margin-top: 20px; text-align: center; }
+    .conclusion { font-weight: bold; }
+    .container { max-width: 1200px; margin: auto; padding: 20px; }
+    img { max-width: 100%; height: auto; display: block; margin-left: auto; margin-right: auto; }
+"""
+
+PAGE = Template("""<html>
+<head>
+    <title>$title</title>
+    <style>$style</style>
+</head>
+<body>
+<div class="container">
+    <h1>$title</h1>
+$body
+</div>
+</body>
+</html>
+""")
+
+_figure = None
+
+def get_axes():
+    """
+    Return a fresh axes on a single Agg figure that is reused by every plot in this process.
+
+    Matplotlib is imported on first use only, so runs without plots never load it.
+    """
+    global _figure
+    if _figure is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        _figure = Figure()
+        FigureCanvasAgg(_figure)
+    _figure.clf()
+    return _figure.add_subplot()
+
+def lttb(y: Sequence[float], threshold: int = MAX_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample a series with Largest-Triangle-Three-Buckets, keeping its visual shape.
+
+    Args:
+        y: The values, indexed by step.
+        threshold: The maximum number of points to keep.
+
+    Returns:
+        A tuple of the kept step indices and values.
+    """
+    y = np.asarray(y, dtype=float)
+    n = y.size
+    if n <= threshold or threshold < 3:
+        return np.arange(n), y
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = [0]
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = (end + next_end - 1) / 2 if next_end > end else n - 1
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        a = kept[-1]
+        x = np.arange(start, end)
+        area = np.abs((a - next_x) * (y[start:end] - y[a]) - (a - x) * (next_y - y[a]))
+        kept.append(start + int(np.argmax(area)))
+    kept.append(n - 1)
+    kept = np.asarray(kept)
+    return kept, y[kept]
+
+def minmax_decimate(values: np.ndarray, buckets: int = MAX_POINTS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reduce a series to per-bucket minima and maxima so that no extreme is lost.
+
+    Args:
+        values: The values, indexed by step.
+        buckets: The maximum number of buckets.
+
+    Returns:
+        A tuple of the bucket start steps, bucket minima and bucket maxima.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.size <= buckets:
+        return np.arange(values.size), values, values
+    edges = np.linspace(0, values.size, buckets + 1).astype(int)
+    return edges[:-1], np.fmin.reduceat(values, edges[:-1]), np.fmax.reduceat(values, edges[:-1])
+
+def inline_image(path: str) -> str:
+    """
+    Return an image file as a base64 data URI so the report is a single self-contained file.
+    """
+    with open(path, 'rb') as f:
+        return 'data:image/png;base64,' + base64.b64encode(f.read()).decode('ascii')
+
+def figure_data_uri(ax) -> str:
+    """
+    Render an axes' figure to PNG in memory and return it as a base64 data URI.
+    """
+    buffer = io.BytesIO()
+    ax.figure.savefig(buffer, format='png')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def html_table(header: Sequence[str], rows: Sequence[Sequence]) -> str:
+    """
+    Render a table as one HTML string.
+    """
+    lines = ['    <table>', '        <tr>' + ''.join(f'<th>{cell}</th>' for cell in header) + '</tr>']
+    lines += ['        <tr>' + ''.join(f'<td>{cell}</td>' for cell in row) + '</tr>' for row in rows]
+    lines.append('    </table>')
+    return '\n'.join(lines)
+
+def html_section(title: str, content: str, explanation: Optional[str] = None) -> str:
+    """
+    Render a titled report section with an optional explanation paragraph.
+    """
+    section = f'    <h2>{title}</h2>\n{content}\n'
+    if explanation:
+        section += f'    <div class="explanation">\n        <p>{explanation}</p>\n    </div>\n'
+    return section
+
+def html_image(uri: str, alt: str) -> str:
+    return f'    <img src="{uri}" alt="{alt}">'
+
+def render_page(path: str, title: str, sections: Sequence[str]) -> str:
+    """
+    Fill the page template and write the report in a single write.
+
+    Args:
+        path: The path of the HTML file.
+        title: The page title.
+        sections: The rendered body sections.
+
+    Returns:
+        The path of the written report.
+    """
+    html = PAGE.substitute(title=title, style=STYLE, body=''.join(sections))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return path
+
+def build_multi_run_report(results: Sequence[Tuple[Union[List[float], np.ndarray], List[Union[float, np.ndarray]]]], results_dir: str, run_ids: Optional[Sequence[str]] = None, max_points: int = MAX_POINTS, max_table_rows: int = MAX_TABLE_ROWS) -> str:
+    """
+    Build one HTML report aggregating every run.
+
+    The report holds a summary table of the best runs, the best/median/worst cost curves
+    (LTTB-downsampled), the min/quartile/max envelope across runs (min/max-decimated) and
+    the distribution of final costs. Images are inlined once and the table is capped, so
+    the file size does not grow with the number of steps or runs.
+
+    Args:
+        results: A list of tuples containing optimized parameters and cost history, one per run.
+        results_dir: Directory to save the report.
+        run_ids: The id of every run. Defaults to ``start_<index>``.
+        max_points: The maximum number of points drawn per curve.
+        max_table_rows: The maximum number of runs listed in the summary table.
+
+    Returns:
+        Path to the saved HTML report.
+    """
+    run_ids = list(run_ids) if run_ids is not None else [f"start_{index}" for index in range(len(results))]
+    histories = [cost_history for _, cost_history in results]
+    values = pad_histories(histories)
+    metrics = calculate_metrics_batch(values)
+    final = metrics['Final Cost']
+    order = np.argsort(final)
+    best, median, worst = order[0], order[len(order) // 2], order[-1]
+
+    overview = html_table(['Runs', 'Best Final Cost', 'Median Final Cost', 'Worst Final Cost', 'Mean Steps'], [[
+        len(results), f"{final[best]:.6f}", f"{np.median(final):.6f}", f"{final[worst]:.6f}", f"{metrics['Steps'].mean():.1f}"
+    ]])
+    rows = []
+    for index in order[:max_table_rows]:
+        rows.append([
+            run_ids[index], int(metrics['Steps'][index]), f"{final[index]:.6f}", f"{metrics['Minimum'][index]:.6f}",
+            f"{metrics['Mean'][index]:.6f}", getattr(histories[index], 'stop_reason', None) or '',
+            np.round(np.asarray(results[index][0], dtype=float), 4).tolist()
+        ])
+    runs_table = html_table(['Run', 'Steps', 'Final Cost', 'Minimum', 'Mean', 'Stop Reason', 'Parameters'], rows)
+
+    ax = get_axes()
+    for index, label in ((best, 'best'), (median, 'median'), (worst, 'worst')):
+        steps, costs = lttb(values[index, :int(metrics['Steps'][index])], max_points)
+        ax.plot(steps, costs, label=f"{label} ({run_ids[index]})")
+    ax.set_xlabel('Step')
+    ax.set_ylabel('Cost')
+    ax.set_title('Best, Median and Worst Runs')
+    ax.legend()
+    curves_uri = figure_data_uri(ax)
+
+    ax = get_axes()
+    with np.errstate(all='ignore'):
+        low, q25, q50, q75, high = np.nanpercentile(values, [0, 25, 50, 75, 100], axis=0)
+    steps, low, _ = minmax_decimate(low, max_points)
+    _, _, high = minmax_decimate(high, max_points)
+    _, q25, _ = minmax_decimate(q25, max_points)
+    _, _, q75 = minmax_decimate(q75, max_points)
+    _, q50_low, q50_high = minmax_decimate(q50, max_points)
+    ax.fill_between(steps, low, high, alpha=0.2, label='min-max')
+    ax.fill_between(steps, q25, q75, alpha=0.4, label='25-75%')
+    ax.plot(steps, (q50_low + q50_high) / 2, label='median')
+    ax.set_xlabel('Step')
+    ax.set_ylabel('Cost')
+    ax.set_title('Cost Envelope Across Runs')
+    ax.legend()
+    envelope_uri = figure_data_uri(ax)
+
+    ax = get_axes()
+    ax.hist(final, bins=min(50, max(len(final), 1)))
+    ax.set_xlabel('Final Cost')
+    ax.set_ylabel('Runs')
+    ax.set_title('Distribution of Final Costs')
+    histogram_uri = figure_data_uri(ax)
+
+    sections = [
+        html_section('Overview', overview),
+        html_section(f'Best {min(len(results), max_table_rows)} Runs', runs_table),
+        html_section('Best, Median and Worst Runs', html_image(curves_uri, 'Best, Median and Worst Runs'),
+                     "Cost histories of the runs with the lowest, median and highest final cost, downsampled with LTTB."),
+        html_section('Cost Envelope Across Runs', html_image(envelope_uri, 'Cost Envelope Across Runs'),
+                     "Per-step minimum, quartiles, median and maximum of the cost over all runs."),
+        html_section('Distribution of Final Costs', html_image(histogram_uri, 'Distribution of Final Costs'),
+                     "How the final costs of all runs are spread; a tight cluster at the minimum indicates that most starts converge to the same solution."),
+    ]
+    report_path = render_page(os.path.join(results_dir, 'report.html'), 'Multi-Run Optimization Report', sections)
+    logging.info(f"Multi-run report generated at {report_path}")
+    return report_path
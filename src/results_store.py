@@ -0,0 +1,75 @@
+import os
+import json
+import logging
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from quantum_metrics import pad_histories
+
+def write_results_store(results: Sequence[Tuple[Union[List[float], np.ndarray], List[Union[float, np.ndarray]]]], store_path: str, run_ids: Optional[Sequence[str]] = None, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Write the cost histories and parameters of all runs to one compact binary table.
+
+    The store is a NumPy .npz archive written once, holding NaN-padded (runs x steps)
+    costs and parameters, the per-run length, stop reason, evaluation counts and shots, and
+    the run metadata.
+
+    Args:
+        results: A list of tuples containing optimized parameters and cost history, one per run.
+        store_path: The path of the .npz file.
+        run_ids: The id of every run. Defaults to ``start_<index>``.
+        metadata: Run-level configuration (circuit, steps, stepsize, ...) stored as JSON.
+
+    Returns:
+        The path of the saved store.
+    """
+    histories = [cost_history for _, cost_history in results]
+    params = pad_histories([np.asarray(p, dtype=float).ravel() for p, _ in results])
+    os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+    np.savez_compressed(
+        store_path,
+        run_id=np.array(run_ids if run_ids is not None else [f"start_{index}" for index in range(len(results))]),
+        costs=pad_histories(histories),
+        length=np.array([len(history) for history in histories]),
+        params=params,
+        stop_reason=np.array([getattr(history, 'stop_reason', None) or '' for history in histories]),
+        evaluations=np.array([getattr(history, 'evaluations', 0) for history in histories]),
+        gradient_evaluations=np.array([getattr(history, 'gradient_evaluations', 0) for history in histories]),
+        shots=np.array([getattr(history, 'shots', 0) for history in histories]),
+        metadata=np.array(json.dumps(metadata or {}, default=str)),
+    )
+    logging.info(f"Results of {len(results)} runs saved at {store_path}")
+    return store_path
+
+def read_results_store(store_path: str) -> Tuple['pd.DataFrame', 'pd.DataFrame', Dict[str, Any]]:
+    """
+    Read a results store written by write_results_store.
+
+    Args:
+        store_path: The path of the .npz file.
+
+    Returns:
+        A tuple of (runs, costs, metadata): one row per run with its length, stop reason,
+        evaluation counts, shots and parameters; one row per (run_id, step) with its cost; and the run metadata.
+    """
+    import pandas as pd
+    with np.load(store_path) as store:
+        run_ids = store['run_id']
+        lengths = store['length']
+        costs = store['costs']
+        runs = pd.DataFrame({
+            'run_id': run_ids,
+            'steps': lengths,
+            'stop_reason': store['stop_reason'],
+            'evaluations': store['evaluations'] if 'evaluations' in store else 0,
+            'gradient_evaluations': store['gradient_evaluations'] if 'gradient_evaluations' in store else 0,
+            'shots': store['shots'] if 'shots' in store else 0,
+            'params': [row[~np.isnan(row)].tolist() for row in store['params']],
+        }).set_index('run_id')
+        mask = np.arange(costs.shape[1]) < lengths[:, None]
+        long = pd.DataFrame({
+            'run_id': np.repeat(run_ids, lengths),
+            'step': np.nonzero(mask)[1],
+            'cost': costs[mask],
+        })
+        metadata = json.loads(str(store['metadata']))
+    return runs, long, metadata
@@ -0,0 +1,316 @@
+from collections import deque
+import numpy as np
+from scipy.signal import lfilter
+from typing import Optional, Sequence, Tuple, Union
+
+def moving_average(data: Union[Sequence[float], np.ndarray], window_size: int) -> np.ndarray:
+    """
+    Calculate the moving average along the last axis with cumulative sums in O(n).
+
+    A window larger than the data is shrunk to the length of the data, so the result
+    then holds the single mean of the whole series. Windows that reach into NaN
+    padding are NaN.
+
+    Args:
+        data: The values, one series per row for a 2-D array.
+        window_size: The size of the moving window.
+
+    Returns:
+        An array of ``n - window_size + 1`` moving averages per series.
+
+    Raises:
+        ValueError: If the window size is not positive.
+    """
+    if window_size <= 0:
+        raise ValueError("Window size must be greater than 0")
+    data = np.asarray(data, dtype=float)
+    if data.shape[-1] == 0:
+        return data.copy()
+    window_size = min(window_size, data.shape[-1])
+    padding = [(0, 0)] * (data.ndim - 1) + [(1, 0)]
+    cumulative = np.cumsum(np.pad(data, padding), axis=-1)
+    return (cumulative[..., window_size:] - cumulative[..., :-window_size]) / window_size
+
+def rolling_std(data: Union[Sequence[float], np.ndarray], window_size: int, ddof: int = 0) -> np.ndarray:
+    """
+    Calculate the moving standard deviation along the last axis in O(n).
+
+    The sums of the values and their squares are taken relative to each series' first
+    value, which keeps the difference of the cumulative sums accurate for costs with a
+    large offset.
+
+    Args:
+        data: The values, one series per row for a 2-D array.
+        window_size: The size of the moving window, shrunk to the length of the data.
+        ddof: The delta degrees of freedom of the variance.
+
+    Returns:
+        An array of ``n - window_size + 1`` standard deviations per series.
+
+    Raises:
+        ValueError: If the window size is not positive.
+    """
+    if window_size <= 0:
+        raise ValueError("Window size must be greater than 0")
+    data = np.asarray(data, dtype=float)
+    if data.shape[-1] == 0:
+        return data.copy()
+    window_size = min(window_size, data.shape[-1])
+    if window_size <= ddof:
+        return np.full(data.shape[:-1] + (data.shape[-1] - window_size + 1,), np.nan)
+    shifted = data - data[..., :1]
+    padding = [(0, 0)] * (data.ndim - 1) + [(1, 0)]
+    sums = np.cumsum(np.pad(shifted, padding), axis=-1)
+    squares = np.cumsum(np.pad(shifted ** 2, padding), axis=-1)
+    total = sums[..., window_size:] - sums[..., :-window_size]
+    square_total = squares[..., window_size:] - squares[..., :-window_size]
+    variance = (square_total - total ** 2 / window_size) / (window_size - ddof)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+def _rolling_extremum(data: Union[Sequence[float], np.ndarray], window_size: int, better) -> np.ndarray:
+    if window_size <= 0:
+        raise ValueError("Window size must be greater than 0")
+    data = np.asarray(data, dtype=float)
+    if data.ndim > 1:
+        return np.array([_rolling_extremum(row, window_size, better) for row in data])
+    if data.size == 0:
+        return data.copy()
+    window_size = min(window_size, data.size)
+    result = np.empty(data.size - window_size + 1)
+    # Индексы кандидатов в экстремумы окна; значения по ним монотонны
+    candidates = deque()
+    for i, value in enumerate(data):
+        while candidates and not better(data[candidates[-1]], value):
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window_size:
+            candidates.popleft()
+        if i >= window_size - 1:
+            result[i - window_size + 1] = data[candidates[0]]
+    return result
+
+def rolling_min(data: Union[Sequence[float], np.ndarray], window_size: int) -> np.ndarray:
+    """
+    Calculate the moving minimum along the last axis with a monotonic deque in O(n).
+
+    Args:
+        data: The values, one series per row for a 2-D array.
+        window_size: The size of the moving window, shrunk to the length of the data.
+
+    Returns:
+        An array of ``n - window_size + 1`` minima per series.
+    """
+    return _rolling_extremum(data, window_size, lambda kept, new: kept < new)
+
+def rolling_max(data: Union[Sequence[float], np.ndarray], window_size: int) -> np.ndarray:
+    """
+    Calculate the moving maximum along the last axis with a monotonic deque in O(n).
+
+    Args:
+        data: The values, one series per row for a 2-D array.
+        window_size: The size of the moving window, shrunk to the length of the data.
+
+    Returns:
+        An array of ``n - window_size + 1`` maxima per series.
+    """
+    return _rolling_extremum(data, window_size, lambda kept, new: kept > new)
+
+def exponential_moving_average(data: Union[Sequence[float], np.ndarray], alpha: Optional[float] = None, span: Optional[int] = None) -> np.ndarray:
+    """
+    Calculate the exponential moving average along the last axis.
+
+    The average starts at the first value and follows ``ema[i] = alpha * x[i] + (1 - alpha) * ema[i-1]``.
+
+    Args:
+        data: The values, one series per row for a 2-D array.
+        alpha: The smoothing factor, between 0 (exclusive) and 1.
+        span: The span used to derive ``alpha = 2 / (span + 1)`` if ``alpha`` is not given.
+
+    Returns:
+        An array of the same shape as ``data``.
+
+    Raises:
+        ValueError: If neither or an invalid smoothing factor is given.
+    """
+    alpha = _smoothing(alpha, span)
+    data = np.asarray(data, dtype=float)
+    if data.shape[-1] == 0:
+        return data.copy()
+    initial = (1 - alpha) * data[..., :1]
+    return lfilter([alpha], [1, alpha - 1], data, axis=-1, zi=initial)[0]
+
+def _smoothing(alpha: Optional[float], span: Optional[int]) -> float:
+    if alpha is None:
+        if span is None:
+            raise ValueError("Either alpha or span must be given")
+        alpha = 2 / (span + 1)
+    if not 0 < alpha <= 1:
+        raise ValueError(f"The smoothing factor must be in (0, 1], got {alpha}")
+    return alpha
+
+class RollingStats:
+    """
+    Statistics over the last ``window`` values of a stream, updated in O(1) per value.
+
+    Values are pushed one optimizer step at a time; each push may be a scalar or an array
+    of fixed shape (e.g. the costs of all runs of a batch), in which case every statistic
+    is elementwise. The mean and standard deviation come from running sums over a ring
+    buffer, taken relative to the first value and recomputed exactly once per pass over
+    the buffer so that rounding errors do not accumulate. The minimum and maximum use
+    monotonic deques (one per element) and can be switched off with ``extrema=False``
+    when they are not needed.
+
+    Attributes:
+        count: The number of values pushed.
+    """
+
+    def __init__(self, window: int, shape: Tuple[int, ...] = (), alpha: Optional[float] = None, span: Optional[int] = None, extrema: bool = True) -> None:
+        """
+        Args:
+            window: The number of most recent values the statistics cover.
+            shape: The shape of a pushed value.
+            alpha: The smoothing factor of the exponential moving average.
+            span: The span of the exponential moving average if ``alpha`` is not given.
+            extrema: Whether to track the rolling minimum and maximum.
+
+        Raises:
+            ValueError: If the window is not positive.
+        """
+        if window <= 0:
+            raise ValueError("Window size must be greater than 0")
+        self.window = window
+        self.count = 0
+        self._ema = None
+        self._alpha = None if alpha is None and span is None else _smoothing(alpha, span)
+        self._extrema = extrema
+        self._values = np.zeros((window,) + tuple(shape))
+        self._offset = None
+        self._sum = np.zeros(shape)
+        self._square_sum = np.zeros(shape)
+        self._minima = [deque() for _ in range(int(np.prod(shape)))] if extrema else None
+        self._maxima = [deque() for _ in range(int(np.prod(shape)))] if extrema else None
+
+    def push(self, value: Union[float, np.ndarray]) -> None:
+        """
+        Add the value of one step, dropping the oldest value once the window is full.
+        """
+        value = np.asarray(value, dtype=float).reshape(self._sum.shape)
+        slot = self.count % self.window
+        oldest = self._values[slot].copy()
+        self._values[slot] = value
+        self.count += 1
+        if self._offset is None:
+            self._offset = value.copy()
+        if slot == self.window - 1:
+            shifted = self._values - self._offset
+            self._sum = shifted.sum(axis=0)
+            self._square_sum = (shifted ** 2).sum(axis=0)
+        else:
+            # Суммы относительно первого значения сохраняют точность дисперсии
+            new, old = value - self._offset, (oldest - self._offset if self.count > self.window else 0.0)
+            self._sum = self._sum + new - old
+            self._square_sum = self._square_sum + new ** 2 - old ** 2
+        if self._alpha is not None:
+            self._ema = value.copy() if self._ema is None else self._alpha * value + (1 - self._alpha) * self._ema
+        if self._extrema:
+            for element, current in enumerate(value.reshape(-1)):
+                self._update_extremum(self._minima[element], current, lambda kept: kept < current)
+                self._update_extremum(self._maxima[element], current, lambda kept: kept > current)
+
+    def _update_extremum(self, candidates: deque, value: float, keep) -> None:
+        while candidates and not keep(candidates[-1][1]):
+            candidates.pop()
+        candidates.append((self.count, value))
+        if candidates[0][0] <= self.count - self.window:
+            candidates.popleft()
+
+    @property
+    def full(self) -> bool:
+        """
+        Whether ``window`` values have been pushed.
+        """
+        return self.count >= self.window
+
+    @property
+    def size(self) -> int:
+        """
+        The number of values the statistics currently cover.
+        """
+        return min(self.count, self.window)
+
+    @property
+    def mean(self) -> Union[float, np.ndarray]:
+        """
+        The mean of the values in the window (NaN before the first push).
+        """
+        if self.count == 0:
+            return self._scalar(np.full(self._sum.shape, np.nan))
+        return self._scalar(self._offset + self._sum / self.size)
+
+    @property
+    def std(self) -> Union[float, np.ndarray]:
+        """
+        The population standard deviation of the values in the window.
+        """
+        if self.count == 0:
+            return self._scalar(np.full(self._sum.shape, np.nan))
+        variance = self._square_sum / self.size - (self._sum / self.size) ** 2
+        return self._scalar(np.sqrt(np.maximum(variance, 0.0)))
+
+    @property
+    def ema(self) -> Union[float, np.ndarray, None]:
+        """
+        The exponential moving average of all values pushed, or None without a smoothing factor or values.
+        """
+        return None if self._ema is None else self._scalar(self._ema)
+
+    @property
+    def min(self) -> Union[float, np.ndarray]:
+        """
+        The minimum of the values in the window.
+        """
+        return self._extremum(self._minima)
+
+    @property
+    def max(self) -> Union[float, np.ndarray]:
+        """
+        The maximum of the values in the window.
+        """
+        return self._extremum(self._maxima)
+
+    def _extremum(self, candidates) -> Union[float, np.ndarray]:
+        if not self._extrema:
+            raise ValueError("This RollingStats does not track the minimum and maximum")
+        if self.count == 0:
+            return self._scalar(np.full(self._sum.shape, np.nan))
+        return self._scalar(np.array([deque_[0][1] for deque_ in candidates]).reshape(self._sum.shape))
+
+    def _scalar(self, value: np.ndarray) -> Union[float, np.ndarray]:
+        return float(value) if value.ndim == 0 else value
+
+    def values(self) -> np.ndarray:
+        """
+        Return the values in the window, oldest first.
+        """
+        if not self.full:
+            return self._values[:self.count].copy()
+        return np.roll(self._values, -(self.count % self.window), axis=0)
+
+    def select(self, mask: np.ndarray) -> None:
+        """
+        Keep only the elements selected by ``mask`` of a stream of 1-D values (e.g. when runs leave a batch).
+
+        Args:
+            mask: A boolean array over the current elements.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        self._values = self._values[:, mask]
+        self._sum = self._sum[mask]
+        if self._offset is not None:
+            self._offset = self._offset[mask]
+        self._square_sum = self._square_sum[mask]
+        if self._ema is not None:
+            self._ema = self._ema[mask]
+        if self._extrema:
+            self._minima = [deque_ for deque_, kept in zip(self._minima, mask) if kept]
+            self._maxima = [deque_ for deque_, kept in zip(self._maxima, mask) if kept]
@@ -0,0 +1,217 @@
+import zlib
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from circuits import get_circuit_gates
+from hamiltonian import get_hamiltonian
+from statevector import basis_probabilities, final_state
+import profiling
+
+ALLOCATIONS = ('weighted', 'uniform')
+
+# Правила сдвига параметров: (коэффициент, сдвиг) для каждого параметрического гейта
+_C1 = (np.sqrt(2) + 1) / (4 * np.sqrt(2))
+_C2 = (np.sqrt(2) - 1) / (4 * np.sqrt(2))
+SHIFT_RULES = {
+    'RX': ((0.5, np.pi / 2), (-0.5, -np.pi / 2)),
+    'RY': ((0.5, np.pi / 2), (-0.5, -np.pi / 2)),
+    'RZ': ((0.5, np.pi / 2), (-0.5, -np.pi / 2)),
+    'CRX': ((_C1, np.pi / 2), (-_C1, -np.pi / 2), (-_C2, 3 * np.pi / 2), (_C2, -3 * np.pi / 2)),
+    'CRY': ((_C1, np.pi / 2), (-_C1, -np.pi / 2), (-_C2, 3 * np.pi / 2), (_C2, -3 * np.pi / 2)),
+    'CRZ': ((_C1, np.pi / 2), (-_C1, -np.pi / 2), (-_C2, 3 * np.pi / 2), (_C2, -3 * np.pi / 2)),
+}
+
+def measurement_groups(hamiltonian: Optional[str] = None) -> Tuple[List[Tuple[str, np.ndarray]], float]:
+    """
+    Return the measurement settings of a cost: one (basis word, outcome weights) pair per
+    qubit-wise commuting group, and the constant energy offset.
+
+    Args:
+        hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+
+    Returns:
+        A tuple of the groups and the constant.
+    """
+    if hamiltonian is None:
+        return [('Z', np.array([1.0, -1.0]))], 0.0
+    registered = get_hamiltonian(hamiltonian)
+    return [(basis, registered.group_weights(basis, members)[1]) for basis, members in registered.groups], registered.constant
+
+class ShotObjective:
+    """
+    Estimate the cost and its gradient from a finite number of measurement shots.
+
+    Every evaluation samples the outcomes of each measurement group from the exact
+    probabilities of the NumPy statevector simulator, so the estimates carry the shot
+    noise of a sampling device. Gradients use the parameter-shift rule, every shifted
+    circuit being sampled with the same budget.
+
+    The budget adapts during the optimization: ``adapt`` raises the shots per evaluation
+    so that the expected norm of the gradient noise stays below ``gradient_ratio`` times
+    the gradient norm, so early steps with large gradients are cheap and shots grow as the
+    gradient shrinks. The budget is split over the groups proportionally to their
+    standard deviation per shot (``allocation='weighted'``), starting from the bound given
+    by the group's largest outcome weight and refined from the sampled outcomes,
+    which minimizes the variance of the energy estimate for a given number of shots.
+
+    Has the interface of optimizers.CountingObjective, so every optimizer accepts it.
+
+    Attributes:
+        evaluations: The number of cost evaluations, including the unshifted circuit of every gradient.
+        gradient_evaluations: The number of parameter-shift gradients.
+        shots: The total number of shots consumed.
+        shots_per_evaluation: The current budget of one cost evaluation, summed over the groups.
+    """
+
+    def __init__(self, circuit_type: str, hamiltonian: Optional[str] = None, initial: int = 100, max_shots: int = 100000, target_accuracy: Optional[float] = None, gradient_ratio: float = 1.0, allocation: str = 'weighted', seed: Union[int, Sequence[int], None] = None) -> None:
+        """
+        Args:
+            circuit_type: A string indicating the type of the circuit.
+            hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+            initial: The shots per evaluation at the first step.
+            max_shots: The largest budget of one evaluation.
+            target_accuracy: The standard error of the energy estimate that is good enough;
+                the budget never grows beyond the shots reaching it.
+            gradient_ratio: The tolerated ratio of the gradient noise to the gradient norm.
+            allocation: 'weighted' to split the shots by the groups' standard deviations,
+                or 'uniform' to give every group the same number.
+            seed: The seed of the sampling.
+
+        Raises:
+            ValueError: If the allocation is unknown.
+        """
+        if allocation not in ALLOCATIONS:
+            raise ValueError(f"Unknown shot allocation: {allocation}")
+        self.circuit_type = circuit_type
+        self.hamiltonian = hamiltonian
+        self.max_shots = max_shots
+        self.target_accuracy = target_accuracy
+        self.gradient_ratio = gradient_ratio
+        self.allocation = allocation
+        self.groups, self.constant = measurement_groups(hamiltonian)
+        self.evaluations = 0
+        self.gradient_evaluations = 0
+        self.shots = 0
+        self.shots_per_evaluation = initial
+        self._rng = np.random.default_rng(seed)
+        # Оценка стандартного отклонения одного измерения группы; сначала наибольший |вес| исхода
+        self._std = np.array([np.abs(weights).max() for _, weights in self.groups])
+        self._floor = 1e-3 * self._std
+        self._rules = [(position, index, SHIFT_RULES[name]) for position, (name, _, index) in enumerate(gate for gate in get_circuit_gates(circuit_type) if gate[2] is not None)]
+
+    def group_shots(self) -> np.ndarray:
+        """
+        Split the current budget of one evaluation over the measurement groups, at least one shot each.
+        """
+        if self.allocation == 'uniform':
+            fractions = np.full(len(self.groups), 1 / len(self.groups))
+        else:
+            fractions = self._std / self._std.sum()
+        return np.maximum(1, np.round(fractions * self.shots_per_evaluation)).astype(int)
+
+    def unit_variance(self) -> float:
+        """
+        Return the variance of the energy estimate from a budget of one shot under the current allocation.
+        """
+        shots = self.group_shots()
+        return float(np.sum(self._std ** 2 / (shots / shots.sum())))
+
+    def _estimate(self, params: np.ndarray, gate_shifts: Optional[np.ndarray] = None) -> np.ndarray:
+        state = final_state(params, self.circuit_type, self.hamiltonian, gate_shifts)
+        shots = self.group_shots()
+        estimates = np.full(state.shape[0], self.constant)
+        for group, ((basis, weights), n) in enumerate(zip(self.groups, shots)):
+            probabilities = np.clip(basis_probabilities(state, basis), 0, None)
+            counts = self._rng.multinomial(n, probabilities / probabilities.sum(axis=1, keepdims=True))
+            means = counts @ weights / n
+            estimates += means
+            if n > 1:
+                variance = (counts @ weights ** 2 / n - means ** 2) * n / (n - 1)
+                self._std[group] = max(np.sqrt(max(variance.mean(), 0.0)), self._floor[group])
+        self.shots += int(shots.sum()) * state.shape[0]
+        return estimates
+
+    def __call__(self, params) -> float:
+        self.evaluations += 1
+        with profiling.phase('forward'):
+            return float(self._estimate(np.asarray(params, dtype=float).reshape(1, -1))[0])
+
+    def value_and_grad(self, params) -> Tuple[float, np.ndarray]:
+        """
+        Return the sampled cost and its parameter-shift gradient, all circuits sampled in one batch.
+        """
+        shape = np.shape(params)
+        flat = np.asarray(params, dtype=float).ravel()
+        points = [np.zeros(len(self._rules))]
+        terms = []
+        for position, index, rule in self._rules:
+            for coefficient, shift in rule:
+                shifts = np.zeros(len(self._rules))
+                shifts[position] = shift
+                points.append(shifts)
+                terms.append((index, coefficient))
+        with profiling.phase('gradient'):
+            estimates = self._estimate(np.tile(flat, (len(points), 1)), np.array(points))
+        grad = np.zeros_like(flat)
+        for (index, coefficient), estimate in zip(terms, estimates[1:]):
+            grad[index] += coefficient * estimate
+        self.evaluations += 1
+        self.gradient_evaluations += 1
+        return float(estimates[0]), grad.reshape(shape)
+
+    def shot_limit(self) -> int:
+        """
+        Return the largest useful budget: ``max_shots``, or fewer if they already reach the target accuracy.
+        """
+        if self.target_accuracy is None:
+            return self.max_shots
+        return int(min(self.max_shots, np.ceil(self.unit_variance() / self.target_accuracy ** 2)))
+
+    def adapt(self, grad: np.ndarray) -> int:
+        """
+        Adapt the budget of the next evaluations to the size of the latest gradient.
+
+        With ``S`` shots per circuit, a parameter-shift component has the variance
+        ``sum(c**2) * unit_variance / S`` over its shift coefficients ``c``; the budget is
+        raised to the smallest ``S`` keeping the summed variance below
+        ``(gradient_ratio * |grad|)**2``. It never shrinks, since a noisy small gradient
+        already says the optimization is near a minimum. A gradient estimated as exactly
+        zero, which only happens with very few shots, doubles the budget.
+
+        Args:
+            grad: The latest (estimated) gradient.
+
+        Returns:
+            The new shots per evaluation.
+        """
+        coefficients = sum(coefficient ** 2 for _, _, rule in self._rules for coefficient, _ in rule)
+        norm = float(np.linalg.norm(grad))
+        required = 2 * self.shots_per_evaluation if norm == 0 else coefficients * self.unit_variance() / (self.gradient_ratio * norm) ** 2
+        self.shots_per_evaluation = int(min(self.shot_limit(), max(self.shots_per_evaluation, np.ceil(required))))
+        return self.shots_per_evaluation
+
+    @classmethod
+    def from_config(cls, settings: Optional[Dict[str, Any]], circuit_type: str, hamiltonian: Optional[str] = None, run_id: str = '0') -> Optional['ShotObjective']:
+        """
+        Build a ShotObjective from the ``optimization.shots`` config section, or return None if finite-shot mode is disabled.
+
+        Args:
+            settings: The config section.
+            circuit_type: A string indicating the type of the circuit.
+            hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+            run_id: The id of the run, mixed into the section's ``seed`` so that runs sample independently.
+
+        Returns:
+            The ShotObjective or None.
+        """
+        if not settings or not settings.get('enabled', False):
+            return None
+        return cls(
+            circuit_type,
+            hamiltonian,
+            initial=settings.get('initial', 100),
+            max_shots=settings.get('max', 100000),
+            target_accuracy=settings.get('target_accuracy'),
+            gradient_ratio=settings.get('gradient_ratio', 1.0),
+            allocation=settings.get('allocation', 'weighted'),
+            seed=None if settings.get('seed') is None else [settings['seed'], zlib.crc32(run_id.encode('utf-8'))],
+        )
@@ -0,0 +1,485 @@
+import string
+import functools
+import numpy as np
+from autograd.extend import primitive, defvjp
+from typing import Optional, Tuple
+from circuits import QNODE_CACHE_SIZE, get_circuit_gates, num_wires
+from hamiltonian import Hamiltonian, get_hamiltonian
+
+NATIVE_BACKEND = 'numpy'
+
+SQRT2_INV = 1 / np.sqrt(2)
+# Пакеты состояний меньше этого размера обрабатываются через einsum, большие — умножением матриц
+EINSUM_MAX_SIZE = 2 ** 10
+
+FIXED_GATES = {
+    'Hadamard': np.array([[1, 1], [1, -1]], dtype=complex) * SQRT2_INV,
+    'PauliX': np.array([[0, 1], [1, 0]], dtype=complex),
+    'PauliY': np.array([[0, -1j], [1j, 0]], dtype=complex),
+    'PauliZ': np.array([[1, 0], [0, -1]], dtype=complex),
+    'S': np.diag([1, 1j]).astype(complex),
+    'T': np.diag([1, np.exp(1j * np.pi / 4)]).astype(complex),
+    'CNOT': np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]], dtype=complex),
+    'CZ': np.diag([1, 1, 1, -1]).astype(complex),
+    'SWAP': np.array([[1, 0, 0, 0], [0, 0, 1, 0], [0, 1, 0, 0], [0, 0, 0, 1]], dtype=complex),
+}
+
+def _rotation(name: str, theta: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build a batch of single-qubit rotation matrices and their derivatives.
+
+    Args:
+        name: One of 'RX', 'RY' or 'RZ'.
+        theta: A 1-D array of rotation angles.
+
+    Returns:
+        A tuple of (matrices, derivatives), each of shape (N, 2, 2).
+    """
+    c = np.cos(theta / 2)
+    s = np.sin(theta / 2)
+    matrix = np.empty(theta.shape + (2, 2), dtype=complex)
+    derivative = np.empty(theta.shape + (2, 2), dtype=complex)
+    if name == 'RX':
+        matrix[..., 0, 0] = c
+        matrix[..., 0, 1] = -1j * s
+        matrix[..., 1, 0] = -1j * s
+        matrix[..., 1, 1] = c
+        derivative[..., 0, 0] = -s / 2
+        derivative[..., 0, 1] = -1j * c / 2
+        derivative[..., 1, 0] = -1j * c / 2
+        derivative[..., 1, 1] = -s / 2
+    elif name == 'RY':
+        matrix[..., 0, 0] = c
+        matrix[..., 0, 1] = -s
+        matrix[..., 1, 0] = s
+        matrix[..., 1, 1] = c
+        derivative[..., 0, 0] = -s / 2
+        derivative[..., 0, 1] = -c / 2
+        derivative[..., 1, 0] = c / 2
+        derivative[..., 1, 1] = -s / 2
+    elif name == 'RZ':
+        phase = np.exp(-0.5j * theta)
+        matrix[...] = 0
+        matrix[..., 0, 0] = phase
+        matrix[..., 1, 1] = phase.conj()
+        derivative[...] = 0
+        derivative[..., 0, 0] = -0.5j * phase
+        derivative[..., 1, 1] = 0.5j * phase.conj()
+    else:
+        raise ValueError(f"Unsupported gate: {name}")
+    return matrix, derivative
+
+def gate_matrix(name: str, theta: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Return the (batched) matrix of a gate and, for parametric gates, its derivative.
+
+    Args:
+        name: The PennyLane name of the gate.
+        theta: A 1-D array of angles for parametric gates, or None for fixed gates.
+
+    Returns:
+        A tuple of (matrix, derivative). Fixed gates return a (d, d) matrix and None,
+        parametric gates return two (N, d, d) arrays.
+
+    Raises:
+        ValueError: If the gate is not supported.
+    """
+    if name in FIXED_GATES:
+        return FIXED_GATES[name], None
+    if name in ('RX', 'RY', 'RZ'):
+        return _rotation(name, theta)
+    if name in ('CRX', 'CRY', 'CRZ'):
+        rotation, rotation_derivative = _rotation(name[1:], theta)
+        matrix = np.zeros(theta.shape + (4, 4), dtype=complex)
+        matrix[..., 0, 0] = 1
+        matrix[..., 1, 1] = 1
+        matrix[..., 2:, 2:] = rotation
+        derivative = np.zeros(theta.shape + (4, 4), dtype=complex)
+        derivative[..., 2:, 2:] = rotation_derivative
+        return matrix, derivative
+    raise ValueError(f"Unsupported gate: {name}")
+
+def _generator_terms(name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decompose a parametric gate as U(theta) = A + cos(theta/2) B + sin(theta/2) C.
+
+    Returns:
+        The constant matrices (A, B, C).
+    """
+    if name in ('RX', 'RY', 'RZ'):
+        return np.zeros((2, 2), dtype=complex), np.eye(2, dtype=complex), -1j * FIXED_GATES['Pauli' + name[1]]
+    if name in ('CRX', 'CRY', 'CRZ'):
+        zero, one = np.diag([1, 0]).astype(complex), np.diag([0, 1]).astype(complex)
+        return np.kron(zero, np.eye(2)), np.kron(one, np.eye(2)), np.kron(one, -1j * FIXED_GATES['Pauli' + name[2]])
+    raise ValueError(f"Unsupported gate: {name}")
+
+@functools.lru_cache(maxsize=None)
+def _gate_subscripts(n_wires: int, wires: Tuple[int, ...], batched: bool) -> str:
+    letters = string.ascii_letters
+    state = letters[:n_wires]
+    out = letters[n_wires:n_wires + len(wires)]
+    gate = out + ''.join(state[wire] for wire in wires)
+    result = ''.join(out[wires.index(axis)] if axis in wires else state[axis] for axis in range(n_wires))
+    if batched:
+        batch = letters[n_wires + len(wires)]
+        return f"{batch}{gate},{batch}{state}->{batch}{result}"
+    return f"{gate},...{state}->...{result}"
+
+def apply_gate(state: np.ndarray, matrix: np.ndarray, wires: Tuple[int, ...], out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Apply a (batched) gate matrix to a batch of statevectors.
+
+    Small batches of states are contracted by ``np.einsum`` on subscripts cached per
+    register width and wires, which avoids the overhead of moving axes; larger ones move
+    the gate's axes last and use one matrix product, which is faster there.
+
+    Args:
+        state: An array of shape (N, 2, ..., 2) holding one statevector per batch row.
+        matrix: A (d, d) matrix shared by all rows or an (N, d, d) batch of matrices.
+        wires: The wires the gate acts on.
+        out: A preallocated array of the shape of ``state``, not overlapping it, to write the result to.
+
+    Returns:
+        The new batch of statevectors with the same shape as ``state`` (``out`` if given).
+    """
+    n_wires = state.ndim - 1
+    if state.size < EINSUM_MAX_SIZE:
+        tensor = matrix.reshape(matrix.shape[:-2] + (2,) * (2 * len(wires)))
+        return np.einsum(_gate_subscripts(n_wires, tuple(wires), matrix.ndim == 3), tensor, state, out=out)
+    axes = [wire + 1 for wire in wires]
+    moved = np.moveaxis(state, axes, range(n_wires + 1 - len(wires), n_wires + 1))
+    shape = moved.shape
+    flat = moved.reshape(shape[0], -1, 2 ** len(wires))
+    if matrix.ndim == 2:
+        flat = flat @ matrix.T
+    else:
+        flat = flat @ np.swapaxes(matrix, -1, -2)
+    result = np.moveaxis(flat.reshape(shape), range(n_wires + 1 - len(wires), n_wires + 1), axes)
+    if out is None:
+        return result
+    out[...] = result
+    return out
+
+def _width(circuit_type: str, hamiltonian: Optional[str]) -> int:
+    if hamiltonian is None:
+        return num_wires(circuit_type)
+    return max(num_wires(circuit_type), get_hamiltonian(hamiltonian).n_qubits)
+
+@functools.lru_cache(maxsize=QNODE_CACHE_SIZE)
+def _observable_terms(hamiltonian: Optional[Hamiltonian], n_wires: int) -> Tuple[Tuple[Optional[np.ndarray], np.ndarray], ...]:
+    """
+    Compile a Pauli sum into (permutation, weights) pairs with H|psi> = sum weights * psi[permutation].
+
+    Terms flipping the same qubits share one permutation, so Z-only terms fold into a
+    single diagonal (permutation None). A Hamiltonian of None stands for PauliZ(0).
+    """
+    if hamiltonian is None:
+        hamiltonian = Hamiltonian([(1.0, 'Z' + 'I' * (n_wires - 1))])
+    index = np.arange(2 ** n_wires)
+    actions = {}
+    for coefficient, word in zip(hamiltonian.coeffs, hamiltonian.words):
+        mask = 0
+        phase = np.ones(2 ** n_wires, dtype=complex)
+        for wire, pauli in enumerate(word):
+            bit = (index >> (n_wires - 1 - wire)) & 1
+            if pauli in 'XY':
+                mask |= 1 << (n_wires - 1 - wire)
+            if pauli == 'Z':
+                phase *= 1 - 2 * bit
+            elif pauli == 'Y':
+                phase *= 1j * (1 - 2 * bit)
+        weights = actions.setdefault(mask, np.zeros(2 ** n_wires, dtype=complex))
+        weights += coefficient * phase[index ^ mask]
+    return tuple((None if mask == 0 else index ^ mask, weights) for mask, weights in actions.items())
+
+def apply_hamiltonian(state: np.ndarray, hamiltonian: Optional[Hamiltonian], out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Apply a Pauli-sum Hamiltonian to a batch of statevectors.
+
+    Args:
+        state: An array of shape (N, 2, ..., 2) holding one statevector per batch row.
+        hamiltonian: The Hamiltonian, or None for PauliZ(0).
+        out: A preallocated contiguous array of the shape of ``state`` to write the result to.
+
+    Returns:
+        The batch of vectors H|state> with the same shape as ``state`` (``out`` if given).
+    """
+    flat = state.reshape(state.shape[0], -1)
+    (permutation, weights), *rest = _observable_terms(hamiltonian, state.ndim - 1)
+    result = np.multiply(weights, flat if permutation is None else flat[:, permutation], out=None if out is None else out.reshape(flat.shape))
+    for permutation, weights in rest:
+        result += weights * (flat if permutation is None else flat[:, permutation])
+    return result.reshape(state.shape)
+
+def _observe(state: np.ndarray, hamiltonian: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the expectation values of the observable and the batch of vectors O|state>.
+    """
+    bra = apply_hamiltonian(state, None if hamiltonian is None else get_hamiltonian(hamiltonian))
+    costs = np.sum(state.conj() * bra, axis=tuple(range(1, state.ndim))).real
+    return costs, bra
+
+def _simulate(params: np.ndarray, gates: Tuple, n_wires: int, gate_shifts: Optional[np.ndarray] = None, record: bool = False) -> Tuple[np.ndarray, list]:
+    """
+    Run the forward pass of a gate sequence for a batch of parameter vectors.
+
+    Returns:
+        The final statevectors and, if ``record`` is set, the (matrix, adjoint, derivative,
+        wires, index) of every gate for the adjoint pass.
+    """
+    state = np.zeros((params.shape[0],) + (2,) * n_wires, dtype=complex)
+    state[(slice(None),) + (0,) * n_wires] = 1
+    ops = []
+    position = 0
+    for name, wires, index in gates:
+        theta = None
+        if index is not None:
+            theta = params[:, index]
+            if gate_shifts is not None:
+                theta = theta + gate_shifts[:, position]
+            position += 1
+        matrix, derivative = gate_matrix(name, theta)
+        state = apply_gate(state, matrix, wires)
+        if record:
+            adjoint = matrix.conj().T if matrix.ndim == 2 else np.conj(np.swapaxes(matrix, -1, -2))
+            ops.append((matrix, adjoint, derivative, wires, index))
+    return state, ops
+
+def _real_overlaps(bra: np.ndarray, ket: np.ndarray) -> np.ndarray:
+    """
+    Return Re <bra|ket> for every batch row as one real matrix product over the interleaved real and imaginary parts.
+    """
+    n = bra.shape[0]
+    return (bra.reshape(n, 1, -1).view(float) @ ket.reshape(n, -1, 1).view(float).reshape(n, -1, 1)).ravel()
+
+def _adjoint_gradient(state: np.ndarray, bra: np.ndarray, ops: list, n_params: int, buffers: Optional[list] = None) -> np.ndarray:
+    """
+    Run the adjoint pass: undo the gates one by one from the final state and collect
+    ``2 Re <bra|dU|state>`` for every parametric gate.
+
+    With ``buffers``, three preallocated arrays of the shape of ``state``, every gate
+    writes into a free buffer instead of a new array; ``state`` and ``bra`` are then
+    overwritten as well.
+
+    Returns:
+        The (N, n_params) gradients.
+    """
+    grads = np.zeros((state.shape[0], n_params))
+    spare_state, spare_bra, scratch = buffers or (None, None, None)
+    for matrix, adjoint, derivative, wires, index in reversed(ops):
+        undone = apply_gate(state, adjoint, wires, out=spare_state)
+        if buffers is not None:
+            spare_state = state
+        state = undone
+        if index is not None:
+            grads[:, index] += 2 * _real_overlaps(bra, apply_gate(state, derivative, wires, out=scratch))
+        undone = apply_gate(bra, adjoint, wires, out=spare_bra)
+        if buffers is not None:
+            spare_bra = bra
+        bra = undone
+    return grads
+
+def expval(params: np.ndarray, circuit_type: str = 'default', hamiltonian: Optional[str] = None) -> np.ndarray:
+    """
+    Evaluate <PauliZ(0)> (or the energy of a Hamiltonian) of a registered circuit for a batch of parameter vectors.
+
+    Args:
+        params: An array of shape (N, n_params).
+        circuit_type: A string indicating the type of the circuit.
+        hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+
+    Returns:
+        A 1-D array of N expectation values.
+    """
+    return _observe(final_state(params, circuit_type, hamiltonian), hamiltonian)[0]
+
+def final_state(params: np.ndarray, circuit_type: str = 'default', hamiltonian: Optional[str] = None, gate_shifts: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Simulate a registered circuit for a batch of parameter vectors.
+
+    Args:
+        params: An array of shape (N, n_params).
+        circuit_type: A string indicating the type of the circuit.
+        hamiltonian: The name of a registered Hamiltonian, whose qubits widen the register, or None.
+        gate_shifts: An optional (N, n_parametric_gates) array added to the angles of the
+            parametric gates in circuit order, e.g. for parameter-shift rules.
+
+    Returns:
+        The final statevectors as an array of shape (N, 2, ..., 2).
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    return _simulate(params, get_circuit_gates(circuit_type), _width(circuit_type, hamiltonian), gate_shifts)[0]
+
+def basis_probabilities(state: np.ndarray, basis: str) -> np.ndarray:
+    """
+    Return the measurement probabilities of a batch of statevectors in the basis of a Pauli word.
+
+    The qubits are rotated like hamiltonian.get_group_qnodes does (Hadamard for X,
+    RX(pi/2) for Y), so the probabilities line up with Hamiltonian.group_weights.
+
+    Args:
+        state: An array of shape (N, 2, ..., 2) holding one statevector per batch row.
+        basis: The measurement basis word; wires acting with 'I' are not measured.
+
+    Returns:
+        An array of shape (N, 2**k) over the basis states of the k measured wires.
+    """
+    n_wires = state.ndim - 1
+    for wire, pauli in enumerate(basis):
+        if pauli == 'X':
+            state = apply_gate(state, FIXED_GATES['Hadamard'], (wire,))
+        elif pauli == 'Y':
+            state = apply_gate(state, _rotation('RX', np.array(np.pi / 2))[0], (wire,))
+    wires = [wire for wire, pauli in enumerate(basis) if pauli != 'I']
+    traced = tuple(axis + 1 for axis in range(n_wires) if axis not in wires)
+    return np.sum(np.abs(state) ** 2, axis=traced).reshape(state.shape[0], -1)
+
+def expval_and_grad(params: np.ndarray, circuit_type: str = 'default', hamiltonian: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluate <PauliZ(0)> (or the energy of a Hamiltonian) and its analytic gradient for a batch of parameter vectors.
+
+    The gradient is computed with the adjoint method: one forward pass and one
+    backward pass over the gate sequence, independent of the number of parameters.
+    The Hamiltonian is applied to the final state once, so the cost does not grow
+    with the number of measurement groups.
+
+    Args:
+        params: An array of shape (N, n_params).
+        circuit_type: A string indicating the type of the circuit.
+        hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+
+    Returns:
+        A tuple of the N expectation values and the (N, n_params) gradients.
+    """
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    state, ops = _simulate(params, get_circuit_gates(circuit_type), _width(circuit_type, hamiltonian), record=True)
+    costs, bra = _observe(state, hamiltonian)
+    return costs, _adjoint_gradient(state, bra, ops, params.shape[1])
+
+class CompiledCircuit:
+    """
+    A registered ansatz and observable compiled for repeated evaluation of one parameter vector.
+
+    Runs on the same apply_gate/adjoint core as expval_and_grad, with a batch of one.
+    Fixed gates keep their precomputed matrices and adjoints; parametric gates are
+    rebuilt in place from their constant decomposition A + cos(theta/2) B + sin(theta/2) C,
+    and every gate writes into preallocated state buffers. The final state of the latest
+    forward pass is kept, so the gradient of the same parameters only needs the adjoint pass.
+    """
+
+    def __init__(self, gates: Tuple, observable: Optional[Hamiltonian] = None) -> None:
+        """
+        Args:
+            gates: The gate sequence of a registered circuit.
+            observable: The Hamiltonian to measure, or None to measure PauliZ(0).
+        """
+        n_wires = max(max(wires) for _, wires, _ in gates) + 1
+        if observable is not None:
+            n_wires = max(n_wires, observable.n_qubits)
+        self.n_wires = n_wires
+        self.n_params = max([index + 1 for _, _, index in gates if index is not None], default=0)
+        self._observable = observable
+        # Операции в формате _simulate; матрицы параметрических вентилей перезаписываются на месте
+        self._ops = []
+        self._terms = []
+        for name, wires, index in gates:
+            if index is None:
+                matrix = FIXED_GATES[name]
+                self._ops.append((matrix, matrix.conj().T, None, wires, None))
+            else:
+                terms = _generator_terms(name)
+                self._terms.append((len(self._ops), index, terms, tuple(term.conj().T for term in terms)))
+                self._ops.append(tuple(np.empty_like(terms[0]) for _ in range(3)) + (wires, index))
+        self._buffers = [np.empty((1,) + (2,) * n_wires, dtype=complex) for _ in range(5)]
+        self._forward = None
+
+    def forward(self, params: np.ndarray) -> float:
+        """
+        Simulate the circuit and return the expectation value, keeping the final state for ``gradient``.
+
+        Args:
+            params: A 1-D array of circuit parameters.
+
+        Returns:
+            The expectation value.
+        """
+        params = np.asarray(params, dtype=float).ravel()
+        cos, sin = np.cos(params / 2), np.sin(params / 2)
+        for position, index, terms, _ in self._terms:
+            matrix = self._ops[position][0]
+            np.multiply(terms[1], cos[index], out=matrix)
+            matrix += terms[0]
+            matrix += sin[index] * terms[2]
+        state, spare = self._buffers[0], self._buffers[1]
+        state.fill(0)
+        state.reshape(-1)[0] = 1
+        for matrix, _, _, wires, _ in self._ops:
+            state, spare = apply_gate(state, matrix, wires, out=spare), state
+        bra = apply_hamiltonian(state, self._observable, out=self._buffers[2])
+        self._buffers[:3] = [state, spare, bra]
+        self._forward = (params.copy(), cos, sin)
+        return float(np.vdot(state, bra).real)
+
+    def gradient(self, params: np.ndarray) -> np.ndarray:
+        """
+        Return the analytic gradient, reusing the forward pass of the same parameters if available.
+
+        Args:
+            params: A 1-D array of circuit parameters.
+
+        Returns:
+            The gradient with respect to ``params``.
+        """
+        params = np.asarray(params, dtype=float).ravel()
+        if self._forward is None or not np.array_equal(self._forward[0], params):
+            self.forward(params)
+        _, cos, sin = self._forward
+        self._forward = None
+        for position, index, terms, daggers in self._terms:
+            _, adjoint, derivative, _, _ = self._ops[position]
+            np.multiply(daggers[1], cos[index], out=adjoint)
+            adjoint += daggers[0]
+            adjoint += sin[index] * daggers[2]
+            np.multiply(terms[1], -sin[index] / 2, out=derivative)
+            derivative += (cos[index] / 2) * terms[2]
+        state, _, bra, *spare = self._buffers
+        return _adjoint_gradient(state, bra, self._ops, self.n_params, [self._buffers[1]] + spare)[0]
+
+    def value_and_grad(self, params: np.ndarray) -> Tuple[float, np.ndarray]:
+        """
+        Return the expectation value and its analytic gradient.
+        """
+        value = self.forward(params)
+        return value, self.gradient(params)
+
+    def cost(self, params) -> float:
+        """
+        The expectation value as an autograd primitive, so PennyLane optimizers can differentiate it.
+        """
+        return _compiled_cost(params, self)
+
+@primitive
+def _compiled_cost(params, compiled: CompiledCircuit) -> float:
+    return compiled.forward(params)
+
+defvjp(_compiled_cost, lambda ans, params, compiled: lambda g: g * compiled.gradient(params).reshape(np.shape(params)))
+
+@functools.lru_cache(maxsize=QNODE_CACHE_SIZE)
+def _compile(gates: Tuple, observable: Optional[Hamiltonian]) -> CompiledCircuit:
+    return CompiledCircuit(gates, observable)
+
+def compile_circuit(circuit_type: str, hamiltonian: Optional[str] = None) -> CompiledCircuit:
+    """
+    Compile (or fetch from the cache) a registered circuit for the native NumPy backend.
+
+    The cache is keyed on the gate sequence and Hamiltonian themselves, so re-registering
+    a circuit or Hamiltonian under the same name never returns a stale compilation.
+
+    Args:
+        circuit_type: A string indicating the type of the circuit.
+        hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+
+    Returns:
+        The compiled circuit.
+    """
+    return _compile(get_circuit_gates(circuit_type), None if hamiltonian is None else get_hamiltonian(hamiltonian))
@@ -0,0 +1,162 @@
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from circuits import num_params
+from cost_cache import circuit_fingerprint
+
+PERIOD = 2 * np.pi
+
+class ParameterStore:
+    """
+    A persistent sqlite index of optimized parameters and their final costs.
+
+    Solutions are keyed by the circuit_fingerprint of the circuit and Hamiltonian, which
+    covers the circuit type, the ansatz shape and the Hamiltonian terms, so a solution is
+    only offered to runs that minimize the same cost. Every row also records the
+    config_hash of the job that found it. A solution found again (same parameters to
+    ``decimals`` places) replaces the stored one only if its cost is lower.
+    """
+
+    def __init__(self, path: str, decimals: int = 8) -> None:
+        """
+        Args:
+            path: The path of the sqlite file.
+            decimals: The number of decimal places identical solutions are recognized by.
+        """
+        self.path = os.path.abspath(path)
+        self.decimals = decimals
+        self._connection = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS solutions (key BLOB PRIMARY KEY, fingerprint TEXT NOT NULL, circuit_type TEXT NOT NULL, n_params INTEGER NOT NULL, config_hash TEXT, run_id TEXT, params BLOB NOT NULL, final_cost REAL NOT NULL, steps INTEGER, created TEXT)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS solutions_by_cost ON solutions (fingerprint, final_cost)')
+        return self._connection
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def record(self, circuit_type: str, hamiltonian: Optional[str], results: Sequence[Tuple[Union[List[float], np.ndarray], List[float]]], config_hash: Optional[str] = None, run_ids: Optional[List[str]] = None) -> int:
+        """
+        Store the final parameters and costs of finished runs.
+
+        Args:
+            circuit_type: A string indicating the type of the circuit.
+            hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+            results: A list of tuples containing optimized parameters and cost history, one per run.
+            config_hash: The config_hash of the job the runs belong to.
+            run_ids: The ids of the runs.
+
+        Returns:
+            The number of solutions added or improved.
+        """
+        fingerprint = circuit_fingerprint(circuit_type, hamiltonian)
+        run_ids = run_ids or [f"start_{index}" for index in range(len(results))]
+        created = time.strftime('%Y-%m-%dT%H:%M:%S')
+        changed = 0
+        db = self._db()
+        with db:
+            for run_id, (params, cost_history) in zip(run_ids, results):
+                if not len(cost_history) or not np.isfinite(cost_history[-1]):
+                    continue
+                params = np.asarray(params, dtype=float).ravel()
+                # Точки, отличающиеся на период, дают одну и ту же стоимость
+                quantized = np.round(np.mod(params, PERIOD), self.decimals) + 0.0
+                key = hashlib.sha1(fingerprint.encode('utf-8') + quantized.tobytes()).digest()
+                cursor = db.execute(
+                    'INSERT INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET final_cost = excluded.final_cost, config_hash = excluded.config_hash, run_id = excluded.run_id, steps = excluded.steps, created = excluded.created '
+                    'WHERE excluded.final_cost < solutions.final_cost',
+                    (key, fingerprint, circuit_type, params.size, config_hash, run_id, params.tobytes(), float(cost_history[-1]), len(cost_history), created),
+                )
+                changed += cursor.rowcount
+        return changed
+
+    def best(self, circuit_type: str, hamiltonian: Optional[str] = None, count: int = 10, min_distance: float = 1e-2) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the lowest-cost distinct solutions known for a circuit and Hamiltonian.
+
+        Solutions are taken in order of cost and skipped if they lie within ``min_distance``
+        (periodic Euclidean distance) of an already selected one, since repeated runs
+        usually converge to the same minimum.
+
+        Args:
+            circuit_type: A string indicating the type of the circuit.
+            hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+            count: The maximum number of solutions.
+            min_distance: The minimum distance between two returned solutions.
+
+        Returns:
+            A tuple of the (k, n_params) parameters, k <= count, and their final costs, lowest first.
+        """
+        n = num_params(circuit_type)
+        rows = self._db().execute('SELECT params, final_cost FROM solutions WHERE fingerprint = ? AND n_params = ? ORDER BY final_cost', (circuit_fingerprint(circuit_type, hamiltonian), n))
+        selected, costs = [], []
+        for params, cost in rows:
+            params = np.frombuffer(params, dtype=float)
+            if selected:
+                delta = np.abs(np.array(selected) - params) % PERIOD
+                if np.linalg.norm(np.minimum(delta, PERIOD - delta), axis=1).min() < min_distance:
+                    continue
+            selected.append(params)
+            costs.append(cost)
+            if len(selected) == count:
+                break
+        return np.array(selected).reshape(-1, n), np.array(costs)
+
+    def __len__(self) -> int:
+        return self._db().execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+def warm_starts(store: ParameterStore, circuit_type: str, hamiltonian: Optional[str], count: int, spread: float = 0.05, min_distance: float = 1e-2, seed: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    Choose initial parameters for a multi-start optimization from the best known solutions.
+
+    The first starts are the distinct stored solutions in order of cost, unperturbed; the
+    remaining starts reuse them in the same order with Gaussian perturbations of standard
+    deviation ``spread`` (as a fraction of the 2π range), so they explore the
+    neighborhood of the known minima.
+
+    Args:
+        store: The ParameterStore.
+        circuit_type: A string indicating the type of the circuit.
+        hamiltonian: The name of a registered Hamiltonian, or None to measure PauliZ(0).
+        count: The number of starts to seed.
+        spread: The relative size of the perturbations.
+        min_distance: The minimum distance between two reused solutions (see ParameterStore.best).
+        seed: The seed of the perturbations.
+
+    Returns:
+        A (count, n_params) array of initial parameters, or None if no solution is known.
+    """
+    if count <= 0:
+        return None
+    solutions, costs = store.best(circuit_type, hamiltonian, count, min_distance)
+    if not len(solutions):
+        return None
+    rng = np.random.default_rng(seed)
+    starts = solutions[np.arange(count) % len(solutions)].copy()
+    reused = np.arange(count) >= len(solutions)
+    starts[reused] += rng.normal(scale=spread * PERIOD, size=(reused.sum(), starts.shape[1]))
+    logging.info(f"Warm-started {count} starts from {len(solutions)} stored solutions (lowest cost {costs[0]:.4f}).")
+    return starts
+
+def store_from_config(config: Dict[str, Any]) -> Optional[ParameterStore]:
+    """
+    Open the store described by the ``warm_start`` config section, or return None if warm starts are disabled.
+    """
+    settings = config.get('warm_start') or {}
+    if not settings.get('enabled', False):
+        return None
+    return ParameterStore(settings.get('path') or os.path.join(config['results_dir'], 'warm_start.sqlite'))
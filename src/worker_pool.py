@@ -0,0 +1,150 @@
+import logging
+import multiprocessing
+import queue
+import traceback
+from multiprocessing.pool import AsyncResult
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+def _run_chunk(func: Callable, chunk: Sequence[Tuple[int, Sequence[Any]]]) -> List[Tuple[int, Any]]:
+    """
+    Run one chunk of indexed tasks inside a worker process.
+
+    Args:
+        func: The task function.
+        chunk: A sequence of (task index, positional arguments) pairs.
+
+    Returns:
+        A list of (task index, result) pairs.
+    """
+    return [(index, func(*args)) for index, args in chunk]
+
+def call_safely(func: Callable, *args: Any) -> Tuple[Any, Optional[str]]:
+    """
+    Run a task and return its error instead of raising it.
+
+    ``imap_unordered`` stops at the first task that raises; tasks wrapped with this
+    function let the caller collect the failures and retry them.
+
+    Args:
+        func: The task function.
+        args: Positional arguments for ``func``.
+
+    Returns:
+        A tuple of the result and None, or of None and the formatted traceback.
+    """
+    try:
+        return func(*args), None
+    except Exception:
+        return None, traceback.format_exc()
+
+class WorkerPool:
+    """
+    A long-lived process pool shared by the optimization and analysis phases.
+
+    Tasks are handed out a chunk at a time and only ``processes`` chunks are kept in
+    flight, so a worker that finishes early immediately takes the next chunk and
+    any task submitted with ``submit`` in the meantime does not wait behind the whole
+    backlog.
+    """
+
+    def __init__(self, processes: Optional[int] = None, initializer: Optional[Callable] = None, initargs: Tuple = ()) -> None:
+        """
+        Start the worker processes.
+
+        Args:
+            processes: The number of worker processes. Defaults to the CPU count.
+            initializer: An optional function run once in every worker.
+            initargs: Arguments passed to ``initializer``.
+        """
+        self.processes = processes or multiprocessing.cpu_count()
+        self._pool = multiprocessing.Pool(processes=self.processes, initializer=initializer, initargs=initargs)
+        logging.info(f"Started worker pool with {self.processes} processes.")
+
+    def __enter__(self) -> 'WorkerPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+    def submit(self, func: Callable, args: Sequence[Any] = ()) -> AsyncResult:
+        """
+        Schedule a single task.
+
+        Args:
+            func: The task function.
+            args: Positional arguments for ``func``.
+
+        Returns:
+            An AsyncResult for the task.
+        """
+        return self._pool.apply_async(func, tuple(args))
+
+    def imap_unordered(self, func: Callable, args_list: Iterable[Sequence[Any]], chunksize: int = 1) -> Iterator[Tuple[int, Any]]:
+        """
+        Run ``func`` over many argument tuples and yield results in completion order.
+
+        Args:
+            func: The task function.
+            args_list: An iterable of positional argument tuples, one per task.
+            chunksize: The number of tasks sent to a worker at once.
+
+        Yields:
+            (task index, result) pairs as soon as each chunk finishes.
+
+        Raises:
+            ValueError: If ``chunksize`` is less than 1.
+        """
+        if chunksize < 1:
+            raise ValueError(f"chunksize must be at least 1, got {chunksize}")
+        tasks = list(enumerate(args_list))
+        chunks = iter([tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)])
+        done = queue.Queue()
+
+        def submit_next() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            self._pool.apply_async(_run_chunk, (func, chunk), callback=done.put, error_callback=done.put)
+            return True
+
+        in_flight = sum(submit_next() for _ in range(self.processes))
+        while in_flight:
+            item = done.get()
+            in_flight -= 1
+            if isinstance(item, BaseException):
+                raise item
+            in_flight += submit_next()
+            for index, result in item:
+                yield index, result
+
+    def map(self, func: Callable, args_list: Iterable[Sequence[Any]], chunksize: int = 1) -> List[Any]:
+        """
+        Run ``func`` over many argument tuples and return the results in input order.
+
+        Args:
+            func: The task function.
+            args_list: An iterable of positional argument tuples, one per task.
+            chunksize: The number of tasks sent to a worker at once.
+
+        Returns:
+            A list of results, ordered like ``args_list``.
+        """
+        results = dict(self.imap_unordered(func, args_list, chunksize))
+        return [results[index] for index in range(len(results))]
+
+    def close(self) -> None:
+        """
+        Wait for all scheduled tasks and stop the workers.
+        """
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self) -> None:
+        """
+        Stop the workers immediately, discarding pending tasks.
+        """
+        self._pool.terminate()
+        self._pool.join()